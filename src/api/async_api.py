@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+
+from src.config.api_config import API_MAX_CONCURRENCY, HTTP_POOL_MAXSIZE
+from src.core.metrics import in_current_span
+
+if TYPE_CHECKING:
+    from src.api.base_api import BaseAPI
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide executor that runs blocking API calls.
+
+    It is sized to the per-host connection pool, more threads would only
+    wait for a free pooled connection.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HTTP_POOL_MAXSIZE, thread_name_prefix='erpnext-api')
+    return _executor
+
+
+class AsyncBaseAPI:
+    """Async sibling of BaseAPI with bounded concurrency.
+
+    Requests are executed by the wrapped endpoint on the shared executor, so
+    they use the same pooled session, error handling and payload logging as
+    the synchronous API.
+    """
+
+    def __init__(self, api: 'BaseAPI', max_concurrency: int = API_MAX_CONCURRENCY):
+        self.api = api
+        self.max_concurrency = max_concurrency
+        # asyncio primitives are bound to one event loop, keep one semaphore per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def _run(self, func, *args):
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            # Bound to the caller's context, so the call is traced and profiled as part of the caller's stage
+            return await loop.run_in_executor(get_executor(), in_current_span(func, *args))
+
+    async def acreate(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new document via API."""
+        return await self._run(self.api.create, data)
+
+    async def aget(self, name: str) -> Dict[str, Any]:
+        """Fetch a document via API."""
+        return await self._run(self.api.get, name)
+
+    async def acreate_many(self, docs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Create documents concurrently.
+
+        Returns one entry per input document, in input order: the created
+        document content, or None if the document could not be created.
+        """
+        return await asyncio.gather(*(self._run(self.api._create_or_none, doc) for doc in docs))
@@ -1,13 +1,22 @@
+import asyncio
 import json
+import time
 from datetime import datetime
-from pathlib import Path
 
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
-from src.config.api_config import BASE_URL, API_KEY
+from src.api.async_api import AsyncBaseAPI
+from src.api.failure_log import get_failure_log, truncate_body
+from src.api.retry import RetryPolicy, get_rate_limiter, parse_retry_after
+from src.api.session import get_session, request_slots
+from src.config.api_config import (
+    BASE_URL, API_KEY, HTTP_TIMEOUT, BULK_INSERT_ENABLED, BULK_INSERT_CHUNK_SIZE,
+    API_MAX_RETRIES, API_RETRY_BUDGETS
+)
 from src.core.base_transaction import BaseConfig
 from src.core.logging import ProcessLogger
+from src.core.metrics import get_metrics
 
 
 class BaseAPI:
@@ -19,6 +28,15 @@ class BaseAPI:
         self.logger = ProcessLogger(self.config)
         self.base_url = BASE_URL
         self.api_key = API_KEY
+        self.session = get_session()
+        self.rate_limiter = get_rate_limiter()
+        # Retry budget, configurable per endpoint via API_RETRY_BUDGETS or by overriding in subclasses
+        self.retry_policy = RetryPolicy(
+            max_retries=API_RETRY_BUDGETS.get(self.config.process_type, API_MAX_RETRIES)
+        )
+        # Child table fieldname -> child doctype, used to resolve row names after bulk inserts
+        self.child_doctypes: Dict[str, str] = {}
+        self._async_api: Optional[AsyncBaseAPI] = None
         self.headers = {
             "Authorization": f"token {self.api_key}",
             "Accept": "application/json",
@@ -26,53 +44,114 @@ class BaseAPI:
         }
 
     def save_failed_api_payload(self, endpoint: str, payload: Dict[str, Any],
-                                error_message: str, response: Optional[requests.Response] = None) -> Path:
-        """Save failed API payload and response details."""
-        identifier = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_path = self.config.get_api_payload_path(identifier)
-
+                                error_message: str, response: Optional[requests.Response] = None,
+                                path: str = "resource") -> str:
+        """Queue the failed API payload and response details for the failure log, return the record ID."""
         error_payload = {
             "error_message": error_message,
             "timestamp": datetime.now().isoformat(),
+            "process_type": self.config.process_type,
+            "doctype": getattr(self, "doctype", None),
             "endpoint": endpoint,
             "request": {
-                "url": f"{self.base_url}/resource/{endpoint}",
-                "headers": {k: v for k, v in self.headers.items() if k != "Authorization"},
+                "url": f"{self.base_url}/{path}/{endpoint}",
                 "payload": payload
             }
         }
 
-        if response:
+        if response is not None:
             error_payload["response"] = {
                 "status_code": response.status_code,
                 "headers": dict(response.headers),
-                "body": response.text
+                "body": truncate_body(response.text)
             }
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(error_payload, f, indent=2, ensure_ascii=False)
+        return get_failure_log().submit(self.config.get_failure_log_path(), error_payload)
 
-        return file_path
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                      path: str = "resource", idempotent: Optional[bool] = None,
+                      endpoint_label: Optional[str] = None) -> Dict[str, Any]:
+        """Make an API request with rate limiting, retries and improved error handling.
 
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make an API request with improved error handling."""
-        url = f"{self.base_url}/resource/{endpoint}"
+        path selects the REST namespace: "resource" for documents, "method" for
+        whitelisted server methods such as frappe.client.insert_many. POSTs are
+        writes unless idempotent is set: they are only retried when the server
+        certainly did not process them, other failures go to the failure log.
+        endpoint_label names the endpoint in the metrics if endpoint holds a
+        document name, which would add a series per document.
+        """
+        url = f"{self.base_url}/{path}/{endpoint}"
+        policy = self.retry_policy
+        if idempotent is None:
+            idempotent = method != "POST"
+        attempt = 0
+        body = None
+        response = None
+        status = "error"
+        started = time.perf_counter()
+        request_seconds = 0.0
 
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                json=data,
-                headers=self.headers,
-                verify=True
-            )
+            # Encoded once here instead of by requests, so the payload size is known for the metrics.
+            # A payload that cannot be encoded (NaN, numpy scalars) fails like any request below.
+            if data is not None:
+                body = json.dumps(data, allow_nan=False).encode('utf-8')
+            while True:
+                self.rate_limiter.acquire()
+                try:
+                    with request_slots:
+                        request_started = time.perf_counter()
+                        try:
+                            response = self.session.request(
+                                method=method,
+                                url=url,
+                                data=body,
+                                headers=self.headers,
+                                timeout=HTTP_TIMEOUT,
+                                verify=True
+                            )
+                        finally:
+                            request_seconds = time.perf_counter() - request_started
+                except requests.exceptions.RequestException as e:
+                    if policy.is_retryable_error(e, idempotent) and attempt < policy.max_retries:
+                        delay = policy.backoff(attempt)
+                        attempt += 1
+                        self.logger.log_warning(f"Request error: {str(e)}, retry {attempt}/{policy.max_retries} "
+                                                f"in {delay:.1f}s")
+                        time.sleep(delay)
+                        continue
+
+                    error_msg = f"Request error: {str(e)}"
+                    self.save_failed_api_payload(
+                        endpoint=endpoint,
+                        payload=data,
+                        error_message=error_msg,
+                        path=path
+                    )
+                    self.logger.log_error(error_msg)
+                    raise
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    self.rate_limiter.on_throttle(retry_after)
 
+                if policy.is_retryable_status(response.status_code, idempotent) and attempt < policy.max_retries:
+                    delay = max(retry_after or 0.0, policy.backoff(attempt))
+                    attempt += 1
+                    self.logger.log_warning(f"API request failed: {response.status_code}, "
+                                            f"retry {attempt}/{policy.max_retries} in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                break
+
+            status = str(response.status_code)
             try:
                 response_data = response.json()
             except json.JSONDecodeError:
                 response_data = {"text": response.text}
 
             if response.ok:
+                self.rate_limiter.on_success()
                 if isinstance(response_data, dict):
                     if "message" in response_data:
                         return {"data": response_data["message"]}
@@ -83,29 +162,173 @@ class BaseAPI:
                 return {"data": response_data}
 
             error_msg = f"API request failed: {response.status_code}"
-            error_path = self.save_failed_api_payload(
+            self.save_failed_api_payload(
                 endpoint=endpoint,
                 payload=data,
                 error_message=error_msg,
-                response=response
+                response=response,
+                path=path
             )
             self.logger.log_error(f"Request failed: {error_msg}")
-            raise requests.exceptions.RequestException(error_msg)
+            raise requests.exceptions.HTTPError(error_msg, response=response)
 
         except Exception as e:
             if not isinstance(e, requests.exceptions.RequestException):
                 error_msg = f"Request error: {str(e)}"
-                error_path = self.save_failed_api_payload(
+                self.save_failed_api_payload(
                     endpoint=endpoint,
                     payload=data,
-                    error_message=error_msg
+                    error_message=error_msg,
+                    path=path
                 )
                 self.logger.log_error(error_msg)
             raise
 
+        finally:
+            get_metrics().observe_request(
+                method=method,
+                endpoint=endpoint_label or endpoint,
+                doctype=getattr(self, "doctype", None),
+                status=status,
+                seconds=request_seconds,
+                total_seconds=time.perf_counter() - started,
+                payload_bytes=len(body or b""),
+                response_bytes=len(response.content) if response is not None else 0,
+                retries=attempt
+            )
+
     def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new document via API."""
         try:
             return self._make_request("POST", self.doctype, data)
         except Exception:
-            raise
\ No newline at end of file
+            raise
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Fetch a document of this endpoint's doctype by name."""
+        return self._make_request("GET", f"{self.doctype}/{name}", endpoint_label=f"{self.doctype}/{{name}}")
+
+    @property
+    def async_api(self) -> AsyncBaseAPI:
+        """Async variant of this endpoint, created on first use."""
+        if self._async_api is None:
+            self._async_api = AsyncBaseAPI(self)
+        return self._async_api
+
+    async def acreate(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new document via API without blocking the event loop."""
+        return await self.async_api.acreate(data)
+
+    async def aget(self, name: str) -> Dict[str, Any]:
+        """Fetch a document via API without blocking the event loop."""
+        return await self.async_api.aget(name)
+
+    async def acreate_many(self, docs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Create documents concurrently, see AsyncBaseAPI.acreate_many."""
+        return await self.async_api.acreate_many(docs)
+
+    def create_concurrently(self, docs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Blocking wrapper around acreate_many for synchronous callers."""
+        return asyncio.run(self.acreate_many(docs))
+
+    def create_many(self, docs: List[Dict[str, Any]],
+                    chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> List[Optional[Dict[str, Any]]]:
+        """Create documents in bulk via frappe.client.insert_many.
+
+        Returns one entry per input document, in input order: the created
+        document's name plus its child row names (shaped like create()["data"]),
+        or None if the document could not be created or resolved. A chunk
+        rejected by the server is retried document by document so one invalid
+        payload does not drop the whole chunk. A chunk whose insert may have
+        been committed is never posted again. With bulk inserts disabled all
+        documents are uploaded concurrently instead.
+        """
+        if not BULK_INSERT_ENABLED:
+            return self.create_concurrently(docs)
+
+        results: List[Optional[Dict[str, Any]]] = []
+        for start in range(0, len(docs), chunk_size):
+            chunk = docs[start:start + chunk_size]
+            try:
+                response = self._make_request("POST", "frappe.client.insert_many", {"docs": chunk}, path="method")
+            except Exception as e:
+                if not self.retry_policy.was_rejected(e):
+                    self.logger.log_error(f"Bulk insert of {len(chunk)} {self.doctype} documents has an unknown "
+                                          f"outcome ({str(e)}), not posting them again")
+                    results.extend([None] * len(chunk))
+                    continue
+                self.logger.log_warning(f"Bulk insert of {len(chunk)} {self.doctype} documents failed ({str(e)}), "
+                                        f"falling back to single inserts")
+                results.extend(self.create_concurrently(chunk))
+                continue
+            results.extend(self._resolve_chunk(chunk, response.get("data") or []))
+        return results
+
+    def _resolve_chunk(self, chunk: List[Dict[str, Any]], names: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Map the names created by insert_many back to the payloads of the chunk.
+
+        The documents exist at this point. If they cannot be resolved they are
+        reported as unresolved (None) and logged, but not created again.
+        """
+        try:
+            if len(names) != len(chunk):
+                raise ValueError(f"insert_many returned {len(names)} names for {len(chunk)} documents")
+            return self._resolve_names(chunk, names)
+        except Exception as e:
+            self.logger.log_error(f"Created {len(names)} {self.doctype} documents but could not resolve them "
+                                  f"({str(e)}), not posting them again: {', '.join(map(str, names))}")
+            return [None] * len(chunk)
+
+    def _resolve_names(self, chunk: List[Dict[str, Any]], names: List[str]) -> List[Dict[str, Any]]:
+        # insert_many returns an unordered set of names. The documents are inserted
+        # sequentially, so ordering them by creation time restores the input order.
+        created = self._get_list(self.doctype, ["name", "creation"], [["name", "in", list(names)]],
+                                 order_by="creation asc, name asc")
+        if len(created) != len(chunk):
+            raise ValueError(f"Could not resolve {len(chunk) - len(created)} created {self.doctype} documents")
+        return self.fetch_contents([row["name"] for row in created])
+
+    def fetch_contents(self, names: List[str]) -> List[Dict[str, Any]]:
+        """Name and child row names of existing documents, shaped like create_many results."""
+        contents = [{"name": name} for name in names]
+        for fieldname, child_doctype in self.child_doctypes.items():
+            rows_by_parent: Dict[str, List[Dict[str, Any]]] = {}
+            child_rows = self._get_list(child_doctype, ["name", "parent", "idx"],
+                                        [["parent", "in", list(names)]],
+                                        order_by="parent asc, idx asc", parent_doctype=self.doctype)
+            for row in child_rows:
+                rows_by_parent.setdefault(row["parent"], []).append({"name": row["name"], "idx": row["idx"]})
+            for content in contents:
+                content[fieldname] = rows_by_parent.get(content["name"], [])
+
+        return contents
+
+    def _get_list(self, doctype: str, fields: List[str], filters: List[List[Any]],
+                  order_by: Optional[str] = None, parent_doctype: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Query documents via frappe.client.get_list."""
+        data = {
+            "doctype": doctype,
+            "fields": fields,
+            "filters": filters,
+            "limit_page_length": 0
+        }
+        if order_by:
+            data["order_by"] = order_by
+        if parent_doctype:
+            # Child tables are queried through their parent's permissions
+            data["parent"] = parent_doctype
+        # A query, safe to send again
+        return self._make_request("POST", "frappe.client.get_list", data, path="method",
+                                  idempotent=True).get("data") or []
+
+    def _create_or_none(self, doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create a single document, returning its content or None on failure."""
+        try:
+            response = self.create(doc)
+        except Exception:
+            return None
+
+        content = response.get("data") if response else None
+        if isinstance(content, dict) and "name" in content:
+            return content
+        return None
@@ -0,0 +1,306 @@
+import argparse
+import ast
+import csv
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.api.base_api import BaseAPI
+from src.api.failure_log import read_failure_log
+from src.api.natural_keys import NATURAL_KEYS, find_existing
+from src.config.api_config import BULK_INSERT_CHUNK_SIZE
+from src.config.settings import API_PAYLOAD_DIR
+
+# Doctypes that ERPNext names after a field of the payload, so existing documents can be detected
+NAME_FIELDS = {
+    "Item": "item_code",
+    "Batch": "batch_id",
+    "Serial No": "serial_no",
+}
+
+
+# Server methods whose failures are not dead letters: the documents of a failed
+# insert_many chunk are retried one by one and recorded individually on failure
+SKIPPED_ENDPOINTS = ("frappe.client.insert_many", "frappe.client.get_list")
+
+
+@dataclass
+class DeadLetter:
+    """A document that could not be uploaded."""
+    fingerprint: str  # Hash of doctype and payload, identical for repeated failures of the same document
+    doctype: str
+    process_type: str
+    payload: Dict[str, Any]
+    error_message: str = ""
+    failed_at: str = ""
+    sources: List[str] = field(default_factory=list)  # Failure record IDs or files
+
+    @property
+    def name(self) -> Optional[str]:
+        """Name the document will get in ERPNext, if it is known up front."""
+        return self.payload.get("name") or self.payload.get(NAME_FIELDS.get(self.doctype, ""))
+
+    @property
+    def verifiable(self) -> bool:
+        """Whether an earlier upload of the document can be detected, by name or natural key."""
+        key = NATURAL_KEYS.get(self.doctype)
+        return bool(self.name) or (key is not None and key.applies(self.payload))
+
+
+def fingerprint(doctype: str, payload: Dict[str, Any]) -> str:
+    canonical = json.dumps([doctype, payload], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+class DeadLetterStore:
+    """Failed uploads collected from the failure logs, with their replay status.
+
+    Documents are deduplicated by fingerprint, so a document that failed
+    several times (or again during a replay) is replayed once. The replay
+    status is appended to a JSONL file next to the failure logs, the latest
+    entry per fingerprint wins.
+    """
+
+    def __init__(self, payload_dir: Path = API_PAYLOAD_DIR, status_path: Optional[Path] = None):
+        self.payload_dir = payload_dir
+        self.status_path = status_path or payload_dir / 'replay_status.jsonl'
+        self._lock = threading.Lock()
+
+    # Sources
+
+    def _failure_records(self, process_type: Optional[str]) -> Iterator[Dict[str, Any]]:
+        pattern = f"{process_type or '*'}/failed_*"
+        for path in sorted(self.payload_dir.glob(pattern)):
+            if path.name.endswith('.jsonl.gz'):
+                yield from read_failure_log(path)
+            elif path.suffix == '.json':
+                # Older single-file payloads, see save_failed_api_payload before the failure log
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        record = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                record.setdefault("id", str(path.relative_to(self.payload_dir)))
+                record.setdefault("process_type", path.parent.name)
+                yield record
+
+    def load(self, process_type: Optional[str] = None) -> Dict[str, DeadLetter]:
+        """All failed documents of the failure logs by fingerprint."""
+        letters: Dict[str, DeadLetter] = {}
+        for record in self._failure_records(process_type):
+            endpoint = record.get("endpoint")
+            payload = (record.get("request") or {}).get("payload")
+            if endpoint in SKIPPED_ENDPOINTS or not isinstance(payload, dict):
+                continue
+            # Documents are posted to /resource/<doctype>, so the endpoint is the doctype
+            doctype = record.get("doctype") or endpoint
+            self._add(letters, doctype, record["process_type"], payload, record.get("id", ""),
+                      record.get("error_message", ""), record.get("timestamp", ""))
+        return letters
+
+    def load_csv(self, path: Path, doctype: str, process_type: str) -> Dict[str, DeadLetter]:
+        """Failed documents saved as CSV rows, e.g. failed_stock_entries.csv.
+
+        Child tables were written as Python literals by csv.DictWriter and are
+        parsed back into lists.
+        """
+        letters: Dict[str, DeadLetter] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                payload = {}
+                for key, value in row.items():
+                    if value and value[0] in '[{':
+                        try:
+                            value = ast.literal_eval(value)
+                        except (ValueError, SyntaxError):
+                            pass
+                    payload[key] = value
+                self._add(letters, doctype, process_type, payload, f"{path.name}:{line}")
+        return letters
+
+    @staticmethod
+    def _add(letters: Dict[str, DeadLetter], doctype: str, process_type: str, payload: Dict[str, Any],
+             source: str, error_message: str = "", failed_at: str = ""):
+        key = fingerprint(doctype, payload)
+        letter = letters.get(key)
+        if letter is None:
+            letter = letters[key] = DeadLetter(key, doctype, process_type, payload)
+        letter.sources.append(source)
+        if failed_at >= letter.failed_at:
+            letter.error_message, letter.failed_at = error_message, failed_at
+
+    # Replay status
+
+    def statuses(self) -> Dict[str, Dict[str, Any]]:
+        """Latest replay status per fingerprint."""
+        statuses = {}
+        if not self.status_path.exists():
+            return statuses
+        with open(self.status_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                statuses[entry['fingerprint']] = entry
+        return statuses
+
+    def record_status(self, entries: List[Dict[str, Any]]):
+        """Append replay results (fingerprint, status, name, error) with a single disk sync."""
+        timestamp = datetime.now().isoformat()
+        lines = ''.join(json.dumps({**entry, 'timestamp': timestamp}, ensure_ascii=False) + '\n'
+                        for entry in entries)
+        with self._lock:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.status_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def pending(self, letters: Dict[str, DeadLetter]) -> List[DeadLetter]:
+        """Dead letters not yet replayed or found to exist already, oldest failure first."""
+        done = {key for key, entry in self.statuses().items() if entry['status'] in ('replayed', 'exists')}
+        return sorted((letter for key, letter in letters.items() if key not in done),
+                      key=lambda letter: letter.failed_at)
+
+
+class DeadLetterReplayer:
+    """Re-posts dead letters per doctype through the bulk or pooled concurrent API path.
+
+    Documents that exist already, found by name or natural key, are only
+    marked as such. Documents that cannot be checked would be created twice
+    if their first upload went through, so they are skipped unless
+    replay_unverified is set.
+    """
+
+    def __init__(self, store: DeadLetterStore, bulk: bool = True, chunk_size: int = BULK_INSERT_CHUNK_SIZE,
+                 replay_unverified: bool = False):
+        self.store = store
+        self.bulk = bulk
+        self.chunk_size = chunk_size
+        self.replay_unverified = replay_unverified
+        self._apis: Dict[str, BaseAPI] = {}
+
+    def _api(self, letter: DeadLetter) -> BaseAPI:
+        api = self._apis.get(letter.doctype)
+        if api is None:
+            api = BaseAPI(letter.process_type)
+            api.doctype = letter.doctype
+            self._apis[letter.doctype] = api
+        return api
+
+    def _chunks(self, values: List[Any]) -> Iterator[List[Any]]:
+        for start in range(0, len(values), self.chunk_size):
+            yield values[start:start + self.chunk_size]
+
+    def _existing(self, api: BaseAPI, letters: List[DeadLetter]) -> Dict[str, str]:
+        """Fingerprint -> name of the letters that exist in ERPNext already."""
+        named = [letter for letter in letters if letter.name]
+        names = set()
+        for chunk in self._chunks([letter.name for letter in named]):
+            rows = api._get_list(api.doctype, ["name"], [["name", "in", chunk]])
+            names.update(row["name"] for row in rows)
+        existing = {letter.fingerprint: letter.name for letter in named if letter.name in names}
+
+        key = NATURAL_KEYS.get(api.doctype)
+        keyed = [letter for letter in letters if not letter.name and key and key.applies(letter.payload)]
+        if keyed:
+            found = find_existing(api, [letter.payload for letter in keyed], self.chunk_size)
+            existing.update((letter.fingerprint, name) for letter, name in zip(keyed, found) if name)
+        return existing
+
+    def replay(self, letters: List[DeadLetter], dry_run: bool = False) -> Dict[str, int]:
+        """Replay letters, return the number of documents per resulting status."""
+        counts = {"replayed": 0, "exists": 0, "failed": 0, "unverified": 0}
+        by_doctype: Dict[str, List[DeadLetter]] = {}
+        for letter in letters:
+            by_doctype.setdefault(letter.doctype, []).append(letter)
+
+        for doctype, doctype_letters in by_doctype.items():
+            api = self._api(doctype_letters[0])
+            existing = self._existing(api, doctype_letters)
+            found = [letter for letter in doctype_letters if letter.fingerprint in existing]
+            if found:
+                self.store.record_status([{"fingerprint": letter.fingerprint, "status": "exists",
+                                           "name": existing[letter.fingerprint]} for letter in found])
+                counts["exists"] += len(found)
+                doctype_letters = [letter for letter in doctype_letters if letter.fingerprint not in existing]
+
+            if not self.replay_unverified:
+                unverified = [letter for letter in doctype_letters if not letter.verifiable]
+                if unverified:
+                    # Left pending, a later run with --replay-unverified can still post them
+                    print(f"{doctype}: skipping {len(unverified)} documents that cannot be checked for an "
+                          f"earlier upload, use --replay-unverified to post them anyway")
+                    counts["unverified"] += len(unverified)
+                    doctype_letters = [letter for letter in doctype_letters if letter.verifiable]
+
+            if dry_run:
+                print(f"{doctype}: {len(doctype_letters)} documents would be replayed")
+                continue
+
+            for start in range(0, len(doctype_letters), self.chunk_size):
+                chunk = doctype_letters[start:start + self.chunk_size]
+                docs = [letter.payload for letter in chunk]
+                results = api.create_many(docs, self.chunk_size) if self.bulk else api.create_concurrently(docs)
+
+                entries = []
+                for letter, result in zip(chunk, results):
+                    status = "replayed" if result else "failed"
+                    counts[status] += 1
+                    entries.append({"fingerprint": letter.fingerprint, "status": status,
+                                    "name": result.get("name") if result else None})
+                self.store.record_status(entries)
+                print(f"{doctype}: {start + len(chunk)}/{len(doctype_letters)} replayed "
+                      f"({counts['failed']} failed so far)")
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List and replay failed ERPNext uploads")
+    parser.add_argument('command', choices=['list', 'replay'])
+    parser.add_argument('--process', default=None, help="process type, e.g. purchase_orders")
+    parser.add_argument('--doctype', default=None, help="only documents of this doctype")
+    parser.add_argument('--csv', type=Path, default=None, help="failed documents saved as CSV instead of logs")
+    parser.add_argument('--csv-doctype', default="Stock Entry", help="doctype of the CSV rows")
+    parser.add_argument('--limit', type=int, default=None, help="replay at most this many documents")
+    parser.add_argument('--no-bulk', action='store_true', help="post documents one by one, concurrently")
+    parser.add_argument('--dry-run', action='store_true', help="only check for existing documents")
+    parser.add_argument('--replay-unverified', action='store_true',
+                        help="also post documents that cannot be checked for an earlier upload, "
+                             "which duplicates them if that upload went through")
+    args = parser.parse_args()
+
+    store = DeadLetterStore()
+    if args.csv:
+        letters = store.load_csv(args.csv, args.csv_doctype, args.process or "stock_entries")
+    else:
+        letters = store.load(args.process)
+    if args.doctype:
+        letters = {key: letter for key, letter in letters.items() if letter.doctype == args.doctype}
+
+    if args.command == 'list':
+        statuses = store.statuses()
+        summary: Dict[tuple, int] = {}
+        for key, letter in letters.items():
+            status = statuses.get(key, {}).get('status', 'pending')
+            summary[(letter.doctype, status)] = summary.get((letter.doctype, status), 0) + 1
+        for (doctype, status), count in sorted(summary.items()):
+            print(f"{doctype:<25} {status:<10} {count:>8}")
+        return
+
+    pending = store.pending(letters)[:args.limit]
+    print(f"Replaying {len(pending)} of {len(letters)} failed documents")
+    counts = DeadLetterReplayer(store, bulk=not args.no_bulk,
+                                replay_unverified=args.replay_unverified).replay(pending, dry_run=args.dry_run)
+    print(f"Replayed: {counts['replayed']}, already existing: {counts['exists']}, failed: {counts['failed']}, "
+          f"skipped as unverifiable: {counts['unverified']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,3 +7,4 @@ class BOMAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("bom")
         self.doctype = "BOM"
+        self.child_doctypes = {"items": "BOM Item"}
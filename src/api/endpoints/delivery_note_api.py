@@ -7,3 +7,4 @@ class DeliveryNoteAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("delivery_note")
         self.doctype = "Delivery Note"
+        self.child_doctypes = {"items": "Delivery Note Item"}
@@ -7,3 +7,4 @@ class MaterialRequestAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("material_request")
         self.doctype = "Material Request"
+        self.child_doctypes = {"items": "Material Request Item"}
@@ -7,3 +7,4 @@ class PaymentEntryAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("payment_entry")
         self.doctype = "Payment Entry"
+        self.child_doctypes = {"references": "Payment Entry Reference"}
@@ -7,3 +7,4 @@ class PurchaseInvoiceAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("purchase_invoice")
         self.doctype = "Purchase Invoice"
+        self.child_doctypes = {"items": "Purchase Invoice Item"}
@@ -8,3 +8,4 @@ class PurchaseOrderAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("purchase_orders")
         self.doctype = "Purchase Order"
+        self.child_doctypes = {"items": "Purchase Order Item"}
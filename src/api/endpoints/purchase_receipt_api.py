@@ -7,3 +7,4 @@ class PurchaseReceiptAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("purchase_receipt")
         self.doctype = "Purchase Receipt"
+        self.child_doctypes = {"items": "Purchase Receipt Item"}
@@ -7,3 +7,4 @@ class SalesInvoiceAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("sales_invoice")
         self.doctype = "Sales Invoice"
+        self.child_doctypes = {"items": "Sales Invoice Item"}
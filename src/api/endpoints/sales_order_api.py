@@ -7,3 +7,4 @@ class SalesOrderAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("sales_order")
         self.doctype = "Sales Order"
+        self.child_doctypes = {"items": "Sales Order Item"}
@@ -7,3 +7,4 @@ class StockEntryAPI(BaseAPI):
         # Explicitly set the process type to avoid any automatic derivation
         super().__init__("stock_entry")
         self.doctype = "Stock Entry"
+        self.child_doctypes = {"items": "Stock Entry Detail"}
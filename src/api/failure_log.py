@@ -0,0 +1,164 @@
+import atexit
+import gzip
+import json
+import logging
+import queue
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from src.config.api_config import FAILURE_LOG_QUEUE_SIZE, FAILURE_LOG_PUT_TIMEOUT, FAILURE_LOG_MAX_BODY
+
+_failure_log: Optional['FailureLog'] = None
+_failure_log_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class FailureLog:
+    """Append-only, gzip-compressed JSONL log of failed API requests.
+
+    Records are queued and written by a background thread, so callers do not
+    block on disk I/O. The queue is bounded: when the writer falls behind
+    during an error storm, a caller waits up to put_timeout seconds for room
+    and then writes its record itself, so memory stays bounded and no record
+    is lost. Only a record that cannot be written at all is dropped, counted
+    and logged. Each record gets a unique ID.
+    """
+
+    def __init__(self, queue_size: int = FAILURE_LOG_QUEUE_SIZE, put_timeout: float = FAILURE_LOG_PUT_TIMEOUT):
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._put_timeout = put_timeout
+        self._files: Dict[Path, gzip.GzipFile] = {}
+        # Serializes the writer thread and callers writing past a full queue
+        self._io_lock = threading.Lock()
+        self._spilled = 0
+        self._dropped = 0
+        self._counter_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="failure-log-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def spilled(self) -> int:
+        """Number of records written by the caller because the queue stayed full."""
+        return self._spilled
+
+    @property
+    def dropped(self) -> int:
+        """Number of records lost because they could not be written."""
+        return self._dropped
+
+    def submit(self, path: Path, record: Dict[str, Any]) -> str:
+        """Queue a record for path, return its ID.
+
+        Waits at most put_timeout seconds for a full queue, then writes the
+        record in the calling thread.
+        """
+        record = {"id": uuid.uuid4().hex, **record}
+        try:
+            self._queue.put((path, record), timeout=self._put_timeout)
+        except queue.Full:
+            self._spill(path, record)
+        return record["id"]
+
+    def _spill(self, path: Path, record: Dict[str, Any]):
+        try:
+            with self._io_lock:
+                self._write(path, record)
+                self._file(path).flush()
+        except Exception as e:
+            with self._counter_lock:
+                self._dropped += 1
+                dropped = self._dropped
+            logger.error(f"Dropped failure record {record['id']} for {path} ({dropped} dropped so far): {str(e)}")
+            return
+        with self._counter_lock:
+            self._spilled += 1
+            spilled = self._spilled
+        if spilled == 1 or spilled % 1000 == 0:
+            logger.warning(f"Failure log queue full, {spilled} records written by the caller so far")
+
+    def _file(self, path: Path) -> gzip.GzipFile:
+        file = self._files.get(path)
+        if file is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Appending adds a new gzip member, gzip readers treat the members as one stream
+            file = gzip.open(path, 'ab')
+            self._files[path] = file
+        return file
+
+    def _write(self, path: Path, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        self._file(path).write(line.encode('utf-8'))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            written = [item]
+            # Drain whatever queued up meanwhile before flushing once
+            while True:
+                try:
+                    written.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._io_lock:
+                for path, record in written:
+                    try:
+                        self._write(path, record)
+                    except Exception as e:
+                        with self._counter_lock:
+                            self._dropped += 1
+                            dropped = self._dropped
+                        logger.error(f"Dropped failure record {record.get('id')} for {path} "
+                                     f"({dropped} dropped so far): {str(e)}")
+                for file in self._files.values():
+                    # Sync flush, so everything written so far survives a crash
+                    file.flush()
+            for _ in written:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until all queued records are written."""
+        self._queue.join()
+
+    def close(self):
+        """Write all queued records and close the log files."""
+        self.flush()
+        with self._io_lock:
+            for file in self._files.values():
+                file.close()
+            self._files.clear()
+
+
+def truncate_body(text: Optional[str], limit: int = FAILURE_LOG_MAX_BODY) -> Optional[str]:
+    """Cap a response body, so a single HTML error page cannot bloat the log."""
+    if text is None or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} characters truncated]"
+
+
+def read_failure_log(path: Path) -> Iterator[Dict[str, Any]]:
+    """Read the records of a failure log, ignoring a line torn by a crash."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        except EOFError:
+            # The last member was not finished, everything before it is intact
+            return
+
+
+def get_failure_log() -> FailureLog:
+    """Return the process-wide failure log shared by all API endpoints."""
+    global _failure_log
+    if _failure_log is None:
+        with _failure_log_lock:
+            if _failure_log is None:
+                _failure_log = FailureLog()
+                atexit.register(_failure_log.close)
+    return _failure_log
@@ -0,0 +1,349 @@
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from src.config.api_config import (
+    MOCK_SERVER_HOST, MOCK_SERVER_PORT, MOCK_SERVER_LATENCY, MOCK_SERVER_LATENCY_JITTER,
+    MOCK_SERVER_ERROR_RATE, MOCK_SERVER_THROTTLE_RATE, MOCK_SERVER_SEED, MOCK_SERVER_SUBMIT_LAG
+)
+
+# Child table doctypes by (parent doctype, table fieldname), as queried after bulk inserts
+CHILD_DOCTYPES = {
+    ("Purchase Order", "items"): "Purchase Order Item",
+    ("Purchase Receipt", "items"): "Purchase Receipt Item",
+    ("Purchase Invoice", "items"): "Purchase Invoice Item",
+    ("Sales Order", "items"): "Sales Order Item",
+    ("Delivery Note", "items"): "Delivery Note Item",
+    ("Sales Invoice", "items"): "Sales Invoice Item",
+    ("Material Request", "items"): "Material Request Item",
+    ("Payment Entry", "references"): "Payment Entry Reference",
+    ("Stock Entry", "items"): "Stock Entry Detail",
+    ("BOM", "items"): "BOM Item",
+}
+
+DATE_FIELDS = ("transaction_date", "posting_date", "planned_start_date")
+
+
+class MockERPNextStore:
+    """In-memory documents with ERPNext-like name allocation.
+
+    Names follow the naming series ("PUR-ORD-.YYYY.-" becomes
+    "PUR-ORD-2023-00001"), child rows get a random hash name, idx and parent
+    fields, and every document gets a strictly increasing creation timestamp.
+    Submitted stock entries advance their work order's transferred and
+    produced quantities and status, after submit_lag seconds.
+    """
+
+    def __init__(self, seed: Optional[int] = MOCK_SERVER_SEED, submit_lag: float = MOCK_SERVER_SUBMIT_LAG):
+        self.documents: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.child_rows: Dict[str, List[Dict[str, Any]]] = {}
+        self.submit_lag = submit_lag
+        self._series: Dict[str, int] = {}
+        self._created = 0
+        self._epoch = datetime(2024, 1, 1)
+        self._random = random.Random(seed)
+        # (due time, stock entry) of submitted entries not yet applied to their work order
+        self._pending_entries: List[Tuple[float, Dict[str, Any]]] = []
+        self._lock = threading.RLock()
+
+    def _next_name(self, doctype: str, doc: Dict[str, Any]) -> str:
+        series = doc.get("naming_series") or f"{doctype.upper().replace(' ', '-')}-.YYYY.-"
+        date_value = next((str(doc[field]) for field in DATE_FIELDS if doc.get(field)), None)
+        year = date_value[:4] if date_value else str(datetime.now().year)
+        prefix = series.replace(".YYYY.", year).rstrip(".")
+        self._series[prefix] = self._series.get(prefix, 0) + 1
+        return f"{prefix}{self._series[prefix]:05d}"
+
+    def insert(self, doctype: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(doc, dict) or not doctype:
+            raise ValueError("Document must be a JSON object with a doctype")
+
+        with self._lock:
+            name = doc.get("name") or self._next_name(doctype, doc)
+            if name in self.documents.setdefault(doctype, {}):
+                raise ValueError(f"Duplicate name {name}")
+
+            self._created += 1
+            timestamp = (self._epoch + timedelta(microseconds=self._created)).isoformat(sep=' ')
+            stored = {**doc, "doctype": doctype, "name": name, "creation": timestamp, "modified": timestamp,
+                      "owner": "Administrator", "docstatus": doc.get("docstatus", 0)}
+
+            for fieldname, value in doc.items():
+                if not (isinstance(value, list) and value and all(isinstance(row, dict) for row in value)):
+                    continue
+                child_doctype = CHILD_DOCTYPES.get((doctype, fieldname)) or value[0].get("doctype")
+                rows = []
+                for idx, row in enumerate(value, start=1):
+                    rows.append({**row, "name": f"{self._random.getrandbits(40):010x}", "idx": idx,
+                                 "parent": name, "parenttype": doctype, "parentfield": fieldname,
+                                 "doctype": child_doctype, "creation": timestamp})
+                stored[fieldname] = rows
+                if child_doctype:
+                    self.child_rows.setdefault(child_doctype, []).extend(rows)
+
+            self.documents[doctype][name] = stored
+            if doctype == "Stock Entry" and stored["docstatus"] == 1 and stored.get("work_order"):
+                self._pending_entries.append((time.monotonic() + self.submit_lag, stored))
+            return stored
+
+    def insert_many(self, docs: List[Dict[str, Any]]) -> List[str]:
+        """Insert all documents or none, like Frappe's one transaction per request."""
+        with self._lock:
+            series, created = dict(self._series), self._created
+            inserted: List[Dict[str, Any]] = []
+            try:
+                for doc in docs:
+                    inserted.append(self.insert(doc.get("doctype") if isinstance(doc, dict) else None, doc))
+            except Exception:
+                self._rollback(inserted)
+                self._series, self._created = series, created
+                raise
+            return [doc["name"] for doc in inserted]
+
+    def _rollback(self, inserted: List[Dict[str, Any]]):
+        parents = {(doc["doctype"], doc["name"]) for doc in inserted}
+        for doctype, name in parents:
+            del self.documents[doctype][name]
+        for child_doctype, rows in self.child_rows.items():
+            self.child_rows[child_doctype] = [row for row in rows
+                                              if (row["parenttype"], row["parent"]) not in parents]
+        self._pending_entries = [(due_at, entry) for due_at, entry in self._pending_entries
+                                 if (entry["doctype"], entry["name"]) not in parents]
+
+    def _apply_stock_entries(self):
+        """Book due stock entries on their work orders, like ERPNext does on submit."""
+        now = time.monotonic()
+        due = [entry for due_at, entry in self._pending_entries if due_at <= now]
+        if not due:
+            return
+        self._pending_entries = [(due_at, entry) for due_at, entry in self._pending_entries if due_at > now]
+        for entry in due:
+            work_order = self.documents.get("Work Order", {}).get(entry["work_order"])
+            if work_order is None:
+                continue
+            qty = float(entry.get("fg_completed_qty") or 0)
+            if entry.get("purpose") == "Material Transfer for Manufacture":
+                work_order["material_transferred_for_manufacturing"] = \
+                    float(work_order.get("material_transferred_for_manufacturing") or 0) + qty
+                work_order["status"] = "In Process"
+            elif entry.get("purpose") == "Manufacture":
+                work_order["produced_qty"] = float(work_order.get("produced_qty") or 0) + qty
+                if work_order["produced_qty"] >= float(work_order.get("qty") or 0):
+                    work_order["status"] = "Completed"
+
+    def get(self, doctype: str, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._apply_stock_entries()
+            return self.documents.get(doctype, {}).get(name)
+
+    @staticmethod
+    def _matches(row: Dict[str, Any], filters: List[List[Any]]) -> bool:
+        for field, operator, value in filters:
+            if operator == "in" and row.get(field) not in value:
+                return False
+            if operator == "=" and row.get(field) != value:
+                return False
+            if operator == "!=" and row.get(field) == value:
+                return False
+        return True
+
+    def get_list(self, doctype: str, fields: List[str], filters: List[List[Any]],
+                 order_by: Optional[str] = None, parent: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._apply_stock_entries()
+            if doctype in self.child_rows or doctype in CHILD_DOCTYPES.values():
+                # Like Frappe, child tables can only be listed through their parent doctype
+                if not parent:
+                    raise ValueError(f"Child table {doctype} requires the parent doctype")
+                rows = [row for row in self.child_rows.get(doctype, []) if row["parenttype"] == parent]
+            else:
+                rows = list(self.documents.get(doctype, {}).values())
+            rows = [row for row in rows if self._matches(row, filters)]
+
+        for clause in reversed((order_by or "").split(",")):
+            parts = clause.split()
+            if parts:
+                rows.sort(key=lambda row: row.get(parts[0]) or "",
+                          reverse=len(parts) > 1 and parts[1].lower() == "desc")
+        return [{field: row.get(field) for field in fields} for row in rows]
+
+
+class MockERPNextHandler(BaseHTTPRequestHandler):
+    """REST subset of ERPNext used by the generators.
+
+    Supports POST/GET /api/resource/<doctype>[/<name>] and the server
+    methods frappe.client.insert_many and frappe.client.get_list.
+    """
+    server: 'MockERPNextServer'
+    protocol_version = "HTTP/1.1"  # Keep-alive, like ERPNext behind nginx
+    disable_nagle_algorithm = True  # Headers and body are written separately, avoid delayed-ACK stalls
+
+    def log_message(self, format: str, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self) -> Tuple[str, List[str]]:
+        parts = [unquote(part) for part in urlparse(self.path).path.split("/") if part]
+        if len(parts) < 3 or parts[0] != "api" or parts[1] not in ("resource", "method"):
+            return "", []
+        return parts[1], parts[2:]
+
+    def _inject_failure(self) -> bool:
+        """Simulate latency and, if configured, throttling and server errors."""
+        delay, failure = self.server.next_behaviour()
+        if delay:
+            time.sleep(delay)
+        if failure == 429:
+            self._send(429, {"exc_type": "TooManyRequestsError"}, {"Retry-After": "1"})
+            return True
+        if failure:
+            self._send(failure, {"exc_type": "ServiceUnavailable"})
+            return True
+        return False
+
+    def do_GET(self):
+        namespace, parts = self._route()
+        if self._inject_failure():
+            return
+        if namespace != "resource" or len(parts) != 2:
+            self._send(404, {"exc_type": "DoesNotExistError"})
+            return
+
+        doc = self.server.store.get(parts[0], parts[1])
+        if doc is None:
+            self._send(404, {"exc_type": "DoesNotExistError", "message": f"{parts[0]} {parts[1]} not found"})
+            return
+        self._send(200, {"data": doc})
+
+    def do_POST(self):
+        namespace, parts = self._route()
+        try:
+            body = self._read_json()
+        except json.JSONDecodeError:
+            self._send(400, {"exc_type": "ValidationError", "message": "Invalid JSON"})
+            return
+        if self._inject_failure():
+            return
+
+        store = self.server.store
+        try:
+            if namespace == "resource" and len(parts) == 1:
+                self._send(200, {"data": store.insert(parts[0], body)})
+            elif namespace == "method" and parts == ["frappe.client.insert_many"]:
+                docs = body.get("docs") or []
+                if len(docs) > 200:
+                    raise ValueError("Only 200 inserts allowed in one request")
+                self._send(200, {"message": store.insert_many(docs)})
+            elif namespace == "method" and parts == ["frappe.client.get_list"]:
+                self._send(200, {"message": store.get_list(body["doctype"], body.get("fields") or ["name"],
+                                                           body.get("filters") or [], body.get("order_by"),
+                                                           body.get("parent"))})
+            else:
+                self._send(404, {"exc_type": "DoesNotExistError"})
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(417, {"exc_type": "ValidationError", "message": str(e)})
+
+
+class MockERPNextServer(ThreadingHTTPServer):
+    """Local stand-in for the ERPNext REST API, e.g. as a deterministic benchmark target.
+
+    latency (+ up to latency_jitter) seconds are added to every request,
+    error_rate and throttle_rate are the shares of requests answered with 503
+    and 429. Latency and failures are drawn from a seeded generator.
+    """
+    daemon_threads = True
+
+    def __init__(self, host: str = MOCK_SERVER_HOST, port: int = MOCK_SERVER_PORT,
+                 latency: float = MOCK_SERVER_LATENCY, latency_jitter: float = MOCK_SERVER_LATENCY_JITTER,
+                 error_rate: float = MOCK_SERVER_ERROR_RATE, throttle_rate: float = MOCK_SERVER_THROTTLE_RATE,
+                 seed: Optional[int] = MOCK_SERVER_SEED, verbose: bool = False,
+                 submit_lag: float = MOCK_SERVER_SUBMIT_LAG):
+        super().__init__((host, port), MockERPNextHandler)
+        self.store = MockERPNextStore(seed, submit_lag)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.verbose = verbose
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def next_behaviour(self) -> Tuple[float, Optional[int]]:
+        """Draw the delay and the injected status code (or None) of the next request."""
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            draw = self._random.random()
+        if draw < self.throttle_rate:
+            return delay, 429
+        if draw < self.throttle_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+    def start(self) -> 'MockERPNextServer':
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-erpnext", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ERPNext stand-in server")
+    parser.add_argument('--host', default=MOCK_SERVER_HOST)
+    parser.add_argument('--port', type=int, default=MOCK_SERVER_PORT)
+    parser.add_argument('--latency', type=float, default=MOCK_SERVER_LATENCY, help="seconds per request")
+    parser.add_argument('--latency-jitter', type=float, default=MOCK_SERVER_LATENCY_JITTER)
+    parser.add_argument('--error-rate', type=float, default=MOCK_SERVER_ERROR_RATE, help="share of 503 responses")
+    parser.add_argument('--throttle-rate', type=float, default=MOCK_SERVER_THROTTLE_RATE,
+                        help="share of 429 responses")
+    parser.add_argument('--seed', type=int, default=MOCK_SERVER_SEED)
+    parser.add_argument('--submit-lag', type=float, default=MOCK_SERVER_SUBMIT_LAG,
+                        help="seconds until a submitted stock entry shows on its work order")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = MockERPNextServer(args.host, args.port, args.latency, args.latency_jitter,
+                               args.error_rate, args.throttle_rate, args.seed, args.verbose, args.submit_lag)
+    print(f"Mock ERPNext server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from src.api.base_api import BaseAPI
+from src.config.api_config import BULK_INSERT_CHUNK_SIZE
+
+
+def _key_value(value: Any) -> str:
+    """Comparable form of a key field, numbers compare by value whether posted as 5, 5.0 or "5"."""
+    try:
+        return repr(round(float(value), 6))
+    except (TypeError, ValueError):
+        return "" if value is None else str(value)
+
+
+@dataclass(frozen=True, slots=True)
+class NaturalKey:
+    """Fields that identify a document named by a naming series, whose name is unknown up front.
+
+    Header fields must all be set for a payload to be checked. If a child
+    table is given, its rows (compared by line_fields, in any order) must
+    match too.
+    """
+    fields: Tuple[str, ...]
+    table: Optional[str] = None
+    child_doctype: Optional[str] = None
+    line_fields: Tuple[str, ...] = ()
+
+    def applies(self, payload: Dict[str, Any]) -> bool:
+        return all(payload.get(field) not in (None, "") for field in self.fields)
+
+    def header(self, doc: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(_key_value(doc.get(field)) for field in self.fields)
+
+    def line(self, row: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(_key_value(row.get(field)) for field in self.line_fields)
+
+    def lines(self, rows: List[Dict[str, Any]]) -> List[Tuple[str, ...]]:
+        return sorted(self.line(row) for row in rows)
+
+
+# Natural keys of the naming-series doctypes the generators post
+NATURAL_KEYS = {
+    "Purchase Order": NaturalKey(("supplier", "transaction_date"), "items", "Purchase Order Item",
+                                 ("item_code", "qty")),
+    "Purchase Receipt": NaturalKey(("supplier", "posting_date"), "items", "Purchase Receipt Item",
+                                   ("item_code", "qty", "purchase_order")),
+    "Purchase Invoice": NaturalKey(("supplier", "bill_no")),
+    "Payment Entry": NaturalKey(("party", "reference_no", "paid_amount")),
+    "Stock Entry": NaturalKey(("work_order", "purpose", "posting_date", "fg_completed_qty")),
+}
+
+
+def find_existing(api: BaseAPI, payloads: List[Dict[str, Any]], chunk_size: int = BULK_INSERT_CHUNK_SIZE,
+                  exclude: Collection[str] = ()) -> List[Optional[str]]:
+    """Names of the documents of api's doctype that match payloads by natural key, None where none does.
+
+    Every existing document accounts for one payload at most, and documents
+    named in exclude (e.g. already matched to other payloads) for none.
+    Payloads the doctype's key does not apply to are never matched.
+    """
+    key = NATURAL_KEYS.get(api.doctype)
+    if key is None:
+        raise ValueError(f"No natural key known for {api.doctype}")
+    keyed = [payload for payload in payloads if key.applies(payload)]
+
+    def chunks(values: List[Any]):
+        for start in range(0, len(values), chunk_size):
+            yield values[start:start + chunk_size]
+
+    # Candidates share all header fields, queried by the first one
+    candidates: Dict[Tuple[str, ...], List[str]] = {}
+    values = list(dict.fromkeys(payload[key.fields[0]] for payload in keyed))
+    for chunk in chunks(values):
+        rows = api._get_list(api.doctype, ["name", *key.fields], [[key.fields[0], "in", chunk]],
+                             order_by="creation asc")
+        for row in rows:
+            if row["name"] not in exclude:
+                candidates.setdefault(key.header(row), []).append(row["name"])
+
+    lines: Dict[str, List[Tuple[str, ...]]] = {}
+    if key.table:
+        names = list(dict.fromkeys(name for payload in keyed for name in candidates.get(key.header(payload), [])))
+        rows_by_parent: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in chunks(names):
+            rows = api._get_list(key.child_doctype, ["parent", *key.line_fields], [["parent", "in", chunk]],
+                                 parent_doctype=api.doctype)
+            for row in rows:
+                rows_by_parent.setdefault(row["parent"], []).append(row)
+        lines = {name: key.lines(rows) for name, rows in rows_by_parent.items()}
+
+    found: List[Optional[str]] = []
+    used = set()
+    for payload in payloads:
+        match = None
+        if key.applies(payload):
+            for name in candidates.get(key.header(payload), []):
+                if name in used:
+                    continue
+                if key.table and key.lines(payload.get(key.table) or []) != lines.get(name, []):
+                    continue
+                match = name
+                break
+        if match:
+            used.add(match)
+        found.append(match)
+    return found
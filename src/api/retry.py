@@ -0,0 +1,160 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from src.config.api_config import (
+    API_MAX_RETRIES, API_BACKOFF_BASE, API_BACKOFF_MAX,
+    API_RATE_LIMIT, API_RATE_BURST, API_RATE_LIMIT_MIN
+)
+
+# Gateway statuses that do not tell whether the server processed the request before it failed
+AMBIGUOUS_STATUSES = (502, 504)
+
+_rate_limiter: Optional['AdaptiveRateLimiter'] = None
+_rate_limiter_lock = threading.Lock()
+
+
+@dataclass
+class RetryPolicy:
+    """Retry budget and backoff settings of an API endpoint."""
+    max_retries: int = API_MAX_RETRIES
+    backoff_base: float = API_BACKOFF_BASE
+    backoff_max: float = API_BACKOFF_MAX
+    retry_statuses: Tuple[int, ...] = (429, 502, 503, 504)
+    # Statuses that mean a write was not processed. Behind a gateway, 502 and 504 may
+    # follow a committed write, retrying the POST could create a duplicate.
+    write_retry_statuses: Tuple[int, ...] = (429, 503)
+
+    def is_retryable_status(self, status_code: int, idempotent: bool = True) -> bool:
+        return status_code in (self.retry_statuses if idempotent else self.write_retry_statuses)
+
+    @classmethod
+    def is_retryable_error(cls, error: Exception, idempotent: bool = True) -> bool:
+        """Connection failures of reads are retried, writes only if they were never sent.
+
+        Read timeouts are not retried: the server may already have created the
+        document, retrying the POST could create a duplicate.
+        """
+        if not idempotent:
+            return cls.was_not_sent(error)
+        return isinstance(error, requests.exceptions.ConnectionError)
+
+    @staticmethod
+    def was_not_sent(error: Exception) -> bool:
+        """Whether the request failed before it reached the server."""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, requests.exceptions.ConnectionError):
+            # requests wraps urllib3's MaxRetryError, which holds the actual cause
+            reason = error.args[0] if error.args else None
+            return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+        return False
+
+    @classmethod
+    def was_rejected(cls, error: Exception) -> bool:
+        """Whether a failed request certainly changed nothing on the server.
+
+        True for error responses, ERPNext rolls back the request's transaction,
+        and for requests that were never sent. Gateway errors, read timeouts
+        and connections lost after sending leave the outcome unknown.
+        """
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code not in AMBIGUOUS_STATUSES
+        if isinstance(error, requests.exceptions.RequestException):
+            return cls.was_not_sent(error)
+        return True  # Raised before sending, e.g. a payload that cannot be encoded
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """Token bucket that adapts its rate to throttling by the server.
+
+    Each 429 halves the rate (down to min_rate) and pauses all callers for the
+    Retry-After period, each successful request raises it again by a small step
+    up to the configured maximum (AIMD).
+    """
+
+    def __init__(self, rate: float = API_RATE_LIMIT, burst: int = API_RATE_BURST,
+                 min_rate: float = API_RATE_LIMIT_MIN):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.paused_until = 0.0
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rate > 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        if not self.enabled:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Return the process-wide rate limiter shared by all API endpoints."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = AdaptiveRateLimiter()
+    return _rate_limiter
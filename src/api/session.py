@@ -0,0 +1,67 @@
+import socket
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from src.config.api_config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK, HTTP_KEEP_ALIVE, API_MAX_IN_FLIGHT
+)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Caps the requests in flight across all endpoints and threads of the process
+request_slots = threading.BoundedSemaphore(API_MAX_IN_FLIGHT)
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTP adapter that enables TCP keep-alive on all pooled connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        if HTTP_KEEP_ALIVE:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def create_session(pool_connections: int = HTTP_POOL_CONNECTIONS,
+                   pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                   pool_block: bool = HTTP_POOL_BLOCK) -> requests.Session:
+    """Create a pooled HTTP session.
+
+    pool_maxsize limits the open connections per host, pool_block makes callers
+    wait for a free connection instead of exceeding that limit.
+    """
+    session = requests.Session()
+    adapter = KeepAliveAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive' if HTTP_KEEP_ALIVE else 'close'
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session shared by all API endpoints."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """Close the shared session and release all pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,276 @@
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.config.settings import OUTPUT_DIR, PROJECT_ROOT
+
+BENCHMARK_DIR = OUTPUT_DIR / 'benchmarks'
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+START_DATE = datetime(2023, 1, 1)
+END_DATE = datetime(2023, 12, 31)
+
+
+# Document factories shared by several cases
+
+def _purchase_orders(num_docs: int) -> List[Dict]:
+    """Purchase orders with the names ERPNext would assign, as input for follow-up documents."""
+    from src.core.master_data import get_master_data_store
+    from src.generators.transaction.Beschaffungsprozess.batch.purchase_order_engine import PurchaseOrderEngine
+
+    master_data = get_master_data_store()
+    engine = PurchaseOrderEngine(master_data.items_by_group('Fahrradkomponenten'), master_data.supplier_mapping(),
+                                 seed=0)
+    orders = list(engine.generate(START_DATE, END_DATE, num_docs).documents())
+    for i, po in enumerate(orders):
+        po['name'] = f"PUR-ORD-2023-{i:06d}"
+        po['items'][0]['name'] = f"{i:010x}"
+    return orders
+
+
+def _work_orders(num_docs: int, bom_ids: List[str]) -> List[Dict]:
+    return [{'ID': f"MFG-WO-2023-{i:06d}", 'BOM No': bom_ids[i % len(bom_ids)], 'Qty To Manufacture': '2'}
+            for i in range(num_docs)]
+
+
+# Cases: each prepares its input untimed and returns the per-document operation to time
+
+def case_purchase_order(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    from src.core.master_data import get_master_data_store
+    from src.generators.transaction.Beschaffungsprozess.batch.purchase_order_engine import PurchaseOrderEngine
+
+    master_data = get_master_data_store()
+    engine = PurchaseOrderEngine(master_data.items_by_group('Fahrradkomponenten'), master_data.supplier_mapping(),
+                                 seed=0)
+    columns = engine.generate(START_DATE, END_DATE, num_docs)
+    return columns.document, range(num_docs)
+
+
+def case_purchase_receipt(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    from src.generators.transaction.Beschaffungsprozess.batch.create_batch_purchase_order import (
+        BatchPurchaseOrderGenerator
+    )
+    from src.generators.transaction.Beschaffungsprozess.batch.create_batch_purchase_receipt import (
+        BatchPurchaseReceiptGenerator
+    )
+
+    generator = BatchPurchaseReceiptGenerator()
+    batch_info, batch_numbers = generator.load_batch_info()
+    receipt_date = datetime(2023, 6, 1)
+    return (lambda po: generator.create_purchase_receipt(po, receipt_date, batch_info, batch_numbers),
+            [BatchPurchaseOrderGenerator.record(po) for po in _purchase_orders(num_docs)])
+
+
+def case_stock_entry(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    from src.generators.transaction.Fertigungsprozess.single.create_stock_entry import StockEntryGenerator
+
+    generator = StockEntryGenerator()
+    batch_numbers = generator.load_batch_numbers()
+    return (lambda wo: generator.generate_stock_entries([wo], batch_numbers),
+            _work_orders(num_docs, list(generator.bom_engine.bom_ids())))
+
+
+def case_sales_order(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    from src.core.master_data import get_master_data_store
+    from src.core.rng import RandomStreams
+    from src.generators.transaction.Verkaufsprozess.single import verkaufsprozess
+
+    customers = [{"Customer Name": f"Customer {i}", "Customer Group": "B2B", "Territory": "Germany"}
+                 for i in range(50)]
+    products = get_master_data_store().items()
+    rng = RandomStreams(0).python('benchmark', 'sales_order')
+    return (lambda _: verkaufsprozess.generate_sales_order(customers, products, 'B2B', rng),
+            range(num_docs))
+
+
+def case_mrp(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    import numpy as np
+    from src.core.mrp import MrpEngine
+
+    mrp = MrpEngine()
+    plans = np.random.default_rng(0).integers(0, 20, size=(num_docs, len(mrp.items))).astype(float)
+    return mrp.demand, plans
+
+
+def case_json(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    return (lambda po: json.dumps(po, ensure_ascii=False)), _purchase_orders(num_docs)
+
+
+def case_csv(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    from src.core.master_data import get_master_data_store
+    from src.generators.transaction.Beschaffungsprozess.batch.purchase_order_engine import (
+        CSV_FIELDS, PurchaseOrderEngine
+    )
+
+    master_data = get_master_data_store()
+    engine = PurchaseOrderEngine(master_data.items_by_group('Fahrradkomponenten'), master_data.supplier_mapping(),
+                                 seed=0)
+    writer = csv.writer(io.StringIO())
+    writer.writerow(CSV_FIELDS)
+    return writer.writerow, list(engine.generate(START_DATE, END_DATE, num_docs).csv_rows())
+
+
+def case_upload(num_docs: int) -> Tuple[Callable[[Any], Any], Iterable]:
+    from src.api.endpoints.purchase_order_api import PurchaseOrderAPI
+
+    api = PurchaseOrderAPI()
+    orders = _purchase_orders(num_docs)
+    for po in orders:
+        del po['name'], po['items'][0]['name']
+    return api.create, orders
+
+
+CASES: Dict[str, Tuple[str, Callable[[int], Tuple[Callable[[Any], Any], Iterable]]]] = {
+    'purchase_order': ('generation', case_purchase_order),
+    'purchase_receipt': ('generation', case_purchase_receipt),
+    'stock_entry': ('generation', case_stock_entry),
+    'sales_order': ('generation', case_sales_order),
+    'mrp': ('planning', case_mrp),
+    'json': ('serialization', case_json),
+    'csv': ('serialization', case_csv),
+    'upload': ('upload', case_upload),
+}
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_case(name: str, num_docs: int) -> Dict[str, Any]:
+    """Run one case and measure it. Called in a fresh process so peak RSS belongs to this case alone."""
+    stage, prepare = CASES[name]
+    operation, inputs = prepare(num_docs)
+
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs:
+        op_started = time.perf_counter()
+        operation(item)
+        latencies.append(time.perf_counter() - op_started)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "stage": stage,
+        "case": name,
+        "documents": num_docs,
+        "seconds": round(elapsed, 4),
+        "docs_per_sec": round(num_docs / elapsed, 1) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KiB on Linux
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_mock_server(latency: float) -> Tuple[subprocess.Popen, str]:
+    """Run the mock ERPNext server in its own process so it does not compete with the client for the GIL."""
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, '-m', 'src.api.mock_server', '--port', str(port),
+                               '--latency', str(latency)], cwd=PROJECT_ROOT)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server, f"http://127.0.0.1:{port}/api"
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("Mock ERPNext server did not start")
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print the throughput change of every case against a previous result file."""
+    previous = {(r['case'], r['documents']): r for r in baseline['results']}
+    for result in current['results']:
+        before = previous.get((result['case'], result['documents']))
+        if not before or not before['docs_per_sec'] or not result['docs_per_sec']:
+            continue
+        change = (result['docs_per_sec'] / before['docs_per_sec'] - 1) * 100
+        print(f"{result['case']:>18} {result['documents']:>8}: {before['docs_per_sec']:>12.1f} -> "
+              f"{result['docs_per_sec']:>12.1f} docs/s ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generation, serialization and upload paths")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--mock-latency', type=float, default=0.0, help="seconds the mock server adds per request")
+    parser.add_argument('--output', type=Path, default=None, help="result file (JSON)")
+    parser.add_argument('--compare', type=Path, default=None, help="previous result file to compare against")
+    args = parser.parse_args()
+
+    server = None
+    if 'upload' in args.cases:
+        server, url = _start_mock_server(args.mock_latency)
+        # Inherited by the benchmark processes, see src/config/api_config.py
+        os.environ['ERP_BASE_URL'] = url
+        os.environ.setdefault('ERP_API_RATE_LIMIT', '0')
+
+    results = []
+    try:
+        for name in args.cases:
+            for size in args.sizes:
+                # One process per case, so imports, caches and peak RSS do not carry over
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                    result = executor.submit(run_case, name, size).result()
+                results.append(result)
+                print(f"{result['stage']:>13} {result['case']:>18} {size:>8}: {result['docs_per_sec']:>12.1f} docs/s, "
+                      f"p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms, "
+                      f"peak RSS {result['peak_rss_mb']:.1f} MB")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mock_latency": args.mock_latency
+        },
+        "results": results
+    }
+    output = args.output or BENCHMARK_DIR / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,5 +5,60 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-BASE_URL = "https://bikeshop-erp-next.iuk.hdm-stuttgart.de/api"
+ERPNEXT_URL = "https://bikeshop-erp-next.iuk.hdm-stuttgart.de/api"
 API_KEY = os.getenv('ERP_API_KEY')
+
+# Local stand-in server (src/api/mock_server.py), e.g. for benchmarks without the shared ERPNext
+MOCK_SERVER_ENABLED = os.getenv('ERP_MOCK_SERVER', '0') == '1'
+MOCK_SERVER_HOST = os.getenv('ERP_MOCK_SERVER_HOST', '127.0.0.1')
+MOCK_SERVER_PORT = int(os.getenv('ERP_MOCK_SERVER_PORT', 8765))
+MOCK_SERVER_LATENCY = float(os.getenv('ERP_MOCK_SERVER_LATENCY', 0.0))  # Seconds per request
+MOCK_SERVER_LATENCY_JITTER = float(os.getenv('ERP_MOCK_SERVER_LATENCY_JITTER', 0.0))  # Max. extra seconds
+MOCK_SERVER_ERROR_RATE = float(os.getenv('ERP_MOCK_SERVER_ERROR_RATE', 0.0))  # Share of 503 responses
+MOCK_SERVER_THROTTLE_RATE = float(os.getenv('ERP_MOCK_SERVER_THROTTLE_RATE', 0.0))  # Share of 429 responses
+MOCK_SERVER_SEED = int(os.getenv('ERP_MOCK_SERVER_SEED', 0))
+# Seconds until a submitted stock entry shows on its work order
+MOCK_SERVER_SUBMIT_LAG = float(os.getenv('ERP_MOCK_SERVER_SUBMIT_LAG', 0.0))
+
+# Target of all API endpoints: ERP_BASE_URL if set, otherwise the mock server or ERPNext
+BASE_URL = os.getenv('ERP_BASE_URL') or (
+    f"http://{MOCK_SERVER_HOST}:{MOCK_SERVER_PORT}/api" if MOCK_SERVER_ENABLED else ERPNEXT_URL
+)
+
+# HTTP connection pooling (shared by all API endpoints)
+HTTP_POOL_CONNECTIONS = int(os.getenv('ERP_HTTP_POOL_CONNECTIONS', 4))  # Number of cached host pools
+HTTP_POOL_MAXSIZE = int(os.getenv('ERP_HTTP_POOL_MAXSIZE', 32))  # Max. open connections per host
+HTTP_POOL_BLOCK = os.getenv('ERP_HTTP_POOL_BLOCK', '1') == '1'  # Wait for a free connection instead of opening extra ones
+HTTP_KEEP_ALIVE = os.getenv('ERP_HTTP_KEEP_ALIVE', '1') == '1'
+HTTP_TIMEOUT = float(os.getenv('ERP_HTTP_TIMEOUT', 60))  # Seconds
+
+# Bulk inserts via frappe.client.insert_many (ERPNext accepts at most 200 documents per call)
+BULK_INSERT_ENABLED = os.getenv('ERP_BULK_INSERT', '1') == '1'  # Otherwise create_many uploads concurrently
+BULK_INSERT_CHUNK_SIZE = min(int(os.getenv('ERP_BULK_INSERT_CHUNK_SIZE', 200)), 200)
+
+# Concurrent uploads (acreate / acreate_many)
+API_MAX_CONCURRENCY = int(os.getenv('ERP_API_MAX_CONCURRENCY', 16))  # Max. requests in flight per endpoint
+API_MAX_IN_FLIGHT = int(os.getenv('ERP_API_MAX_IN_FLIGHT', HTTP_POOL_MAXSIZE))  # Max. requests in flight in total
+
+# Retries for failed requests: reads on 429, 502-504 and connection errors, writes only on 429, 503
+# and connections that failed before the request was sent
+API_MAX_RETRIES = int(os.getenv('ERP_API_MAX_RETRIES', 5))
+API_BACKOFF_BASE = float(os.getenv('ERP_API_BACKOFF_BASE', 0.5))  # Seconds, doubled per retry
+API_BACKOFF_MAX = float(os.getenv('ERP_API_BACKOFF_MAX', 30))  # Seconds
+# Per-endpoint retry budgets by process type, e.g. "purchase_orders:8,payment_entrys:2"
+API_RETRY_BUDGETS = {
+    process_type.strip(): int(budget)
+    for process_type, budget in (
+        entry.split(':') for entry in os.getenv('ERP_API_RETRY_BUDGETS', '').split(',') if entry.strip()
+    )
+}
+
+# Failed request log (logs/api_payloads/<process>/failed_*.jsonl.gz), written in the background
+FAILURE_LOG_QUEUE_SIZE = int(os.getenv('ERP_FAILURE_LOG_QUEUE_SIZE', 10000))  # Max. records waiting to be written
+FAILURE_LOG_PUT_TIMEOUT = float(os.getenv('ERP_FAILURE_LOG_PUT_TIMEOUT', 1.0))  # Seconds to wait on a full queue
+FAILURE_LOG_MAX_BODY = int(os.getenv('ERP_FAILURE_LOG_MAX_BODY', 65536))  # Max. characters per response body
+
+# Adaptive rate limit shared by all endpoints (requests per second, 0 disables it)
+API_RATE_LIMIT = float(os.getenv('ERP_API_RATE_LIMIT', 20))
+API_RATE_BURST = int(os.getenv('ERP_API_RATE_BURST', 20))
+API_RATE_LIMIT_MIN = float(os.getenv('ERP_API_RATE_LIMIT_MIN', 1))
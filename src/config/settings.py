@@ -19,6 +19,7 @@ MASTER_DATA_DIR = DATA_DIR / 'master'
 LOG_DIR = PROJECT_ROOT / 'logs'
 PROCESS_LOGS_DIR = LOG_DIR / 'process_logs'
 API_PAYLOAD_DIR = LOG_DIR / 'api_payloads'
+CHECKPOINT_DIR = OUTPUT_DIR / 'checkpoints'
 
 # Company settings
 COMPANY = "Velo GmbH"
@@ -26,10 +27,56 @@ CURRENCY = "EUR"
 TARGET_WAREHOUSE = "Lager Stuttgart - B"
 CONVERSION_RATE = 1.0
 
+# Master seed for all random data, unset for a fresh seed per run
+RANDOM_SEED = int(os.getenv('ERP_RANDOM_SEED')) if os.getenv('ERP_RANDOM_SEED') else None
+# Order dates of the sales process (ISO dates), fixed so a seed reproduces the same data on any day
+SALES_START_DATE = os.getenv('ERP_SALES_START_DATE', '2019-01-01')
+SALES_END_DATE = os.getenv('ERP_SALES_END_DATE', '2023-12-31')
+
+# Logging: per-document messages per second and logger (0 suppresses them), seconds between progress summaries
+LOG_DOCUMENT_RATE = float(os.getenv('ERP_LOG_DOCUMENT_RATE', 5))
+LOG_PROGRESS_INTERVAL = float(os.getenv('ERP_LOG_PROGRESS_INTERVAL', 10))
+# Stage log files are rotated at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT old files
+LOG_MAX_BYTES = int(os.getenv('ERP_LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('ERP_LOG_BACKUP_COUNT', 5))
+
+# Metrics and trace spans, exported as Prometheus text and OTLP/JSON after each run
+METRICS_DIR = OUTPUT_DIR / 'metrics'
+METRICS_MAX_SPANS = int(os.getenv('ERP_METRICS_MAX_SPANS', 100000))  # Spans kept in memory per process
+
+# Sampling profiler of --profile runs: seconds between two stack samples
+PROFILES_DIR = OUTPUT_DIR / 'profiles'
+PROFILE_INTERVAL = float(os.getenv('ERP_PROFILE_INTERVAL', 0.005))
+
+# CSV outputs are streamed while documents are created and synced to disk every interval seconds
+CSV_FLUSH_INTERVAL = float(os.getenv('ERP_CSV_FLUSH_INTERVAL', 5))
+
+# Raw API responses of created documents are dropped after the run keeps what it needs, unless spilled to disk
+API_RESPONSES_DIR = OUTPUT_DIR / 'api_responses'
+SPILL_API_RESPONSES = os.getenv('ERP_SPILL_API_RESPONSES', '0') == '1'
+
+# A manufacture entry is uploaded once its work order shows the material transfer. The work order is
+# polled with exponential backoff from the first interval up to the max. interval (seconds), and the
+# entry is given up after the timeout.
+WORK_ORDER_POLL_INTERVAL = float(os.getenv('ERP_WORK_ORDER_POLL_INTERVAL', 0.5))
+WORK_ORDER_POLL_MAX_INTERVAL = float(os.getenv('ERP_WORK_ORDER_POLL_MAX_INTERVAL', 10))
+WORK_ORDER_READY_TIMEOUT = float(os.getenv('ERP_WORK_ORDER_READY_TIMEOUT', 300))
+
+# Finished units per month of every item with a BOM; purchase orders then cover the plan's component demand.
+# 0 (default) orders a fixed quantity per order, unless the run sets its own plan. The BOM components
+# (STO-COMP-*) need suppliers in item_supplier_mapping.csv before a plan can be ordered.
+PRODUCTION_PLAN_UNITS = float(os.getenv('ERP_PRODUCTION_PLAN_UNITS', 0))
+
+# Sales cycles (order, delivery note, invoice, payment) in flight at once per sales channel
+SALES_CONCURRENCY_B2B = int(os.getenv('ERP_SALES_CONCURRENCY_B2B', 8))
+SALES_CONCURRENCY_B2C_ONLINE = int(os.getenv('ERP_SALES_CONCURRENCY_B2C_ONLINE', 16))
+SALES_CONCURRENCY_B2C_FILIALE = int(os.getenv('ERP_SALES_CONCURRENCY_B2C_FILIALE', 8))
+
 # API settings
 API_BASE_URL = "https://bikeshop-erp-next.iuk.hdm-stuttgart.de/api"
 API_KEY = os.getenv('ERP_API_KEY')
 
 # Ensure required directories exist
-for directory in [INPUT_DIR, OUTPUT_DIR, MASTER_DATA_DIR, LOG_DIR, PROCESS_LOGS_DIR, API_PAYLOAD_DIR]:
+for directory in [INPUT_DIR, OUTPUT_DIR, MASTER_DATA_DIR, LOG_DIR, PROCESS_LOGS_DIR, API_PAYLOAD_DIR,
+                  CHECKPOINT_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.core.master_data import MasterDataStore, get_master_data_store
+
+_engine: Optional['BomEngine'] = None
+_engine_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class BomLine:
+    """A component of a BOM, quantity per finished unit."""
+    item_code: str
+    qty: float
+    rate: float
+    uom: str
+
+
+@dataclass(frozen=True, slots=True)
+class Bom:
+    """A BOM as read from the master data, lines normalised to one finished unit."""
+    bom_no: str
+    item: str
+    item_name: str
+    lines: Tuple[BomLine, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ExplodedBom:
+    """Material requirements of one finished unit and its rolled-up cost.
+
+    Exploded over all levels, lines hold the raw materials of all
+    sub-assemblies, summed per item. Single-level, sub-assemblies stay lines
+    of their own, valued at the rolled-up cost of their BOM.
+    """
+    bom_no: str
+    item: str
+    item_name: str
+    lines: Tuple[BomLine, ...]
+    unit_cost: float
+
+    def requirements(self, units: float = 1.0) -> Dict[str, float]:
+        """Item code -> quantity needed for units finished items."""
+        return {line.item_code: line.qty * units for line in self.lines}
+
+
+class BomEngine:
+    """Index of all BOMs in the master data with memoized explosions.
+
+    The BOM files are read once into compact records keyed by BOM ID, and the
+    first BOM (by ID) of every item is its default BOM. A component that has a
+    default BOM is a sub-assembly: it is exploded into its own components on
+    multi-level explosion and valued at its BOM's rolled-up cost. Every BOM is
+    exploded at most once per level mode, so a work order costs a dict lookup.
+    """
+
+    def __init__(self, master_data: Optional[MasterDataStore] = None):
+        self.master_data = master_data or get_master_data_store()
+        self._boms: Dict[str, Bom] = {}
+        self._bom_ids: Tuple[str, ...] = ()
+        # Item code -> default BOM ID
+        self._by_item: Dict[str, str] = {}
+        # (BOM ID, multi-level) -> explosion
+        self._exploded: Dict[Tuple[str, bool], ExplodedBom] = {}
+        self._lock = threading.RLock()
+        self.reload()
+
+    def reload(self):
+        """Re-read the BOMs from the master data store and drop all explosions."""
+        boms = {}
+        for bom_no, bom in self.master_data.boms().items():
+            quantity = float(bom.get('Quantity') or 1) or 1.0
+            lines = tuple(
+                BomLine(
+                    item_code=row['Item Code (Items)'],
+                    qty=float(row['Qty (Items)']) / quantity,
+                    rate=float(row.get('Rate (Items)') or 0),
+                    uom=row['UOM (Items)']
+                )
+                for row in bom['Items']
+            )
+            boms[bom_no] = Bom(bom_no, bom['Item'], bom['Item Name'], lines)
+
+        by_item = {}
+        for bom_no in sorted(boms):
+            by_item.setdefault(boms[bom_no].item, bom_no)
+
+        with self._lock:
+            self._boms = boms
+            self._bom_ids = tuple(boms)
+            self._by_item = by_item
+            self._exploded = {}
+
+    def bom_ids(self) -> Tuple[str, ...]:
+        return self._bom_ids
+
+    def get(self, bom_no: str) -> Bom:
+        return self._boms[bom_no]
+
+    def default_bom(self, item_code: str) -> Optional[str]:
+        """Default BOM ID of an item, None for items that are not manufactured."""
+        return self._by_item.get(item_code)
+
+    def explode(self, bom_no: str, multi_level: bool = True) -> ExplodedBom:
+        """Requirements of one finished unit of a BOM, see ExplodedBom."""
+        exploded = self._exploded.get((bom_no, multi_level))
+        if exploded is None:
+            with self._lock:
+                exploded = self._explode(bom_no, multi_level, ())
+        return exploded
+
+    def _explode(self, bom_no: str, multi_level: bool, path: Tuple[str, ...]) -> ExplodedBom:
+        exploded = self._exploded.get((bom_no, multi_level))
+        if exploded is not None:
+            return exploded
+        if bom_no in path:
+            raise ValueError(f"BOM {bom_no} contains itself: {' -> '.join(path + (bom_no,))}")
+
+        bom = self._boms[bom_no]
+        # Item code -> [qty, amount, uom], in order of first use
+        totals: Dict[str, List] = {}
+
+        def add(item_code: str, qty: float, amount: float, uom: str):
+            total = totals.get(item_code)
+            if total is None:
+                totals[item_code] = [qty, amount, uom]
+            else:
+                total[0] += qty
+                total[1] += amount
+
+        for line in bom.lines:
+            sub_bom = self._by_item.get(line.item_code)
+            if sub_bom is None:
+                add(line.item_code, line.qty, line.qty * line.rate, line.uom)
+                continue
+            sub = self._explode(sub_bom, multi_level, path + (bom_no,))
+            if multi_level:
+                for sub_line in sub.lines:
+                    add(sub_line.item_code, sub_line.qty * line.qty, sub_line.qty * line.qty * sub_line.rate,
+                        sub_line.uom)
+            else:
+                add(line.item_code, line.qty, line.qty * sub.unit_cost, line.uom)
+
+        lines = tuple(BomLine(item_code, qty, amount / qty if qty else 0.0, uom)
+                      for item_code, (qty, amount, uom) in totals.items())
+        exploded = ExplodedBom(bom_no, bom.item, bom.item_name, lines,
+                               unit_cost=sum(amount for _, amount, _ in totals.values()))
+        self._exploded[(bom_no, multi_level)] = exploded
+        return exploded
+
+    def unit_cost(self, bom_no: str) -> float:
+        """Rolled-up material cost of one finished unit."""
+        return self.explode(bom_no).unit_cost
+
+
+def get_bom_engine() -> BomEngine:
+    """Return the process-wide BOM engine shared by all manufacturing generators."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = BomEngine()
+    return _engine
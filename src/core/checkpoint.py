@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Set
+
+from src.config.settings import CHECKPOINT_DIR
+
+
+@dataclass
+class JournalState:
+    """Progress recorded in a checkpoint journal."""
+    config: Optional[Dict[str, Any]] = None
+    completed_months: Set[str] = field(default_factory=set)
+    # month -> stage -> created documents
+    documents: Dict[str, Dict[str, List[Dict]]] = field(default_factory=dict)
+    # intent ID -> month, stage and the payloads posted without a confirmed outcome
+    intents: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def get_documents(self, month: str, stage: str) -> List[Dict]:
+        return self.documents.get(month, {}).get(stage, [])
+
+
+class CheckpointJournal:
+    """Append-only JSONL journal of a long-running process.
+
+    Every created document is written as soon as ERPNext confirms it, together
+    with its month and stage, so an interrupted run can be resumed without
+    posting duplicates. The payloads of a batch are written as an intent before
+    they are posted and settled with the confirmed documents: an intent left
+    open by a crash, or documents whose outcome stayed unknown, may exist on
+    the server and have to be reconciled with it before a resume posts again.
+    """
+
+    def __init__(self, path: Path = CHECKPOINT_DIR / 'procurement_journal.jsonl'):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self, resume: bool = False):
+        """Open the journal, appending to it when resuming, otherwise starting a new one."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _write(self, *entries: Dict[str, Any]):
+        timestamp = datetime.now().isoformat()
+        lines = ''.join(json.dumps({**entry, 'timestamp': timestamp}, ensure_ascii=False, default=str) + '\n'
+                        for entry in entries)
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Checkpoint journal is not open")
+            self._file.write(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_run(self, config: Dict[str, Any]):
+        self._write({"event": "run_started", "config": config})
+
+    def record_intent(self, month: str, stage: str, documents: List[Dict[str, Any]]) -> str:
+        """Record payloads about to be posted, return the intent ID to settle them with."""
+        intent = uuid.uuid4().hex
+        self._write({"event": "intent", "month": month, "stage": stage, "intent": intent, "documents": documents})
+        return intent
+
+    def record_documents(self, month: str, stage: str, documents: List[Dict[str, Any]],
+                         intent: Optional[str] = None, unconfirmed: Sequence[int] = ()):
+        """Record a batch of created documents with a single disk sync.
+
+        With intent, the intent is settled in the same write; unconfirmed are
+        the positions of its payloads whose creation was not confirmed.
+        """
+        entries = [{"event": "document", "month": month, "stage": stage, "document": document}
+                   for document in documents]
+        if intent is not None:
+            entries.append({"event": "settled", "intent": intent, "unconfirmed": list(unconfirmed)})
+        if entries:
+            self._write(*entries)
+
+    def record_month(self, month: str, success: bool):
+        self._write({"event": "month_completed", "month": month, "success": success})
+
+    def load(self) -> JournalState:
+        """Read the progress recorded so far, ignoring a line torn by a crash."""
+        state = JournalState()
+        if not self.path.exists():
+            return state
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                event = entry.get('event')
+                if event == 'run_started':
+                    state.config = state.config or entry['config']
+                elif event == 'document':
+                    stages = state.documents.setdefault(entry['month'], {})
+                    stages.setdefault(entry['stage'], []).append(entry['document'])
+                elif event == 'intent':
+                    state.intents[entry['intent']] = {"month": entry['month'], "stage": entry['stage'],
+                                                      "documents": entry['documents']}
+                elif event == 'settled':
+                    intent = state.intents.pop(entry['intent'], None)
+                    if intent and entry['unconfirmed']:
+                        state.intents[entry['intent']] = {
+                            **intent, "documents": [intent['documents'][i] for i in entry['unconfirmed']]}
+                elif event == 'month_completed':
+                    if entry['success']:
+                        state.completed_months.add(entry['month'])
+                    else:
+                        state.completed_months.discard(entry['month'])
+        return state
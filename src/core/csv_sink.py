@@ -0,0 +1,96 @@
+import csv
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config.settings import CSV_FLUSH_INTERVAL
+
+
+class CsvSink:
+    """Streams rows into a CSV file while documents are created.
+
+    Rows are appended to <path>.part as they arrive and synced to disk every
+    flush_interval seconds, so nothing is buffered beyond the current batch
+    and a crashed run leaves every synced row behind. close() renames the
+    part file to path atomically: path only ever holds a complete file.
+    Header fields are taken from the first row unless given. Safe to share
+    between threads.
+    """
+
+    def __init__(self, path: Path, fieldnames: Optional[List[str]] = None,
+                 flush_interval: float = CSV_FLUSH_INTERVAL, **writer_options: Any):
+        self.path = path
+        self.part_path = path.with_name(path.name + '.part')
+        self.fieldnames = fieldnames
+        self.flush_interval = flush_interval
+        self.writer_options = writer_options
+        self.rows = 0
+        self._file = None
+        self._writer: Optional[csv.DictWriter] = None
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _open(self, first_row: Dict[str, Any]):
+        self.part_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.part_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames or list(first_row.keys()),
+                                      **self.writer_options)
+        self._writer.writeheader()
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Append rows, return how many were written."""
+        written = 0
+        with self._lock:
+            for row in rows:
+                if self._writer is None:
+                    self._open(row)
+                self._writer.writerow(row)
+                written += 1
+            self.rows += written
+            if self._file is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+        return written
+
+    def write(self, row: Dict[str, Any]):
+        self.write_rows((row,))
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Write everything appended so far to disk."""
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+
+    def close(self) -> Optional[Path]:
+        """Finish the file and move it to path, return path or None if no rows were written."""
+        with self._lock:
+            if self._file is None:
+                return None
+            self._flush()
+            self._file.close()
+            self._file = None
+            os.replace(self.part_path, self.path)
+            return self.path
+
+    def abort(self):
+        """Close the part file without publishing it, e.g. after an error."""
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> 'CsvSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -1,60 +1,317 @@
+import atexit
+import itertools
 import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+from src.config.settings import (
+    PROCESS_LOGS_DIR, LOG_DOCUMENT_RATE, LOG_PROGRESS_INTERVAL, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+)
 from src.core.base_transaction import BaseConfig
 
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_router: Optional['_RoutingHandler'] = None
+_listener_lock = threading.Lock()
+
+_log_context: Optional['LogContext'] = None
+_log_context_lock = threading.Lock()
+# IDs of log contexts, part of the route of their loggers
+_context_ids = itertools.count(1)
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Pass as extra= to mark a message logged once per document, see DocumentRateFilter
+PER_DOCUMENT = {'per_document': True}
+
+
+class _RouteFilter(logging.Filter):
+    """Stamps the records of a logger with its route, for loggers whose name is shared."""
+
+    def __init__(self, route: str):
+        super().__init__()
+        self.route = route
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.log_route = self.route
+        return True
+
+
+class _RoutingHandler(logging.Handler):
+    """Hands every record to the handlers registered for its route, by default its logger's name.
+
+    Runs on the listener thread, so file and console output never block the
+    logging thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._routes: Dict[str, List[logging.Handler]] = {}
+        self._routes_lock = threading.Lock()
+
+    def set_route(self, name: str, handlers: List[logging.Handler]):
+        with self._routes_lock:
+            previous = self._routes.get(name, [])
+            self._routes[name] = handlers
+        for handler in previous:
+            if handler not in handlers:
+                handler.close()
+
+    def remove_route(self, name: str, handlers: List[logging.Handler]):
+        """Remove the route of name if it still uses handlers."""
+        with self._routes_lock:
+            if self._routes.get(name) == handlers:
+                del self._routes[name]
+
+    def emit(self, record: logging.LogRecord):
+        flushed = getattr(record, 'flushed', None)
+        if flushed is not None:
+            flushed.set()
+            return
+        for handler in self._routes.get(getattr(record, 'log_route', record.name), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def close(self):
+        with self._routes_lock:
+            routes, self._routes = self._routes, {}
+        for handlers in routes.values():
+            for handler in handlers:
+                handler.close()
+        super().close()
+
+
+class DocumentRateFilter(logging.Filter):
+    """Rate-limits per-document messages of a logger (token bucket, rate per second).
+
+    Only records logged with extra=PER_DOCUMENT are limited. The number of
+    suppressed messages is appended to the next message let through.
+    """
+
+    def __init__(self, rate: float = LOG_DOCUMENT_RATE):
+        super().__init__()
+        self.rate = rate
+        self._tokens = max(rate, 1.0)
+        self._updated = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'per_document', False):
+            return True
+        if self.rate <= 0:
+            return False
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                return False
+            self._tokens -= 1
+            suppressed, self._suppressed = self._suppressed, 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+def _get_queue_handler() -> QueueHandler:
+    """Start the process-wide log listener on first use and return the handler feeding it."""
+    global _listener, _queue_handler, _router
+    if _queue_handler is None:
+        with _listener_lock:
+            if _queue_handler is None:
+                _router = _RoutingHandler()
+                log_queue = queue.SimpleQueue()
+                _listener = QueueListener(log_queue, _router)
+                _listener.start()
+                atexit.register(shutdown_logging)
+                _queue_handler = QueueHandler(log_queue)
+    return _queue_handler
+
+
+def configure_logger(logger: logging.Logger, *handlers: logging.Handler,
+                     level: int = logging.INFO, route: Optional[str] = None) -> logging.Logger:
+    """Send logger's records to handlers through the shared background listener.
+
+    Records are routed by route, the logger's name by default. Handlers
+    previously configured for the same route are closed. The logger does not
+    propagate, and its per-document messages are rate-limited.
+    """
+    queue_handler = _get_queue_handler()
+    route = route or logger.name
+    _router.set_route(route, list(handlers))
+
+    logger.setLevel(level)
+    logger.propagate = False
+    logger.handlers = [queue_handler]
+    for log_filter in [f for f in logger.filters if isinstance(f, _RouteFilter)]:
+        logger.removeFilter(log_filter)
+    if route != logger.name:
+        logger.addFilter(_RouteFilter(route))
+    if not any(isinstance(f, DocumentRateFilter) for f in logger.filters):
+        logger.addFilter(DocumentRateFilter())
+    return logger
+
+
+def flush_logging(timeout: Optional[float] = None):
+    """Block until all records logged so far are handed to their handlers."""
+    if _queue_handler is None:
+        return
+    record = logging.makeLogRecord({'flushed': threading.Event()})
+    _queue_handler.enqueue(record)
+    record.flushed.wait(timeout)
+
+
+def shutdown_logging():
+    """Write all queued records and close the log handlers."""
+    global _listener, _queue_handler
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _router.close()
+            _listener = None
+            _queue_handler = None
+
+
+class ProgressReporter:
+    """Logs a progress summary at most every interval seconds instead of one line per document."""
+
+    def __init__(self, logger: logging.Logger, label: str, total: Optional[int] = None,
+                 interval: float = LOG_PROGRESS_INTERVAL):
+        self.logger = logger
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.succeeded = 0
+        self.failed = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._lock = threading.Lock()
+
+    def update(self, succeeded: int = 0, failed: int = 0):
+        with self._lock:
+            self.succeeded += succeeded
+            self.failed += failed
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self.report()
+
+    def report(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        done = self.succeeded + self.failed
+        of_total = f"/{self.total}" if self.total else ""
+        self.logger.info(f"Progress {self.label}: {done}{of_total} processed, {self.succeeded} created, "
+                         f"{self.failed} failed ({done / elapsed:.1f}/s)")
+
+
+class LogContext:
+    """Loggers of one run: one rotating log file per stage and a shared console.
+
+    Created once per run and handed to the generators of that run. Each
+    logger is configured on first use only, later get_logger calls for the
+    same stage return it unchanged, so creating generators per month or
+    batch opens no further files. All files of a run are written to
+    PROCESS_LOGS_DIR/<name>_<timestamp>/<stage>.log.
+
+    The loggers belong to the context and are routed by context and stage,
+    so contexts running concurrently with the same stages keep their lines
+    in their own files.
+    """
+
+    def __init__(self, name: str = 'process', log_dir: Optional[Path] = None):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.log_dir = log_dir or PROCESS_LOGS_DIR / f"{name}_{timestamp}_{os.getpid()}"
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.console_handler = logging.StreamHandler()
+        self.console_handler.setFormatter(self.formatter)
+        self.id = next(_context_ids)
+        # Stage -> logger and the handlers routed for it
+        self._loggers: Dict[str, Tuple[logging.Logger, List[logging.Handler]]] = {}
+        self._file_handlers: Dict[str, logging.Handler] = {}
+        self._lock = threading.Lock()
+
+    def _file_handler(self, stage: str) -> logging.Handler:
+        handler = self._file_handlers.get(stage)
+        if handler is None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(self.log_dir / f"{stage}.log", maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUP_COUNT, encoding='utf-8', delay=True)
+            handler.setFormatter(self.formatter)
+            self._file_handlers[stage] = handler
+        return handler
+
+    def get_logger(self, stage: str, console: bool = True, file: bool = True) -> logging.Logger:
+        """Logger of a stage, writing to the stage's log file and/or the console."""
+        with self._lock:
+            if stage not in self._loggers:
+                # Not registered with logging.getLogger, which would share it with other contexts
+                logger = logging.Logger(stage)
+                handlers = ([self._file_handler(stage)] if file else []) + ([self.console_handler] if console else [])
+                configure_logger(logger, *handlers, route=self._route(stage))
+                self._loggers[stage] = (logger, handlers)
+            return self._loggers[stage][0]
+
+    def _route(self, stage: str) -> str:
+        return f"{stage}@{self.id}"
+
+    def close(self):
+        """Write all pending records and close the log files of this context."""
+        flush_logging()
+        with self._lock:
+            for stage, (_, handlers) in self._loggers.items():
+                _router.remove_route(self._route(stage), handlers)
+            for handler in self._file_handlers.values():
+                handler.close()
+            self._loggers.clear()
+            self._file_handlers.clear()
+
+
+def get_log_context() -> LogContext:
+    """Return the log context of the current run, or a process-wide default one."""
+    global _log_context
+    if _log_context is None:
+        with _log_context_lock:
+            if _log_context is None:
+                _log_context = LogContext()
+    return _log_context
+
+
+def set_log_context(context: Optional[LogContext]) -> Optional[LogContext]:
+    """Make context the current run's log context, return the previous one."""
+    global _log_context
+    with _log_context_lock:
+        previous, _log_context = _log_context, context
+    return previous
+
 
 class ProcessLogger:
     """Centralized logging configuration for all processes."""
 
-    def __init__(self, config: BaseConfig):
-        """Initialize process logger."""
-        self.file_logger = self._setup_logger(
-            'file_logger',
-            config.get_log_file_path(),
-            propagate=False
-        )
-
-        self.console_logger = self._setup_logger(
-            'console_logger',
-            console_output=True,
-            propagate=False
-        )
-
-    @staticmethod
-    def _setup_logger(
-            name: str,
-            file_path: Optional[Path] = None,
-            console_output: bool = False,
-            propagate: bool = True
-    ) -> logging.Logger:
-        """Set up a logger with file and/or console output."""
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.INFO)
-        logger.propagate = propagate
-        logger.handlers.clear()
-
-        formatter = logging.Formatter('%(message)s')
-
-        if file_path:
-            file_handler = logging.FileHandler(str(file_path))
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-
-        if console_output:
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
-
-        return logger
-
-    def log_info(self, message: str, console: bool = True, file: bool = True):
-        """Log info message."""
+    def __init__(self, config: BaseConfig, log_context: Optional[LogContext] = None):
+        """Initialize process logger from the run's log context."""
+        log_context = log_context or get_log_context()
+        self.file_logger = log_context.get_logger(config.process_type, console=False)
+        self.console_logger = log_context.get_logger('console', file=False)
+
+    def log_info(self, message: str, console: bool = True, file: bool = True, per_document: bool = False):
+        """Log info message. per_document messages are rate-limited."""
+        extra = PER_DOCUMENT if per_document else None
         if console:
-            self.console_logger.info(message)
+            self.console_logger.info(message, extra=extra)
         if file:
-            self.file_logger.info(message)
+            self.file_logger.info(message, extra=extra)
 
     def log_error(self, message: str, console: bool = True, file: bool = True):
         """Log error message."""
@@ -77,4 +334,4 @@ class ProcessLogger:
         else:
             error_log = f"Failed to upload {endpoint}: {error_msg}"
 
-        self.log_info(error_log, console=True, file=True)
\ No newline at end of file
+        self.log_info(error_log, console=True, file=True)
@@ -0,0 +1,179 @@
+import csv
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config.settings import MASTER_DATA_DIR
+
+_store: Optional['MasterDataStore'] = None
+_store_lock = threading.Lock()
+
+ITEMS_FILE = Path('base') / 'items.csv'
+BATCH_NUMBERS_FILE = Path('base') / 'batch_numbers.csv'
+SUPPLIERS_FILE = Path('partners') / 'suppliers.csv'
+ITEM_SUPPLIER_MAPPING_FILE = Path('mappings') / 'item_supplier_mapping.csv'
+BOM_DIR = Path('manufacturing')
+
+
+class MasterDataStore:
+    """Process-wide cache of the master data CSV files.
+
+    Every file is read once and the indexes built from it are kept until the
+    file's modification time or size changes, so all generators share the
+    same data without re-reading it per month or batch. The returned lists
+    and dicts are shared and must not be modified by callers.
+    """
+
+    def __init__(self, master_data_dir: Path = MASTER_DATA_DIR):
+        self.master_data_dir = master_data_dir
+        # key -> (file signatures, value)
+        self._cache: Dict[str, Tuple[Tuple, Any]] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _signature(paths: List[Path]) -> Tuple:
+        signature = []
+        for path in paths:
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _cached(self, key: str, paths: List[Path], build: Callable[[], Any]) -> Any:
+        """Return the cached value for key, rebuilding it when one of its files changed."""
+        signature = self._signature(paths)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None or cached[0] != signature:
+                cached = (signature, build())
+                self._cache[key] = cached
+            return cached[1]
+
+    @staticmethod
+    def _read_csv(path: Path, strip: bool = False) -> List[Dict[str, str]]:
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        if strip:
+            # The manufacturing exports pad their columns with spaces
+            rows = [{key.strip(): (value or '').strip() for key, value in row.items() if key is not None}
+                    for row in rows]
+        return rows
+
+    def rows(self, relative_path: Path) -> List[Dict[str, str]]:
+        """All rows of a CSV file below the master data directory."""
+        path = self.master_data_dir / relative_path
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+        return self._cached(f"rows:{relative_path}", [path], lambda: self._read_csv(path))
+
+    def invalidate(self):
+        """Drop all cached data, e.g. after regenerating master data."""
+        with self._lock:
+            self._cache.clear()
+
+    # Items
+
+    def items(self) -> List[Dict[str, str]]:
+        return self.rows(ITEMS_FILE)
+
+    def _item_index(self) -> Dict[str, Dict[str, str]]:
+        return self._cached("index:item_code", [self.master_data_dir / ITEMS_FILE],
+                            lambda: {item['Item Code']: item for item in self.items()})
+
+    def get_item(self, item_code: str) -> Optional[Dict[str, str]]:
+        return self._item_index().get(item_code)
+
+    def items_by_group(self, item_group: str) -> List[Dict[str, str]]:
+        def build():
+            groups = {}
+            for item in self.items():
+                groups.setdefault(item['Item Group'], []).append(item)
+            return groups
+
+        return self._cached("index:item_group", [self.master_data_dir / ITEMS_FILE], build).get(item_group, [])
+
+    def item_batch_flags(self) -> Dict[str, bool]:
+        """Item code -> whether the item is batch managed."""
+        return self._cached("index:has_batch_no", [self.master_data_dir / ITEMS_FILE],
+                            lambda: {item['Item Code']: item.get('Has Batch No', '0') == '1'
+                                     for item in self.items()})
+
+    def batch_numbers(self) -> Dict[str, str]:
+        """Item code -> batch ID."""
+        return self._cached("index:batch_numbers", [self.master_data_dir / BATCH_NUMBERS_FILE],
+                            lambda: {row['Item']: row['Batch ID'] for row in self.rows(BATCH_NUMBERS_FILE)})
+
+    # Suppliers
+
+    def suppliers(self) -> List[Dict[str, str]]:
+        return self.rows(SUPPLIERS_FILE)
+
+    def get_supplier(self, supplier_id: str) -> Optional[Dict[str, str]]:
+        return self._cached("index:supplier", [self.master_data_dir / SUPPLIERS_FILE],
+                            lambda: {row['ID']: row for row in self.suppliers()}).get(supplier_id)
+
+    def supplier_mapping(self) -> Dict[str, str]:
+        """Item code -> supplier ID, empty if no mapping has been generated yet."""
+        path = self.master_data_dir / ITEM_SUPPLIER_MAPPING_FILE
+        if not path.exists():
+            return {}
+        return self._cached("index:item_supplier", [path],
+                            lambda: {row['Item Code']: row['Supplier ID']
+                                     for row in self.rows(ITEM_SUPPLIER_MAPPING_FILE)})
+
+    def items_by_supplier(self, supplier_id: str) -> List[Dict[str, str]]:
+        def build():
+            by_supplier = {}
+            for item_code, supplier in self.supplier_mapping().items():
+                item = self.get_item(item_code)
+                if item:
+                    by_supplier.setdefault(supplier, []).append(item)
+            return by_supplier
+
+        paths = [self.master_data_dir / ITEMS_FILE, self.master_data_dir / ITEM_SUPPLIER_MAPPING_FILE]
+        if not paths[1].exists():
+            return []
+        return self._cached("index:supplier_items", paths, build).get(supplier_id, [])
+
+    # BOMs
+
+    def _bom_files(self) -> List[Path]:
+        return sorted((self.master_data_dir / BOM_DIR).glob('bom_*.csv'))
+
+    def boms(self) -> Dict[str, Dict[str, Any]]:
+        """BOM ID -> BOM header with its component rows under 'Items'.
+
+        Each BOM file holds the header in its first row and one component
+        per following row.
+        """
+        files = self._bom_files()
+
+        def build():
+            boms = {}
+            for path in files:
+                rows = self._read_csv(path, strip=True)
+                if not rows:
+                    continue
+                bom_info = rows[0]
+                boms[bom_info['ID']] = {
+                    'ID': bom_info['ID'],
+                    'Item': bom_info['Item'],
+                    'Item Name': bom_info['Item Name'],
+                    'Quantity': bom_info.get('Quantity', '1'),
+                    'Items': [row for row in rows if row['Item Code (Items)']]
+                }
+            return boms
+
+        return self._cached("index:bom", files, build)
+
+    def get_bom(self, bom_id: str) -> Optional[Dict[str, Any]]:
+        return self.boms().get(bom_id)
+
+
+def get_master_data_store() -> MasterDataStore:
+    """Return the process-wide master data store shared by all generators."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MasterDataStore()
+    return _store
@@ -0,0 +1,280 @@
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config.settings import METRICS_MAX_SPANS
+
+_metrics: Optional['Metrics'] = None
+_metrics_lock = threading.Lock()
+
+# Span of the current thread or task, copied into worker threads with contextvars.copy_context()
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+# Thread ID -> span the thread is working in, lets the sampling profiler attribute stacks to stages
+_thread_spans: Dict[int, 'Span'] = {}
+
+# Upper bounds (seconds) of the duration histograms
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Span attributes passed on to child spans, so e.g. an upload span knows its stage
+INHERITED_ATTRIBUTES = ('stage', 'month')
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+@dataclass
+class Span:
+    """A timed operation, exported in the OpenTelemetry (OTLP/JSON) span format."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """Process-wide API metrics and trace spans.
+
+    Every API call is counted by endpoint, doctype, method and status,
+    with its latency, payload and response bytes and retries. Spans time the
+    stages of a run (generate, upload, save_to_csv) and nest through a
+    context variable. Both are kept in memory and exported to a Prometheus
+    text file and an OTLP/JSON trace file; at most max_spans spans are
+    retained, further ones only count towards the duration histograms.
+    """
+
+    def __init__(self, max_spans: int = METRICS_MAX_SPANS):
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: Labels, value: float = 1.0):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, value: float):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram()
+            histogram.observe(value)
+
+    def observe_request(self, method: str, endpoint: str, doctype: Optional[str], status: str, seconds: float,
+                        total_seconds: float, payload_bytes: int, response_bytes: int, retries: int):
+        """Record one API call.
+
+        seconds is the time ERPNext took for the last attempt, total_seconds
+        also includes rate limiting, retries and backoff on our side.
+        """
+        labels = (("method", method), ("endpoint", endpoint), ("doctype", doctype or ""), ("status", status))
+        self.inc("erpnext_requests_total", labels)
+        self.inc("erpnext_request_payload_bytes_total", labels, payload_bytes)
+        self.inc("erpnext_response_bytes_total", labels, response_bytes)
+        self.inc("erpnext_request_retries_total", labels, retries)
+        self.observe("erpnext_request_duration_seconds", labels, seconds)
+        self.observe("erpnext_call_duration_seconds", labels, total_seconds)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span."""
+        parent = _current_span.get()
+        if parent:
+            for key in INHERITED_ATTRIBUTES:
+                if key in parent.attributes:
+                    attributes.setdefault(key, parent.attributes[key])
+        current = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes
+        )
+        token = _current_span.set(current)
+        previous = _attach(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{e.__class__.__name__}: {str(e)}"
+            raise
+        finally:
+            _detach(previous)
+            _current_span.reset(token)
+            current.end_ns = time.time_ns()
+            self._finish(current)
+
+    def _finish(self, span: Span):
+        self.observe("span_duration_seconds", (("span", span.name), ("stage", span.attributes.get("stage", ""))),
+                     span.duration)
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped_spans += 1
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.dropped_spans = 0
+            self._counters.clear()
+            self._histograms.clear()
+
+    def prometheus_text(self) -> str:
+        """All counters and histograms in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in series.items():
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            lines.append("# TYPE spans_dropped_total counter")
+            lines.append(f"spans_dropped_total {self.dropped_spans}")
+        return "\n".join(lines) + "\n"
+
+    def otlp_json(self, service_name: str = "erpnext-datenerstellung") -> Dict[str, Any]:
+        """Finished spans as an OTLP/JSON ExportTraceServiceRequest."""
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service_name)]},
+            "scopeSpans": [{"scope": {"name": "src.core.metrics"}, "spans": spans}]
+        }]}
+
+    def export(self, directory: Path, prefix: str) -> Tuple[Path, Path]:
+        """Write <prefix>.prom and <prefix>.traces.json to directory, return both paths."""
+        directory.mkdir(parents=True, exist_ok=True)
+        prom_path = directory / f"{prefix}.prom"
+        trace_path = directory / f"{prefix}.traces.json"
+        for path, content in ((prom_path, self.prometheus_text()),
+                              (trace_path, json.dumps(self.otlp_json(), ensure_ascii=False))):
+            # Written atomically, so a scraper never reads a half-written file
+            tmp_path = path.with_name(path.name + '.tmp')
+            tmp_path.write_text(content, encoding='utf-8')
+            os.replace(tmp_path, path)
+        return prom_path, trace_path
+
+
+def _attach(span: Optional[Span]) -> Optional[Span]:
+    """Mark span as the current thread's span, return the span it replaces."""
+    ident = threading.get_ident()
+    previous = _thread_spans.get(ident)
+    if span is not None:
+        _thread_spans[ident] = span
+    return previous
+
+
+def _detach(previous: Optional[Span]):
+    if previous is None:
+        _thread_spans.pop(threading.get_ident(), None)
+    else:
+        _thread_spans[threading.get_ident()] = previous
+
+
+def _run_attached(fn: Callable, args: tuple) -> Any:
+    previous = _attach(_current_span.get())
+    try:
+        return fn(*args)
+    finally:
+        _detach(previous)
+
+
+def in_current_span(fn: Callable, *args: Any) -> Callable[[], Any]:
+    """Bind fn(*args) to the caller's context, so it runs as part of the current span on a worker thread.
+
+    Executors do not copy context variables into their threads by themselves.
+    """
+    context = copy_context()
+    return lambda: context.run(_run_attached, fn, args)
+
+
+def thread_span(ident: int) -> Optional[Span]:
+    """The span a thread is currently working in, if any."""
+    return _thread_spans.get(ident)
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics shared by the API layer and the generators."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,59 @@
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from src.core.bom_engine import BomEngine, get_bom_engine
+
+
+class MrpEngine:
+    """Component demand of a production plan as one sparse matrix product.
+
+    The default BOMs of all manufactured items, exploded over all levels,
+    form a components x items requirements matrix. It is kept in coordinate
+    form (one entry per BOM line), so a plan of finished units per item, or
+    one column per period, is turned into the demand of every component by
+    a single np.bincount instead of loops over work orders and BOM lines.
+    """
+
+    def __init__(self, bom_engine: Optional[BomEngine] = None):
+        bom_engine = bom_engine or get_bom_engine()
+        self.items: Tuple[str, ...] = tuple(sorted({bom_engine.get(bom_no).item
+                                                    for bom_no in bom_engine.bom_ids()}))
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+
+        component_index: Dict[str, int] = {}
+        rows, cols, quantities = [], [], []
+        for col, item in enumerate(self.items):
+            for line in bom_engine.explode(bom_engine.default_bom(item)).lines:
+                rows.append(component_index.setdefault(line.item_code, len(component_index)))
+                cols.append(col)
+                quantities.append(line.qty)
+        self.components: Tuple[str, ...] = tuple(component_index)
+        self.rows = np.array(rows, dtype=np.intp)
+        self.cols = np.array(cols, dtype=np.intp)
+        self.quantities = np.array(quantities, dtype=float)
+
+    def plan_vector(self, plan: Mapping[str, float]) -> np.ndarray:
+        """Finished units per item as a vector over self.items."""
+        unknown = [item for item in plan if item not in self.item_index]
+        if unknown:
+            raise ValueError(f"No BOM found for planned items {', '.join(unknown)}")
+        vector = np.zeros(len(self.items))
+        for item, units in plan.items():
+            vector[self.item_index[item]] = units
+        return vector
+
+    def demand(self, plan: np.ndarray) -> np.ndarray:
+        """Component demand of a plan vector over self.items, or of an items x periods plan matrix."""
+        if plan.ndim == 1:
+            return np.bincount(self.rows, weights=self.quantities * plan[self.cols], minlength=len(self.components))
+        periods = plan.shape[1]
+        weights = self.quantities[:, None] * plan[self.cols]
+        cells = self.rows[:, None] * periods + np.arange(periods)
+        return np.bincount(cells.ravel(), weights=weights.ravel(),
+                           minlength=len(self.components) * periods).reshape(len(self.components), periods)
+
+    def demand_by_component(self, plan: Mapping[str, float]) -> Dict[str, float]:
+        """Item code -> demand of every component a plan needs."""
+        demand = self.demand(self.plan_vector(plan))
+        return {self.components[i]: float(demand[i]) for i in np.flatnonzero(demand)}
@@ -0,0 +1,214 @@
+import json
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.config.settings import PROFILES_DIR, PROFILE_INTERVAL, PROJECT_ROOT
+from src.core.metrics import thread_span
+
+# Sample categories, in the order they are reported
+CATEGORIES = ('payload', 'json', 'network', 'csv', 'logging', 'idle', 'other')
+
+# Modules whose frames mean the thread is sending a request or waiting for one.
+# The rate limiter and backoff sleeps count as network wait, they wait for the API.
+NETWORK_MODULES = ('requests', 'urllib3', 'http', 'socket', 'ssl', 'selectors', 'asyncio',
+                   'src.api.base_api', 'src.api.async_api', 'src.api.session', 'src.api.retry')
+
+# Innermost frames of a thread blocked until work, a lock or a result arrives
+WAIT_MODULES = ('threading', 'queue', 'concurrent.futures')
+WAIT_FUNCTIONS = {('logging.handlers', 'dequeue')}
+
+
+def _module(frame: FrameType) -> str:
+    """Dotted module name of a frame, also for scripts run as __main__."""
+    name = frame.f_globals.get('__name__')
+    if name and name != '__main__':
+        return name
+    path = Path(frame.f_code.co_filename).resolve()
+    try:
+        return path.relative_to(PROJECT_ROOT).with_suffix('').as_posix().replace('/', '.')
+    except ValueError:
+        return path.stem
+
+
+def _in(module: str, prefixes: Tuple[str, ...]) -> bool:
+    return any(module == prefix or module.startswith(prefix + '.') for prefix in prefixes)
+
+
+def classify(stack: List[Tuple[str, str]]) -> str:
+    """Category of a sampled stack of (module, function) pairs, root first.
+
+    The innermost frame that belongs to JSON encoding, CSV writing, network
+    I/O or logging decides. A thread blocked on a queue, lock or future is
+    idle, unless it waits for a request slot. Remaining time in the
+    generators is payload building.
+    """
+    end = len(stack)
+    while end and (_in(stack[end - 1][0], WAIT_MODULES) or stack[end - 1] in WAIT_FUNCTIONS):
+        end -= 1
+    if end < len(stack):
+        return 'network' if end and _in(stack[end - 1][0], NETWORK_MODULES) else 'idle'
+
+    for module, function in stack[::-1]:
+        if _in(module, ('json',)):
+            return 'json'
+        if 'csv' in function or _in(module, ('csv', 'src.core.csv_sink')):
+            return 'csv'
+        if _in(module, NETWORK_MODULES):
+            return 'network'
+        if _in(module, ('logging',)):
+            return 'logging'
+    if any(_in(module, ('src.generators', 'src.core.master_data', 'src.core.rng', 'faker', 'numpy'))
+           for module, _ in stack):
+        return 'payload'
+    return 'other'
+
+
+def _stage_of_thread(ident: int, name: str) -> str:
+    span = thread_span(ident)
+    if span is not None and span.attributes.get('stage'):
+        stage = str(span.attributes['stage'])
+    elif name == 'MainThread':
+        stage = 'main'
+    else:
+        # Pool threads are numbered after the pool's prefix, plain threads after their target
+        match = re.fullmatch(r'Thread-\d+(?: \((\w+)\))?', name)
+        stage = (match.group(1) or 'thread') if match else re.sub(r'[_-]\d+$', '', name)
+    return re.sub(r'\W+', '_', stage).strip('_')
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over all threads of the process.
+
+    Every interval seconds the stack of each thread is recorded, attributed to
+    the stage of the span the thread is working in, and classified by what
+    the thread is doing (payload building, JSON encoding, network wait, CSV
+    writing). Unlike cProfile it sees the stage and API worker threads, and
+    the profiled code only pays for the GIL time the samples take.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        # (stage, folded stack) -> samples
+        self.stacks: Dict[Tuple[str, str], int] = {}
+        # stage -> category -> samples
+        self.categories: Dict[str, Dict[str, int]] = {}
+        self._labels: Dict[object, Tuple[str, str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _label(self, frame: FrameType) -> Tuple[str, str]:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (_module(frame), code.co_name)
+        return label
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            stack.reverse()
+
+            stage = _stage_of_thread(ident, names.get(ident, str(ident)))
+            category = classify(stack)
+            counts = self.categories.setdefault(stage, {})
+            counts[category] = counts.get(category, 0) + 1
+            if category != 'idle':
+                folded = ';'.join(f"{function} ({module})" for module, function in stack)
+                self.stacks[(stage, folded)] = self.stacks.get((stage, folded), 0) + 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Seconds of thread time per stage and category, estimated from the sample counts."""
+        return {stage: {category: round(counts.get(category, 0) * self.interval, 3)
+                        for category in CATEGORIES if counts.get(category)}
+                for stage, counts in sorted(self.categories.items())}
+
+    def export(self, directory: Path) -> Path:
+        """Write one collapsed-stack file per stage, all.folded and summary.json to directory.
+
+        The .folded files are in the collapsed format of flamegraph.pl and are
+        read by speedscope and most other flame graph viewers. Idle samples are
+        left out of them, they only count in the summary.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        by_stage: Dict[str, List[str]] = {}
+        for (stage, folded), count in sorted(self.stacks.items()):
+            by_stage.setdefault(stage, []).append(f"{folded} {count}")
+        for stage, lines in by_stage.items():
+            (directory / f"{stage}.folded").write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        (directory / 'all.folded').write_text(
+            ''.join(f"{stage};{folded} {count}\n" for (stage, folded), count in sorted(self.stacks.items())),
+            encoding='utf-8')
+        (directory / 'summary.json').write_text(json.dumps({
+            "interval": self.interval,
+            "samples": self.samples,
+            "seconds": self.summary()
+        }, indent=2), encoding='utf-8')
+        return directory
+
+    def format_summary(self) -> str:
+        """Summary as a table, one row per stage."""
+        summary = self.summary()
+        width = max([len('stage')] + [len(stage) for stage in summary]) + 2
+        rows = [f"{'stage':<{width}}" + ''.join(f"{category:>10}" for category in CATEGORIES)]
+        for stage, seconds in summary.items():
+            rows.append(f"{stage:<{width}}" + ''.join(f"{seconds.get(category, 0.0):>9.2f}s"
+                                                       for category in CATEGORIES))
+        return '\n'.join(rows)
+
+
+@contextmanager
+def profiled(name: str, enabled: bool = True,
+             interval: float = PROFILE_INTERVAL) -> Iterator[Optional[SamplingProfiler]]:
+    """Profile the enclosed block if enabled, writing the results to PROFILES_DIR/<name>_<timestamp>/."""
+    if not enabled:
+        yield None
+        return
+
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        directory = profiler.export(PROFILES_DIR / f"{name}_{timestamp}_{os.getpid()}")
+        print(f"Profile ({profiler.samples} samples every {interval * 1000:g}ms, thread seconds per category):")
+        print(profiler.format_summary())
+        print(f"Flame graph stacks written to {directory}")
+
+
+def add_profile_argument(parser) -> None:
+    """Add the --profile switch shared by all entry points."""
+    parser.add_argument('--profile', action='store_true',
+                        help=f"sample the run and write flame graph stacks per stage to {PROFILES_DIR}")
@@ -0,0 +1,64 @@
+import atexit
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Optional
+
+from src.config.settings import API_RESPONSES_DIR, SPILL_API_RESPONSES
+
+_response_spill: Optional['ResponseSpill'] = None
+_response_spill_lock = threading.Lock()
+
+
+class ResponseSpill:
+    """Append-only JSONL files of the raw API responses of created documents, one file per doctype.
+
+    Generators only keep compact result records in memory; with
+    ERP_SPILL_API_RESPONSES=1 the full responses are written here instead
+    of being dropped.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.directory = directory or API_RESPONSES_DIR / f"responses_{timestamp}_{os.getpid()}"
+        self._files: Dict[str, IO[str]] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, doctype: str) -> IO[str]:
+        file = self._files.get(doctype)
+        if file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            filename = re.sub(r'\W+', '_', doctype).strip('_').lower() + '.jsonl'
+            file = self._files[doctype] = open(self.directory / filename, 'a', encoding='utf-8')
+        return file
+
+    def write(self, doctype: str, responses: Iterable[Dict[str, Any]]):
+        lines = ''.join(json.dumps(response, ensure_ascii=False, default=str) + '\n' for response in responses)
+        if not lines:
+            return
+        with self._lock:
+            file = self._file(doctype)
+            file.write(lines)
+            file.flush()
+
+    def close(self):
+        with self._lock:
+            for file in self._files.values():
+                file.close()
+            self._files.clear()
+
+
+def get_response_spill() -> Optional[ResponseSpill]:
+    """Return the process-wide response spill, or None if raw responses are not kept."""
+    global _response_spill
+    if not SPILL_API_RESPONSES:
+        return None
+    if _response_spill is None:
+        with _response_spill_lock:
+            if _response_spill is None:
+                _response_spill = ResponseSpill()
+                atexit.register(_response_spill.close)
+    return _response_spill
@@ -0,0 +1,96 @@
+import hashlib
+import random
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+from faker import Faker
+
+from src.config.settings import RANDOM_SEED
+
+_streams: Optional['RandomStreams'] = None
+_streams_lock = threading.Lock()
+
+StreamKey = Union[str, int]
+
+
+def _key_part(part: StreamKey) -> int:
+    """Map a stream key part to the non-negative integer SeedSequence expects."""
+    if isinstance(part, int) and part >= 0:
+        return part
+    digest = hashlib.blake2b(str(part).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class RandomStreams:
+    """Independent, reproducible random streams derived from one master seed.
+
+    Streams are addressed by a key such as ('procurement', '2023-01',
+    'purchase_receipts') instead of being handed out in creation order: the
+    key is appended to the SeedSequence spawn key, the same way
+    SeedSequence.spawn derives its children. The same seed and key always
+    give the same stream, no matter which worker asks for it or when, so
+    output does not depend on the number of workers.
+    """
+
+    def __init__(self, seed: Optional[int] = RANDOM_SEED, _spawn_key: Tuple[int, ...] = ()):
+        # Without a seed, SeedSequence draws fresh entropy, available as self.seed for reruns
+        self._sequence = np.random.SeedSequence(seed, spawn_key=_spawn_key)
+        self._fakers = threading.local()
+
+    @property
+    def seed(self) -> int:
+        return self._sequence.entropy
+
+    def seed_sequence(self, *key: StreamKey) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self._sequence.entropy,
+                                      spawn_key=self._sequence.spawn_key + tuple(_key_part(k) for k in key))
+
+    def child(self, *key: StreamKey) -> 'RandomStreams':
+        """Streams scoped below key, e.g. one month of a process."""
+        return RandomStreams(self._sequence.entropy,
+                             _spawn_key=self._sequence.spawn_key + tuple(_key_part(k) for k in key))
+
+    def _int_seed(self, *key: StreamKey) -> int:
+        state = self.seed_sequence(*key).generate_state(2, np.uint64)
+        return int(state[0]) << 64 | int(state[1])
+
+    def numpy(self, *key: StreamKey) -> np.random.Generator:
+        return np.random.default_rng(self.seed_sequence(*key))
+
+    def python(self, *key: StreamKey) -> random.Random:
+        return random.Random(self._int_seed(*key))
+
+    def faker(self, *key: StreamKey, locale: str = 'de_DE') -> Faker:
+        """Faker seeded for key.
+
+        Creating a Faker is expensive, so each thread reuses one instance per
+        locale and only reseeds it. The returned instance follows the stream
+        of key until the same thread asks for another Faker.
+        """
+        fakers: Dict[str, Faker] = getattr(self._fakers, 'instances', None)
+        if fakers is None:
+            fakers = self._fakers.instances = {}
+        fake = fakers.get(locale)
+        if fake is None:
+            fake = fakers[locale] = Faker(locale)
+        fake.seed_instance(self._int_seed(*key))
+        return fake
+
+
+def get_random_streams() -> RandomStreams:
+    """Return the process-wide random streams, seeded from ERP_RANDOM_SEED."""
+    global _streams
+    if _streams is None:
+        with _streams_lock:
+            if _streams is None:
+                _streams = RandomStreams()
+    return _streams
+
+
+def set_random_seed(seed: Optional[int]) -> RandomStreams:
+    """Replace the process-wide random streams, e.g. with a seed given on the command line."""
+    global _streams
+    with _streams_lock:
+        _streams = RandomStreams(seed)
+    return _streams
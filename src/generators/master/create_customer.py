@@ -3,6 +3,7 @@ import random
 from faker import Faker
 import os
 from src.api.endpoints.customer_api import CustomerAPI
+from src.core.rng import get_random_streams
 
 # Initialize Faker for German locale
 fake = Faker('de_DE')
@@ -17,7 +18,7 @@ class Config:
     OUTPUT_DIR = os.path.join(BASE_DIR, 'generated')
 
 
-def generate_b2b_customer_name():
+def generate_b2b_customer_name(rng=random, faker=None):
     bike_related_words = [
         "Fahrrad", "Bike", "Zweirad", "Velo", "Rad", "Cycle", "Pedal",
         "Sattel", "Kette", "Speiche", "Lenker", "Bremse", "Schaltung"
@@ -28,17 +29,18 @@ def generate_b2b_customer_name():
     ]
     suffixes = ["GmbH", "AG", "KG", "OHG", "GmbH & Co. KG", "e.K."]
 
+    faker = faker or fake
     name_parts = [
-        random.choice(bike_related_words),
-        random.choice(business_types),
-        fake.last_name(),
-        random.choice(suffixes)
+        rng.choice(bike_related_words),
+        rng.choice(business_types),
+        faker.last_name(),
+        rng.choice(suffixes)
     ]
     return " ".join(name_parts)
 
 
-def generate_b2b_customer():
-    company_name = generate_b2b_customer_name()
+def generate_b2b_customer(rng=random, faker=None):
+    company_name = generate_b2b_customer_name(rng, faker)
     return {
         "doctype": "Customer",
         "naming_series": "CUST-.YYYY.-",
@@ -49,8 +51,8 @@ def generate_b2b_customer():
     }
 
 
-def generate_b2c_customer():
-    customer_name = fake.name()
+def generate_b2c_customer(faker=None):
+    customer_name = (faker or fake).name()
     return {
         "doctype": "Customer",
         "naming_series": "CUST-.YYYY.-",
@@ -62,8 +64,10 @@ def generate_b2c_customer():
 
 def create_b2b_customers(num_customers):
     created_customers = []
-    for _ in range(num_customers):
-        customer_data = generate_b2b_customer()
+    streams = get_random_streams()
+    for i in range(num_customers):
+        customer_data = generate_b2b_customer(streams.python('customers', 'b2b', i),
+                                              streams.faker('customers', 'b2b', i))
         response = customer_api.create(customer_data)
         if response.get('data'):
             created_customers.append(response['data'])
@@ -73,8 +77,8 @@ def create_b2b_customers(num_customers):
     return created_customers
 
 
-def create_b2c_customer():
-    customer_data = generate_b2c_customer()
+def create_b2c_customer(faker=None):
+    customer_data = generate_b2c_customer(faker)
     response = customer_api.create(customer_data)
     if response.get('data'):
         print(f"Created B2C customer: {response['data']['name']}")
@@ -1,7 +1,8 @@
-import random
 import csv
 from faker import Faker
 
+from src.core.rng import get_random_streams
+
 # Initialisierung des Faker-Generators für deutschsprachige Daten
 fake = Faker('de_DE')
 
@@ -10,12 +11,12 @@ def generate_product_code(prefix, number):
     return f"{prefix}-{number:04d}"
 
 
-def generate_serial_no(prefix):
-    return f"{prefix}-{fake.unique.random_number(digits=8)}"
+def generate_serial_no(prefix, faker=fake):
+    return f"{prefix}-{faker.unique.random_number(digits=8)}"
 
 
-def generate_batch_no(prefix):
-    return f"{prefix}-{fake.date_this_year().strftime('%Y%m%d')}-{fake.random_number(digits=4)}"
+def generate_batch_no(prefix, faker=fake):
+    return f"{prefix}-{faker.date_this_year().strftime('%Y%m%d')}-{faker.random_number(digits=4)}"
 
 
 def get_expense_account(item_group):
@@ -70,19 +71,23 @@ def generate_component_description(component_type, variant):
     return descriptions.get(component_type, {}).get(variant, f"{component_type} {variant}: Hochwertige Komponente für optimale Leistung.")
 
 
-def generate_bike_models(num_regular_bikes, num_ebikes):
+def generate_bike_models(num_regular_bikes, num_ebikes, streams=None):
+    # Jedes Modell hat einen eigenen Zufallsstrom, unabhängig von der Reihenfolge der Erzeugung
+    streams = streams or get_random_streams()
     bikes = []
     serial_numbers = []
     for i in range(num_regular_bikes + num_ebikes):
         is_ebike = i < num_ebikes
         prefix = "EBIKE" if is_ebike else "BIKE"
         item_group = "E-Bikes" if is_ebike else "Fahrräder"
-        bike_type = random.choice(["City", "Trekking", "Mountain", "Race"])
+        rng = streams.python('items', prefix, i)
+        faker = streams.faker('items', prefix, i)
+        bike_type = rng.choice(["City", "Trekking", "Mountain", "Race"])
         item_code = generate_product_code(prefix, i + 1)
 
         model = {
             "Item Code": item_code,
-            "Item Name": f"Velo {'E-' if is_ebike else ''}{bike_type} {fake.random_int(min=100, max=999)}",
+            "Item Name": f"Velo {'E-' if is_ebike else ''}{bike_type} {faker.random_int(min=100, max=999)}",
             "Item Group": item_group,
             "Default Unit of Measure": "Nos",
             "Allow Alternative Item": 1,
@@ -95,10 +100,10 @@ def generate_bike_models(num_regular_bikes, num_ebikes):
             "Include Item In Manufacturing": 1,
             "Is Fixed Asset": 0,
             "Maintain Stock": 1,
-            "Valuation Rate": round(random.uniform(300, 800), 2),
-            "Standard Selling Rate": round(random.uniform(600, 2000), 2),
-            "Warranty Period (in days)": random.randint(365, 730),
-            "Weight Per Unit": round(random.uniform(10, 20), 2),
+            "Valuation Rate": round(rng.uniform(300, 800), 2),
+            "Standard Selling Rate": round(rng.uniform(600, 2000), 2),
+            "Warranty Period (in days)": rng.randint(365, 730),
+            "Weight Per Unit": round(rng.uniform(10, 20), 2),
             "Weight UOM": "Kg",
             "Default Expense Account (Item Defaults)": get_expense_account(item_group)  # Neue Zeile
         }
@@ -108,13 +113,14 @@ def generate_bike_models(num_regular_bikes, num_ebikes):
         serial_numbers.append({
             "Company": "Velo GmbH",
             "Item Code": item_code,
-            "Serial No": generate_serial_no(prefix)
+            "Serial No": generate_serial_no(prefix, faker)
         })
 
     return bikes, serial_numbers
 
 
-def generate_detailed_components(num_components):
+def generate_detailed_components(num_components, streams=None):
+    streams = streams or get_random_streams()
     components = []
     batch_numbers = []
     common_components = {
@@ -145,8 +151,10 @@ def generate_detailed_components(num_components):
     all_components = list(common_components.items()) + list(ebike_specific_components.items())
 
     for i in range(num_components):
-        component_type, variants = random.choice(all_components)
-        variant = random.choice(variants)
+        rng = streams.python('items', 'COMP', i)
+        faker = streams.faker('items', 'COMP', i)
+        component_type, variants = rng.choice(all_components)
+        variant = rng.choice(variants)
         item_code = generate_product_code("COMP", i + 1)
 
         component = {
@@ -164,10 +172,10 @@ def generate_detailed_components(num_components):
             "Include Item In Manufacturing": 1,
             "Is Fixed Asset": 0,
             "Maintain Stock": 1,
-            "Valuation Rate": round(random.uniform(10, 200), 2),
-            "Standard Selling Rate": round(random.uniform(20, 400), 2),
-            "Warranty Period (in days)": random.randint(90, 365),
-            "Weight Per Unit": round(random.uniform(0.1, 5), 2),
+            "Valuation Rate": round(rng.uniform(10, 200), 2),
+            "Standard Selling Rate": round(rng.uniform(20, 400), 2),
+            "Warranty Period (in days)": rng.randint(90, 365),
+            "Weight Per Unit": round(rng.uniform(0.1, 5), 2),
             "Weight UOM": "Kg",
             "Default Expense Account (Item Defaults)": get_expense_account("Fahrradkomponenten")  # Neue Zeile
         }
@@ -175,7 +183,7 @@ def generate_detailed_components(num_components):
 
         # Generate one Batch Number for each component
         batch_numbers.append({
-            "Batch ID": generate_batch_no(f"BATCH-{component_type[:3].upper()}"),
+            "Batch ID": generate_batch_no(f"BATCH-{component_type[:3].upper()}", faker),
             "Item": item_code
         })
 
@@ -2,68 +2,54 @@
 
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Tuple
-import csv
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
 import random
-import logging
 
 from src.api.endpoints.payment_entry_api import PaymentEntryAPI
+from src.core.csv_sink import CsvSink
+from src.core.logging import PER_DOCUMENT, LogContext, ProgressReporter, get_log_context
+from src.core.metrics import get_metrics
+from src.core.response_spill import get_response_spill
 from src.config.settings import (
     COMPANY, CURRENCY, CONVERSION_RATE,
     MASTER_DATA_DIR, OUTPUT_DIR
 )
+from src.generators.transaction.Beschaffungsprozess.batch.procurement_records import ProcurementRecord, TaxLine
 
 
 class BatchPaymentEntryGenerator:
     """Generator for payment entries in batch mode, controlled by master controller."""
 
-    def __init__(self):
-        self.logger = logging.getLogger('BatchPaymentEntryGenerator')
+    CSV_FILENAME = 'batch_payment_entries.csv'
+
+    def __init__(self, log_context: Optional[LogContext] = None):
+        self.logger = (log_context or get_log_context()).get_logger(self.__class__.__name__)
         self.api = PaymentEntryAPI()
         self.start_date = None
         self.end_date = None
         self.purchase_invoices = None
-        self._initialize_logging()
-
-        # Store successful payments in memory
-        self.successful_payments = []
+        self.rng = random.Random()  # Seeded per month by the master controller
+
+        # Records of successful payments, kept in memory for the month's results
+        self.successful_payments: List[ProcurementRecord] = []
+        # Rows of created payments are streamed here when set
+        self.csv_sink: Optional[CsvSink] = None
+        # Created payments are journaled here when set
+        self.journal: Optional[Callable[..., None]] = None
+        # Payloads are journaled here before they are posted, returns the intent to settle with the journal
+        self.intent: Optional[Callable[[List[Dict]], str]] = None
+        self.response_spill = get_response_spill()
 
         # Payment specific configurations
         self.PAYMENT_DELAY_MIN = 0  # Minimum days after invoice
         self.PAYMENT_DELAY_MAX = 30  # Maximum days after invoice
 
-    def _initialize_logging(self):
-        """Initialize logging configuration"""
-        self.logger = logging.getLogger(self.__class__.__name__)
-
-        # Clear any existing handlers
-        self.logger.handlers = []
-
-        self.logger.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-        # Console Handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-
-        # File Handler
-        log_dir = OUTPUT_DIR / 'logs' / f'batch_{self.__class__.__name__.lower()}'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(
-            log_dir / f'batch_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
-        )
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
-
-        # Prevent propagation to avoid duplicate logs
-        self.logger.propagate = False
-
-    def configure(self, start_date: datetime, end_date: datetime, purchase_invoices: List[Dict]):
+    def configure(self, start_date: datetime, end_date: datetime, purchase_invoices: List[ProcurementRecord]):
         """Configure the generator with parameters and purchase invoices from master controller"""
         self.start_date = start_date
         self.end_date = end_date
         self.purchase_invoices = purchase_invoices
+        self.progress = ProgressReporter(self.logger, "payment entries", len(purchase_invoices) or None)
         self.logger.info(f"Configured batch generator for period: {start_date.date()} to {end_date.date()}, "
                          f"processing {len(purchase_invoices)} purchase invoices")
 
@@ -75,7 +61,7 @@ class BatchPaymentEntryGenerator:
             base_date + timedelta(days=self.PAYMENT_DELAY_MAX)
         )
 
-        delay_days = random.randint(self.PAYMENT_DELAY_MIN,
+        delay_days = self.rng.randint(self.PAYMENT_DELAY_MIN,
                                     (max_date - base_date).days)
         payment_date = base_date + timedelta(days=delay_days)
 
@@ -85,11 +71,11 @@ class BatchPaymentEntryGenerator:
 
         return payment_date
 
-    def create_payment_entry(self, pi: Dict, payment_date: datetime) -> Dict:
+    def create_payment_entry(self, pi: ProcurementRecord, payment_date: datetime) -> Dict:
         """Create a single payment entry document from purchase invoice"""
         # Calculate total amount including taxes
-        tax_amount = float(pi['taxes'][0]['tax_amount'])
-        total_amount = float(pi['items'][0]['amount']) + tax_amount
+        tax_amount = pi.tax.tax_amount
+        total_amount = pi.items[0].amount + tax_amount
 
         payment = {
             "doctype": "Payment Entry",
@@ -99,10 +85,10 @@ class BatchPaymentEntryGenerator:
             "posting_date": payment_date.strftime("%Y-%m-%d"),
             "company": COMPANY,
             "party_type": "Supplier",
-            "party": pi['supplier'],
-            "party_name": pi['supplier'],
+            "party": pi.supplier,
+            "party_name": pi.supplier,
             "paid_from": "Bank Account - B",
-            "paid_to": pi['credit_to'],
+            "paid_to": pi.credit_to,
             "paid_amount": total_amount,
             "paid_amount_after_tax": total_amount,
             "source_exchange_rate": CONVERSION_RATE,
@@ -115,11 +101,11 @@ class BatchPaymentEntryGenerator:
             "base_received_amount_after_tax": total_amount,
             "paid_to_account_currency": CURRENCY,
             "paid_from_account_currency": CURRENCY,
-            "reference_no": f"REF-{payment_date.strftime('%Y%m%d')}-{random.randint(1000, 9999)}",
+            "reference_no": f"REF-{payment_date.strftime('%Y%m%d')}-{self.rng.randint(1000, 9999)}",
             "reference_date": payment_date.strftime("%Y-%m-%d"),
             "references": [{
                 "reference_doctype": "Purchase Invoice",
-                "reference_name": pi['name'],
+                "reference_name": pi.name,
                 "total_amount": total_amount,
                 "allocated_amount": total_amount,
                 "exchange_rate": CONVERSION_RATE
@@ -130,7 +116,7 @@ class BatchPaymentEntryGenerator:
                 "category": "Total",
                 "charge_type": "Actual",
                 "description": "Abziehbare Vorsteuer 19 %",
-                "rate": float(pi['taxes'][0]['rate']),
+                "rate": pi.tax.rate,
                 "tax_amount": tax_amount,
                 "total": total_amount
             }],
@@ -140,43 +126,67 @@ class BatchPaymentEntryGenerator:
         }
 
         # Add reference to original documents
-        payment['purchase_invoice_reference'] = pi['name']
-        if 'purchase_receipt_reference' in pi:
-            payment['purchase_receipt_reference'] = pi['purchase_receipt_reference']
+        payment['purchase_invoice_reference'] = pi.name
+        if pi.reference:
+            payment['purchase_receipt_reference'] = pi.reference
 
         return payment
 
-    def generate_and_upload(self) -> List[Dict]:
+    def upload_batch(self, purchase_invoices: List[ProcurementRecord]) -> List[ProcurementRecord]:
+        """Generate and upload payments for a batch of purchase invoices, return records of the created payments"""
+        # Generate payments
+        with get_metrics().span('generate', documents=len(purchase_invoices)):
+            documents = []
+            for pi in purchase_invoices:
+                try:
+                    payment_date = self.calculate_payment_date(pi.date, pi.due_date)
+                    documents.append(self.create_payment_entry(pi, payment_date))
+
+                except Exception as e:
+                    self.logger.error(f"Error generating payment for PI {pi.name}: {str(e)}")
+                    continue
+
+        # Upload in bulk; results are aligned with documents (None for failed uploads)
+        intent = self.intent(documents) if self.intent is not None else None
+        with get_metrics().span('upload', documents=len(documents)):
+            results = self.api.create_many(documents)
+
+        created = []
+        responses = []
+        records = []
+        for payment_doc, content in zip(documents, results):
+            if content and 'name' in content:
+                self.apply_content(payment_doc, content)
+                created.append(payment_doc)
+                responses.append(content)
+                records.append(self.record(payment_doc))
+                self.successful_payments.append(records[-1])
+                self.logger.info(f"Successfully created Payment Entry {content['name']} "
+                                 f"for PI {payment_doc['purchase_invoice_reference']}", extra=PER_DOCUMENT)
+            else:
+                self.logger.error(f"Error processing payment for PI {payment_doc['purchase_invoice_reference']}: "
+                                  f"upload failed")
+        # The full documents and responses are only written out, the run keeps the records
+        if created:
+            if self.csv_sink is not None:
+                self.csv_sink.write_rows(row for pe in created for row in self.csv_rows(pe))
+            if self.response_spill is not None:
+                self.response_spill.write(self.api.doctype, responses)
+        # Settles the intent, documents without a confirmed outcome are reconciled on resume
+        if self.journal is not None:
+            self.journal(created, intent=intent,
+                         unconfirmed=[i for i, content in enumerate(results) if not (content and 'name' in content)])
+        self.progress.update(len(created), len(results) - len(created))
+        return records
+
+    def generate_and_upload(self) -> List[ProcurementRecord]:
         """Generate and upload payment entries in batch"""
         if not all([self.start_date, self.end_date, self.purchase_invoices]):
             raise ValueError("Generator not configured. Call configure() first.")
 
         self.successful_payments = []  # Reset successful payments
         try:
-            if not self.purchase_invoices:
-                raise ValueError("No purchase invoices provided to process")
-
-            # Generate and upload payments
-            for i, pi in enumerate(self.purchase_invoices, 1):
-                try:
-                    payment_date = self.calculate_payment_date(pi['posting_date'], pi['due_date'])
-                    payment_doc = self.create_payment_entry(pi, payment_date)
-
-                    response = self.api.create(payment_doc)
-
-                    if response and 'data' in response:
-                        content = response['data']
-                        if 'name' in content:
-                            payment_doc['name'] = content['name']
-                            payment_doc['api_response'] = content  # Store complete API response
-                            self.successful_payments.append(payment_doc)
-                            self.logger.info(
-                                f"Successfully created Payment Entry {content['name']} "
-                                f"({i}/{len(self.purchase_invoices)})")
-
-                except Exception as e:
-                    self.logger.error(f"Error processing payment {i}: {str(e)}")
-                    continue
+            self.upload_batch(self.purchase_invoices)
 
             self.logger.info(f"Completed batch with {len(self.successful_payments)} successful uploads "
                              f"out of {len(self.purchase_invoices)} attempts")
@@ -186,62 +196,63 @@ class BatchPaymentEntryGenerator:
             self.logger.error(f"Batch processing error: {str(e)}")
             raise
 
-    def get_successful_payments(self) -> List[Dict]:
+    def get_successful_payments(self) -> List[ProcurementRecord]:
         """Return the list of successful payments"""
         return self.successful_payments
 
-    def save_to_csv(self, filename: str = 'batch_payment_entries.csv'):
-        """Save batch results to CSV"""
-        if not self.successful_payments:
-            self.logger.warning("No data to save to CSV.")
-            return
-
-        try:
-            output_path = OUTPUT_DIR / filename
-
-            rows = []
-            for pe in self.successful_payments:
-                row = {
-                    "ID": pe['name'],
-                    "Account Currency (From)": pe['paid_from_account_currency'],
-                    "Account Currency (To)": pe['paid_to_account_currency'],
-                    "Account Paid From": pe['paid_from'],
-                    "Account Paid To": pe['paid_to'],
-                    "Company": pe['company'],
-                    "Paid Amount": f"{pe['paid_amount']:.2f}".replace('.', ','),
-                    "Paid Amount (Company Currency)": f"{pe['base_paid_amount']:.2f}".replace('.', ','),
-                    "Payment Type": pe['payment_type'],
-                    "Posting Date": pe['posting_date'],
-                    "Received Amount": f"{pe['received_amount']:.2f}".replace('.', ','),
-                    "Received Amount (Company Currency)": f"{pe['base_received_amount']:.2f}".replace('.', ','),
-                    "Series": pe['naming_series'],
-                    "Source Exchange Rate": f"{pe['source_exchange_rate']:.2f}".replace('.', ','),
-                    "Target Exchange Rate": f"{pe['target_exchange_rate']:.2f}".replace('.', ','),
-                    "ID (Payment References)": pe['references'][0].get('name', ''),
-                    "Type (Payment References)": pe['references'][0]['reference_doctype'],
-                    "Name (Payment References)": pe['references'][0]['reference_name'],
-                    "ID (Advance Taxes and Charges)": f"ADTAX-{pe['name']}",
-                    "Account Head (Advance Taxes and Charges)": pe['taxes'][0]['account_head'],
-                    "Add Or Deduct (Advance Taxes and Charges)": pe['taxes'][0]['add_deduct_tax'],
-                    "Description (Advance Taxes and Charges)": pe['taxes'][0]['description'],
-                    "Party Type": pe['party_type'],
-                    "Party": pe['party'],
-                    "Cheque/Reference Date": pe['reference_date'],
-                    "Cheque/Reference No": pe['reference_no'],
-                    "Type (Advance Taxes and Charges)": pe['taxes'][0]['charge_type']
-                }
-                rows.append(row)
-
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-                writer.writeheader()
-                writer.writerows(rows)
-
-            self.logger.info(f"Successfully saved {len(rows)} records to {filename}")
+    @staticmethod
+    def apply_content(pe: Dict, content: Dict):
+        """Add the names ERPNext gave a created payment entry and its references"""
+        pe['name'] = content['name']
+        if 'references' in content:
+            for idx, reference in enumerate(pe['references']):
+                reference['name'] = content['references'][idx]['name']
+
+    @staticmethod
+    def record(pe: Dict) -> ProcurementRecord:
+        """Record of a created payment entry"""
+        return ProcurementRecord(
+            name=pe['name'],
+            supplier=pe['party'],
+            date=pe['posting_date'],
+            items=(),
+            tax=TaxLine.from_row(pe['taxes'][0]),
+            grand_total=float(pe['paid_amount']),
+            reference=pe['purchase_invoice_reference']
+        )
 
-        except Exception as e:
-            self.logger.error(f"Error saving to CSV: {str(e)}")
-            raise
+    @staticmethod
+    def csv_rows(pe: Dict) -> Iterator[Dict]:
+        """CSV row of a created payment entry"""
+        yield {
+            "ID": pe['name'],
+            "Account Currency (From)": pe['paid_from_account_currency'],
+            "Account Currency (To)": pe['paid_to_account_currency'],
+            "Account Paid From": pe['paid_from'],
+            "Account Paid To": pe['paid_to'],
+            "Company": pe['company'],
+            "Paid Amount": f"{pe['paid_amount']:.2f}".replace('.', ','),
+            "Paid Amount (Company Currency)": f"{pe['base_paid_amount']:.2f}".replace('.', ','),
+            "Payment Type": pe['payment_type'],
+            "Posting Date": pe['posting_date'],
+            "Received Amount": f"{pe['received_amount']:.2f}".replace('.', ','),
+            "Received Amount (Company Currency)": f"{pe['base_received_amount']:.2f}".replace('.', ','),
+            "Series": pe['naming_series'],
+            "Source Exchange Rate": f"{pe['source_exchange_rate']:.2f}".replace('.', ','),
+            "Target Exchange Rate": f"{pe['target_exchange_rate']:.2f}".replace('.', ','),
+            "ID (Payment References)": pe['references'][0].get('name', ''),
+            "Type (Payment References)": pe['references'][0]['reference_doctype'],
+            "Name (Payment References)": pe['references'][0]['reference_name'],
+            "ID (Advance Taxes and Charges)": f"ADTAX-{pe['name']}",
+            "Account Head (Advance Taxes and Charges)": pe['taxes'][0]['account_head'],
+            "Add Or Deduct (Advance Taxes and Charges)": pe['taxes'][0]['add_deduct_tax'],
+            "Description (Advance Taxes and Charges)": pe['taxes'][0]['description'],
+            "Party Type": pe['party_type'],
+            "Party": pe['party'],
+            "Cheque/Reference Date": pe['reference_date'],
+            "Cheque/Reference No": pe['reference_no'],
+            "Type (Advance Taxes and Charges)": pe['taxes'][0]['charge_type']
+        }
 
     def process(self) -> bool:
         """Main batch processing method called by master controller"""
@@ -249,12 +260,11 @@ class BatchPaymentEntryGenerator:
             self.logger.info(f"Starting batch payment entry process for period: "
                              f"{self.start_date.date()} to {self.end_date.date()}")
 
-            # Generate and upload payments
-            self.generate_and_upload()
+            # Generate and upload payments, CSV rows are written while uploading and published at the end
+            with CsvSink(OUTPUT_DIR / self.CSV_FILENAME) as self.csv_sink:
+                self.generate_and_upload()
 
-            # Save results if any successful uploads
             if self.successful_payments:
-                self.save_to_csv()
                 return True
             else:
                 self.logger.warning("No successful payments to save.")
@@ -0,0 +1,82 @@
+# src/generators/transaction/Beschaffungsprozess/batch/procurement_records.py
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class ItemLine:
+    """Item row of a created document, with the row name ERPNext assigned."""
+    name: str
+    item_code: str
+    item_name: str
+    qty: float
+    rate: float
+    amount: float
+    uom: str
+    stock_uom: str
+    conversion_factor: float
+    warehouse: str
+    # Purchase order row the item was received against, receipts only
+    purchase_order: str = ''
+    purchase_order_item: str = ''
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'ItemLine':
+        return cls(
+            name=row.get('name', ''),
+            item_code=row['item_code'],
+            item_name=row['item_name'],
+            qty=float(row['qty']),
+            rate=float(row['rate']),
+            amount=float(row['amount']),
+            uom=row['uom'],
+            stock_uom=row['stock_uom'],
+            conversion_factor=float(row['conversion_factor']),
+            warehouse=row.get('warehouse', ''),
+            purchase_order=row.get('purchase_order', ''),
+            purchase_order_item=row.get('purchase_order_item', '')
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class TaxLine:
+    """Tax row of a created document."""
+    charge_type: str
+    account_head: str
+    description: str
+    rate: float
+    tax_amount: float
+    total: float
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], **values: float) -> 'TaxLine':
+        """Tax line of row, values fill in amounts the row does not carry (e.g. on orders)."""
+        return cls(
+            charge_type=row['charge_type'],
+            account_head=row['account_head'],
+            description=row['description'],
+            rate=float(row['rate']),
+            tax_amount=float(values.get('tax_amount', row.get('tax_amount', 0.0))),
+            total=float(values.get('total', row.get('total', 0.0)))
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ProcurementRecord:
+    """What is kept of a created procurement document.
+
+    Holds the name, child row names, dates and amounts the follow-up stages
+    and the resume logic read. The payload and the API response are dropped
+    once the document is written to the CSV file and the journal, so a month
+    retains a few hundred bytes per document instead of full payloads.
+    """
+    name: str
+    supplier: str
+    date: str  # Transaction date of orders, posting date of all other documents
+    items: Tuple[ItemLine, ...]
+    tax: Optional[TaxLine]
+    grand_total: float
+    reference: str = ''  # Name of the document this one follows up on
+    due_date: str = ''
+    credit_to: str = ''
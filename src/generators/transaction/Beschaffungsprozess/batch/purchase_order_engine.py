@@ -0,0 +1,279 @@
+# src/generators/transaction/Beschaffungsprozess/batch/purchase_order_engine.py
+
+import argparse
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.config.settings import COMPANY, CURRENCY, CONVERSION_RATE, TARGET_WAREHOUSE
+
+TAX_RATE = 19.0
+LEAD_TIME_DAYS = 7  # Required-by date after the order date
+DEFAULT_QUANTITY = 500  # Order quantity without a component demand
+
+CSV_FIELDS = [
+    "ID", "Company", "Currency", "Date", "Exchange Rate", "Series", "Status", "Supplier", "Title",
+    "ID (Items)", "Amount (Items)", "Item Code (Items)", "Item Name (Items)", "Quantity (Items)",
+    "Rate (Items)", "Required By (Items)", "Stock UOM (Items)", "UOM (Items)",
+    "UOM Conversion Factor (Items)", "Set Target Warehouse", "Net Total", "Total Taxes and Charges",
+    "Grand Total", "Rounded Total"
+]
+
+
+def _german_amounts(values: np.ndarray) -> np.ndarray:
+    """Format amounts with two decimals and a decimal comma, as in the CSV exports."""
+    return np.char.replace(np.char.mod('%.2f', values), '.', ',')
+
+
+@dataclass
+class PurchaseOrderColumns:
+    """Column-wise purchase orders: one array entry per order.
+
+    Payload dicts are only built on demand by document() and csv_rows(), so
+    large batches stay a handful of NumPy arrays until they are uploaded or
+    exported.
+    """
+    products: List[Dict]  # Candidate components, referenced by product_index
+    suppliers: List[str]  # Supplier per candidate component
+    product_index: np.ndarray
+    order_dates: np.ndarray  # datetime64[D]
+    quantities: np.ndarray
+    rates: np.ndarray
+    net_amounts: np.ndarray
+    tax_amounts: np.ndarray
+    gross_amounts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.product_index)
+
+    def document(self, i: int) -> Dict:
+        """Build the API payload of order i."""
+        product = self.products[self.product_index[i]]
+        supplier_id = self.suppliers[self.product_index[i]]
+        po_date = self.order_dates[i]
+        net_amount = float(self.net_amounts[i])
+        gross_amount = float(self.gross_amounts[i])
+
+        return {
+            "doctype": "Purchase Order",
+            "naming_series": "PUR-ORD-.YYYY.-",
+            "company": COMPANY,
+            "currency": CURRENCY,
+            "transaction_date": str(po_date),
+            "schedule_date": str(po_date + np.timedelta64(LEAD_TIME_DAYS, 'D')),
+            "conversion_rate": CONVERSION_RATE,
+            "supplier": supplier_id,
+            "supplier_name": f"Purchase Order for {supplier_id}",
+            "items": [{
+                "item_code": product['Item Code'],
+                "item_name": product['Item Name'],
+                "description": product.get('Description', ''),
+                "qty": int(self.quantities[i]),
+                "rate": float(self.rates[i]),
+                "amount": net_amount,
+                "uom": product['Default Unit of Measure'],
+                "stock_uom": product['Default Unit of Measure'],
+                "conversion_factor": 1.0,
+                "warehouse": TARGET_WAREHOUSE
+            }],
+            "taxes": [{
+                "charge_type": "On Net Total",
+                "account_head": "1406 - Abziehbare Vorsteuer 19 % - B",
+                "description": "Abziehbare Vorsteuer 19 %",
+                "rate": TAX_RATE
+            }],
+            "total_taxes_and_charges": float(self.tax_amounts[i]),
+            "grand_total": gross_amount,
+            "rounded_total": round(gross_amount),
+            "status": "Draft",
+            "docstatus": 1
+        }
+
+    def documents(self) -> Iterator[Dict]:
+        """Build the API payloads one at a time."""
+        for i in range(len(self)):
+            yield self.document(i)
+
+    def csv_rows(self, first_id: int = 1) -> Iterator[Tuple]:
+        """Export rows in the purchase order CSV format (see CSV_FIELDS).
+
+        Offline orders have no ERPNext name, they are numbered consecutively
+        starting at first_id. All columns are formatted array-wise and only
+        zipped into rows at the end.
+        """
+        n = len(self)
+        product_column = lambda key: np.array([product[key] for product in self.products])[self.product_index]
+        constant = lambda value: np.full(n, value)
+
+        numbers = np.char.zfill(np.arange(first_id, first_id + n).astype(str), 5)
+        years = (self.order_dates.astype('datetime64[Y]').astype(int) + 1970).astype(str)
+        suffixes = np.char.add(np.char.add(years, '-'), numbers)
+        suppliers = np.array(self.suppliers)[self.product_index]
+        uoms = product_column('Default Unit of Measure')
+
+        columns = [
+            np.char.add('PUR-ORD-', suffixes), constant(COMPANY), constant(CURRENCY),
+            np.datetime_as_string(self.order_dates, unit='D'), constant("1,00"), constant("PUR-ORD-.YYYY.-"),
+            constant("To Receive and Bill"), suppliers, np.char.add('Purchase Order for ', suppliers),
+            np.char.add('POITEM-', suffixes), self.net_amounts.astype(str), product_column('Item Code'),
+            product_column('Item Name'), self.quantities.astype(str), self.rates.astype(str),
+            np.datetime_as_string(self.order_dates + np.timedelta64(LEAD_TIME_DAYS, 'D'), unit='D'),
+            uoms, uoms, constant("1,00"), constant(TARGET_WAREHOUSE), _german_amounts(self.net_amounts),
+            _german_amounts(self.tax_amounts), _german_amounts(self.gross_amounts),
+            _german_amounts(np.round(self.gross_amounts))
+        ]
+        return zip(*(column.tolist() for column in columns))
+
+
+class PurchaseOrderEngine:
+    """Draws purchase orders for many orders at once with NumPy.
+
+    Components without a supplier are left out up front (or assigned
+    default_supplier), so every drawn order can be uploaded. Given a
+    component demand, e.g. from MrpEngine, the orders cover it instead of
+    drawing components and quantities at random.
+    """
+
+    def __init__(self, components: List[Dict], supplier_mapping: Dict[str, str],
+                 default_supplier: Optional[str] = None, seed: Optional[int] = None,
+                 rng: Optional[np.random.Generator] = None,
+                 quantity_range: Tuple[int, int] = (DEFAULT_QUANTITY, DEFAULT_QUANTITY)):
+        self.products = []
+        self.suppliers = []
+        self.skipped_items = []
+        for product in components:
+            supplier_id = supplier_mapping.get(product['Item Code'], default_supplier)
+            if supplier_id:
+                self.products.append(product)
+                self.suppliers.append(supplier_id)
+            else:
+                self.skipped_items.append(product['Item Code'])
+
+        if not self.products:
+            raise ValueError("No components with a supplier found to generate purchase orders")
+
+        self.rates = np.array([float(product['Valuation Rate']) for product in self.products])
+        self.product_positions = {product['Item Code']: i for i, product in enumerate(self.products)}
+        self.quantity_range = quantity_range
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+
+    def demand_vector(self, demand: Dict[str, float]) -> np.ndarray:
+        """Demand per candidate component, whole units; demand for other items is dropped."""
+        vector = np.zeros(len(self.products))
+        for item_code, qty in demand.items():
+            position = self.product_positions.get(item_code)
+            if position is not None:
+                vector[position] = qty
+        return np.ceil(np.maximum(vector, 0))
+
+    @staticmethod
+    def allocate(demand: np.ndarray, num_orders: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Product index and quantity of up to num_orders orders covering demand.
+
+        Every component in demand gets one order, the remaining orders are
+        apportioned by demand (largest remainder), and each component's demand
+        is split evenly over its orders. With fewer orders than components,
+        those with the largest demand are ordered; no order is for less than
+        one unit, so small demands may take fewer orders than num_orders.
+        """
+        demanded = np.flatnonzero(demand > 0)
+        if num_orders < len(demanded):
+            demanded = np.sort(demanded[np.argsort(-demand[demanded], kind='stable')[:num_orders]])
+        if not len(demanded):
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64)
+
+        needed = demand[demanded].astype(np.int64)
+        shares = (num_orders - len(demanded)) * needed / needed.sum()
+        counts = 1 + np.floor(shares).astype(np.int64)
+        remainder = num_orders - counts.sum()
+        counts[np.argsort(np.floor(shares) - shares, kind='stable')[:remainder]] += 1
+        counts = np.minimum(counts, needed)
+
+        product_index = np.repeat(demanded, counts)
+        # Position of every order among the orders of its component
+        position = np.arange(len(product_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+        quantities = np.repeat(needed // counts, counts) + (position < np.repeat(needed % counts, counts))
+        return product_index, quantities
+
+    def generate(self, start_date: datetime, end_date: datetime, num_orders: int,
+                 demand: Optional[np.ndarray] = None) -> PurchaseOrderColumns:
+        """Draw num_orders orders dated between start_date and end_date (inclusive, whole days).
+
+        With demand (see demand_vector), components and quantities follow from
+        allocate() and only the order of the orders and their dates are drawn.
+        """
+        start = np.datetime64(start_date.date(), 'D')
+        days_between = max(0, (end_date.date() - start_date.date()).days)
+
+        if demand is None:
+            product_index = self.rng.integers(0, len(self.products), size=num_orders)
+            quantities = self.rng.integers(self.quantity_range[0], self.quantity_range[1] + 1, size=num_orders)
+        else:
+            product_index, quantities = self.allocate(demand, num_orders)
+            shuffled = self.rng.permutation(len(product_index))
+            product_index, quantities = product_index[shuffled], quantities[shuffled]
+            num_orders = len(product_index)
+        order_dates = start + self.rng.integers(0, days_between + 1, size=num_orders).astype('timedelta64[D]')
+
+        rates = self.rates[product_index]
+        net_amounts = np.round(quantities * rates, 2)
+        tax_amounts = np.round(net_amounts * (TAX_RATE / 100), 2)
+        gross_amounts = net_amounts + tax_amounts
+
+        return PurchaseOrderColumns(
+            products=self.products,
+            suppliers=self.suppliers,
+            product_index=product_index,
+            order_dates=order_dates,
+            quantities=quantities,
+            rates=rates,
+            net_amounts=net_amounts,
+            tax_amounts=tax_amounts,
+            gross_amounts=gross_amounts
+        )
+
+    def generate_chunks(self, start_date: datetime, end_date: datetime, num_orders: int,
+                        chunk_size: int = 100_000) -> Iterator[PurchaseOrderColumns]:
+        """Draw num_orders orders in chunks of at most chunk_size to bound memory use."""
+        for offset in range(0, num_orders, chunk_size):
+            yield self.generate(start_date, end_date, min(chunk_size, num_orders - offset))
+
+    def export_csv(self, path: Path, start_date: datetime, end_date: datetime, num_orders: int,
+                   chunk_size: int = 100_000) -> int:
+        """Generate num_orders offline orders straight into a CSV file, return the number of rows."""
+        written = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            for columns in self.generate_chunks(start_date, end_date, num_orders, chunk_size):
+                writer.writerows(columns.csv_rows(first_id=written + 1))
+                written += len(columns)
+        return written
+
+
+def main():
+    """Generate offline purchase orders for load tests of the ERPNext import."""
+    from src.config.settings import OUTPUT_DIR
+    from src.core.master_data import get_master_data_store
+
+    parser = argparse.ArgumentParser(description="Generate purchase orders offline into a CSV file")
+    parser.add_argument('--orders', type=int, default=1_000_000, help="number of orders")
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime(2023, 1, 1))
+    parser.add_argument('--end', type=datetime.fromisoformat, default=datetime(2023, 12, 31))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', type=Path, default=OUTPUT_DIR / 'offline_purchase_orders.csv')
+    args = parser.parse_args()
+
+    master_data = get_master_data_store()
+    engine = PurchaseOrderEngine(master_data.items_by_group('Fahrradkomponenten'),
+                                 master_data.supplier_mapping(), seed=args.seed)
+    written = engine.export_csv(args.output, args.start, args.end, args.orders)
+    print(f"Generated {written} purchase orders in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
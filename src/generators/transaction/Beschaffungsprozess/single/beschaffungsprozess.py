@@ -1,8 +1,23 @@
+import sys
+from pathlib import Path
+
+# Hauptverzeichnis zum Python-Path hinzufügen (vor allen anderen Imports)
+project_root = Path(__file__).resolve().parents[5]
+sys.path.insert(0, str(project_root))
+
+import argparse
 import csv
 from datetime import datetime, timedelta
 import random
 import os
 
+from src.core.csv_sink import CsvSink
+from src.core.metrics import get_metrics
+from src.core.profiling import add_profile_argument, profiled
+from src.generators.transaction.Beschaffungsprozess.batch.purchase_order_engine import (
+    PurchaseOrderEngine, CSV_FIELDS as PURCHASE_ORDER_FIELDS
+)
+
 
 class Config:
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -71,48 +86,9 @@ def filter_components(products):
 
 
 def generate_purchase_orders(products, item_supplier_mapping):
-    purchase_orders = []
-    for _ in range(Config.NUM_ORDERS):
-        po_date = random_date(Config.START_DATE, Config.END_DATE)
-        product = random.choice(products)
-        item_code = product['Item Code']
-
-        supplier_id = item_supplier_mapping.get(item_code, "DEFAULT_SUPPLIER_ID")
-
-        # Setze die feste Menge auf 500 kann später geändert werden
-        quantity = 500
-        rate = float(product['Valuation Rate'])
-        net_amount = round(quantity * rate, 2)
-        tax_amount, gross_amount = calculate_taxes(net_amount)
-
-        po = {
-            "ID": generate_id("PUR-ORD", po_date),
-            "Company": "Velo GmbH",
-            "Currency": "EUR",
-            "Date": po_date.strftime("%Y-%m-%d"),
-            "Exchange Rate": "1,00",
-            "Series": "PUR-ORD-.YYYY.-",
-            "Status": "To Receive and Bill",
-            "Supplier": supplier_id,
-            "Title": f"Purchase Order for {supplier_id}",
-            "ID (Items)": generate_id("POITEM", po_date),
-            "Amount (Items)": net_amount,
-            "Item Code (Items)": item_code,
-            "Item Name (Items)": product['Item Name'],
-            "Quantity (Items)": quantity,
-            "Rate (Items)": rate,
-            "Required By (Items)": (po_date + timedelta(days=7)).strftime("%Y-%m-%d"),
-            "Stock UOM (Items)": product['Default Unit of Measure'],
-            "UOM (Items)": product['Default Unit of Measure'],
-            "UOM Conversion Factor (Items)": "1,00",
-            "Set Target Warehouse": Config.TARGET_WAREHOUSE,
-            "Net Total": f"{net_amount:.2f}".replace('.', ','),
-            "Total Taxes and Charges": f"{tax_amount:.2f}".replace('.', ','),
-            "Grand Total": f"{gross_amount:.2f}".replace('.', ','),
-            "Rounded Total": f"{round(gross_amount):.2f}".replace('.', ','),
-        }
-        purchase_orders.append(po)
-    return purchase_orders
+    engine = PurchaseOrderEngine(products, item_supplier_mapping, default_supplier="DEFAULT_SUPPLIER_ID")
+    columns = engine.generate(Config.START_DATE, Config.END_DATE, Config.NUM_ORDERS)
+    return [dict(zip(PURCHASE_ORDER_FIELDS, row)) for row in columns.csv_rows()]
 
 
 def generate_purchase_receipts(purchase_orders, item_batch_info, batch_numbers):
@@ -251,13 +227,11 @@ def generate_payment_entries(purchase_invoices):
 
 
 def save_to_csv(data, filename, fieldnames):
-    with open(os.path.join(Config.OUTPUT_DIR, filename), 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(data)
+    with CsvSink(Path(Config.OUTPUT_DIR) / filename, fieldnames, extrasaction='ignore') as sink:
+        sink.write_rows(data)
 
 
-def main():
+def generate_documents():
     products = load_csv_data('items.csv')
     print(f"Loaded {len(products)} products")
 
@@ -274,28 +248,33 @@ def main():
     batch_numbers = load_batch_numbers('batch_numbers.csv')
     print(f"Loaded {len(batch_numbers)} batch numbers")
 
-    purchase_orders = generate_purchase_orders(components, item_supplier_mapping)
+    metrics = get_metrics()
+    with metrics.span('stage', stage='purchase_orders'):
+        purchase_orders = generate_purchase_orders(components, item_supplier_mapping)
     print(f"Generated {len(purchase_orders)} purchase orders")
 
     if not purchase_orders:
         print("No purchase orders generated. Check generate_purchase_orders function.")
         return
 
-    purchase_receipts = generate_purchase_receipts(purchase_orders, item_batch_info, batch_numbers)
+    with metrics.span('stage', stage='purchase_receipts'):
+        purchase_receipts = generate_purchase_receipts(purchase_orders, item_batch_info, batch_numbers)
     print(f"Generated {len(purchase_receipts)} purchase receipts")
 
     if not purchase_receipts:
         print("No purchase receipts generated. Check generate_purchase_receipts function.")
         return
 
-    purchase_invoices = generate_purchase_invoices(purchase_receipts)
+    with metrics.span('stage', stage='purchase_invoices'):
+        purchase_invoices = generate_purchase_invoices(purchase_receipts)
     print(f"Generated {len(purchase_invoices)} purchase invoices")
 
     if not purchase_invoices:
         print("No purchase invoices generated. Check generate_purchase_invoices function.")
         return
 
-    payment_entries = generate_payment_entries(purchase_invoices)
+    with metrics.span('stage', stage='payment_entries'):
+        payment_entries = generate_payment_entries(purchase_invoices)
     print(f"Generated {len(payment_entries)} payment entries")
 
     save_to_csv(purchase_orders, 'purchase_orders.csv',
@@ -343,5 +322,14 @@ def main():
     print("Datengenerierung abgeschlossen. Ausgabedateien wurden im Verzeichnis 'generated' gespeichert.")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Generate procurement documents as CSV files")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiled('procurement_csv', enabled=args.profile):
+        generate_documents()
+
+
 if __name__ == "__main__":
     main()
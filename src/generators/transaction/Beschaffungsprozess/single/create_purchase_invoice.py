@@ -41,7 +41,7 @@ class PurchaseInvoiceGenerator:
             if isinstance(content, dict) and 'name' in content:
                 system_id = content['name']
                 self.original_data[system_id] = purchase_invoice  # Store original data
-                self.logger.log_info(f"Successfully created Purchase Invoice with ID: {system_id}")
+                self.logger.log_info(f"Successfully created Purchase Invoice with ID: {system_id}", per_document=True)
                 return True, system_id, content
 
             return False, "", {}
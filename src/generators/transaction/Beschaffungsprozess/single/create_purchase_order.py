@@ -14,9 +14,9 @@ import json
 from src.api.endpoints.purchase_order_api import PurchaseOrderAPI
 from src.core.base_transaction import BaseConfig
 from src.core.logging import ProcessLogger
+from src.core.master_data import get_master_data_store
 from src.config.settings import (
-    COMPANY, CURRENCY, CONVERSION_RATE, TARGET_WAREHOUSE,
-    MASTER_DATA_DIR, OUTPUT_DIR
+    COMPANY, CURRENCY, CONVERSION_RATE, TARGET_WAREHOUSE, OUTPUT_DIR
 )
 
 
@@ -30,7 +30,6 @@ class PurchaseOrderConfig(BaseConfig):
         self.START_DATE = datetime.now() - timedelta(days=5 * 365)
         self.END_DATE = datetime.now()
         self.NUM_ORDERS = 5
-        self.MAPPING_FILE = MASTER_DATA_DIR / 'mappings' / 'item_supplier_mapping.csv'
 
 
 class PurchaseOrderGenerator:
@@ -38,6 +37,7 @@ class PurchaseOrderGenerator:
         self.config = PurchaseOrderConfig()
         self.logger = ProcessLogger(self.config)
         self.api = PurchaseOrderAPI()
+        self.master_data = get_master_data_store()
 
     def upload_purchase_order_to_api(self, purchase_order: Dict) -> Tuple[bool, str, Dict]:
         """Upload purchase order to API with improved error handling."""
@@ -51,7 +51,7 @@ class PurchaseOrderGenerator:
 
             if isinstance(content, dict) and 'name' in content:
                 system_id = content['name']
-                self.logger.log_info(f"Successfully created Purchase Order with ID: {system_id}")
+                self.logger.log_info(f"Successfully created Purchase Order with ID: {system_id}", per_document=True)
                 return True, system_id, content
 
             return False, "", {}
@@ -59,28 +59,10 @@ class PurchaseOrderGenerator:
         except Exception:
             return False, "", {}
 
-    def load_csv_data(self, filename: str) -> List[Dict]:
-        """Load data from a CSV file."""
-        try:
-            filepath = MASTER_DATA_DIR / 'base' / filename
-            self.logger.log_info(f"Loading CSV file from: {filepath}")
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return list(csv.DictReader(f))
-        except Exception as e:
-            self.logger.log_error(f"Error loading CSV file {filename}: {str(e)}")
-            raise
-
-
     def load_item_supplier_mapping(self) -> Dict[str, str]:
-        """Load item-supplier mapping from CSV."""
-        mapping = {}
+        """Load item-supplier mapping from the master data store."""
         try:
-            if self.config.MAPPING_FILE.exists():
-                with open(self.config.MAPPING_FILE, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        mapping[row['Item Code']] = row['Supplier ID']
-            return mapping
+            return self.master_data.supplier_mapping()
         except Exception as e:
             self.logger.log_error(f"Error loading supplier mapping: {str(e)}")
             raise
@@ -221,7 +203,7 @@ class PurchaseOrderGenerator:
         """Main process for generating and uploading purchase orders."""
         try:
             # Load and prepare data
-            products = self.load_csv_data('items.csv')
+            products = self.master_data.items()
             components = self.filter_components(products)
             item_supplier_mapping = self.load_item_supplier_mapping()
 
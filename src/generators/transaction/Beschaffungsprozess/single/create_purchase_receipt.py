@@ -5,9 +5,9 @@ from typing import List, Dict, Tuple
 from src.api.endpoints.purchase_receipt_api import PurchaseReceiptAPI
 from src.core.base_transaction import BaseConfig
 from src.core.logging import ProcessLogger
+from src.core.master_data import get_master_data_store
 from src.config.settings import (
-    COMPANY, CURRENCY, CONVERSION_RATE, TARGET_WAREHOUSE,
-    MASTER_DATA_DIR, OUTPUT_DIR
+    COMPANY, CURRENCY, CONVERSION_RATE, TARGET_WAREHOUSE, OUTPUT_DIR
 )
 
 
@@ -26,6 +26,7 @@ class PurchaseReceiptGenerator:
         self.config = PurchaseReceiptConfig()
         self.logger = ProcessLogger(self.config)
         self.api = PurchaseReceiptAPI()
+        self.master_data = get_master_data_store()
 
     def upload_purchase_receipt_to_api(self, purchase_receipt: Dict) -> Tuple[bool, str, Dict]:
         """Upload purchase receipt to API with improved error handling."""
@@ -39,7 +40,7 @@ class PurchaseReceiptGenerator:
 
             if isinstance(content, dict) and 'name' in content:
                 system_id = content['name']
-                self.logger.log_info(f"Successfully created Purchase Receipt with ID: {system_id}")
+                self.logger.log_info(f"Successfully created Purchase Receipt with ID: {system_id}", per_document=True)
                 return True, system_id, content
 
             return False, "", {}
@@ -62,10 +63,7 @@ class PurchaseReceiptGenerator:
     def load_item_batch_info(self) -> Dict[str, bool]:
         """Load batch information for items."""
         try:
-            filepath = MASTER_DATA_DIR / 'base' / 'items.csv'
-            with open(filepath, 'r', encoding='utf-8') as f:
-                items = list(csv.DictReader(f))
-                return {item['Item Code']: item.get('Has Batch No', '0') == '1' for item in items}
+            return self.master_data.item_batch_flags()
         except Exception as e:
             self.logger.log_error(f"Error loading batch info: {str(e)}")
             raise
@@ -73,13 +71,7 @@ class PurchaseReceiptGenerator:
     def load_batch_numbers(self) -> Dict[str, str]:
         """Load batch number mappings."""
         try:
-            filepath = MASTER_DATA_DIR / 'base' / 'batch_numbers.csv'
-            batch_numbers = {}
-            with open(filepath, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    batch_numbers[row['Item']] = row['Batch ID']
-            return batch_numbers
+            return self.master_data.batch_numbers()
         except Exception as e:
             self.logger.log_error(f"Error loading batch numbers: {str(e)}")
             raise
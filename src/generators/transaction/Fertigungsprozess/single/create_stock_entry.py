@@ -1,17 +1,27 @@
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+import argparse
+import asyncio
 import csv
-import time
 import uuid
-from copy import deepcopy
+
+import requests
 
 from src.api.endpoints.stock_entry_api import StockEntryAPI
+from src.api.endpoints.work_order_api import WorkOrderAPI
+from src.api.retry import RetryPolicy
 from src.core.base_transaction import BaseConfig
+from src.core.bom_engine import get_bom_engine
+from src.core.csv_sink import CsvSink
 from src.core.logging import ProcessLogger
+from src.core.master_data import get_master_data_store
+from src.core.metrics import get_metrics
+from src.core.profiling import add_profile_argument, profiled
 from src.config.settings import (
-    COMPANY, TARGET_WAREHOUSE,
-    MASTER_DATA_DIR, OUTPUT_DIR
+    COMPANY, TARGET_WAREHOUSE, OUTPUT_DIR,
+    WORK_ORDER_POLL_INTERVAL, WORK_ORDER_POLL_MAX_INTERVAL, WORK_ORDER_READY_TIMEOUT
 )
 
 
@@ -23,8 +33,50 @@ class StockEntryConfig(BaseConfig):
 
         # Process-specific settings
         self.WORK_ORDERS_FILE = 'uploaded_work_orders.csv'
-        self.BATCH_NUMBERS_FILE = 'batch_numbers.csv'
-        self.BOM_FILES = ['bom_bike.csv', 'bom_ebike.csv']
+
+
+@dataclass(frozen=True, slots=True)
+class ComponentLine:
+    """A BOM component per finished unit, shared by all stock entries of the BOM."""
+    item_code: str
+    qty: float
+    rate: float
+    uom: str
+    batch_no: str
+
+    def row(self, units: float, s_warehouse: str, t_warehouse: str) -> Dict:
+        """Stock entry row moving the component for units finished items."""
+        qty = self.qty * units
+        amount = round(qty * self.rate, 2)
+        return {
+            "doctype": "Stock Entry Detail",
+            "item_code": self.item_code,
+            "qty": qty,
+            "basic_rate": self.rate,
+            "basic_amount": amount,
+            "amount": amount,
+            "s_warehouse": s_warehouse,
+            "t_warehouse": t_warehouse,
+            "transfer_qty": qty,
+            "conversion_factor": 1.0,
+            "stock_uom": self.uom,
+            "uom": self.uom,
+            "batch_no": self.batch_no,
+            # Additional fields
+            "description": f"Component: {self.item_code}",
+            "allow_zero_valuation_rate": 0,
+            "expense_account": "5000 - Manufacturing Cost: Loss - B",
+            "cost_center": "Main - B"
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class BomComponents:
+    """Component lines of a BOM and their rolled-up cost per finished unit."""
+    item: str
+    item_name: str
+    lines: Tuple[ComponentLine, ...]
+    unit_cost: float
 
 
 class StockEntryGenerator:
@@ -34,6 +86,13 @@ class StockEntryGenerator:
         self.config = StockEntryConfig()
         self.logger = ProcessLogger(self.config)
         self.api = StockEntryAPI()
+        self.work_order_api = WorkOrderAPI()
+        self.master_data = get_master_data_store()
+        self.bom_engine = get_bom_engine()
+        # BOM ID -> component lines with batch numbers, built on first use of the BOM
+        self._bom_components: Dict[str, BomComponents] = {}
+        # Backoff between two readiness polls of a work order
+        self.poll_policy = RetryPolicy(backoff_base=WORK_ORDER_POLL_INTERVAL, backoff_max=WORK_ORDER_POLL_MAX_INTERVAL)
 
     def load_csv_data(self, filename: str, directory: Path = OUTPUT_DIR) -> List[Dict]:
         """Load data from CSV file."""
@@ -49,49 +108,40 @@ class StockEntryGenerator:
     def load_batch_numbers(self) -> Dict[str, str]:
         """Load batch number mappings."""
         try:
-            batch_data = self.load_csv_data(self.config.BATCH_NUMBERS_FILE, MASTER_DATA_DIR / 'base')
-            return {batch['Item']: batch['Batch ID'] for batch in batch_data}
+            return self.master_data.batch_numbers()
         except Exception as e:
             self.logger.log_error(f"Error loading batch numbers: {str(e)}")
             raise
 
-    def load_bom_data(self) -> Dict[str, Dict]:
-        """Load BOM data from manufacturing directory."""
-        bom_data = {}
-        try:
-            for filename in self.config.BOM_FILES:
-                filepath = MASTER_DATA_DIR / 'manufacturing' / filename
-                self.logger.log_info(f"Loading BOM file: {filepath}")
-
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    rows = list(reader)
-                    bom_info = rows[0]
-                    bom_id = bom_info['ID']
-                    items = [row for row in rows if row['Item Code (Items)'].strip()]
-                    bom_data[bom_id] = {
-                        'ID': bom_id,
-                        'Item': bom_info['Item'],
-                        'Item Name': bom_info['Item Name'],
-                        'Items': items
-                    }
-            return bom_data
-        except Exception as e:
-            self.logger.log_error(f"Error loading BOM data: {str(e)}")
-            raise
-
-    def generate_stock_entries(self, work_orders: List[Dict], bom_data: Dict[str, Dict],
-                               batch_numbers: Dict[str, str]) -> List[Dict]:
+    def bom_components(self, bom_no: str, batch_numbers: Optional[Dict[str, str]] = None) -> BomComponents:
+        """Component lines of a BOM exploded over all levels, built once and reused for every work order."""
+        components = self._bom_components.get(bom_no)
+        if components is None:
+            exploded = self.bom_engine.explode(bom_no, multi_level=True)
+            if batch_numbers is None:
+                batch_numbers = self.load_batch_numbers()
+            lines = tuple(
+                ComponentLine(line.item_code, line.qty, line.rate, line.uom,
+                              batch_no=batch_numbers.get(line.item_code, ""))
+                for line in exploded.lines
+            )
+            components = BomComponents(exploded.item, exploded.item_name, lines, exploded.unit_cost)
+            self._bom_components[bom_no] = components
+        return components
+
+    def generate_stock_entries(self, work_orders: List[Dict], batch_numbers: Dict[str, str]) -> List[Dict]:
         """Generate stock entry documents for material transfer."""
         stock_entries = []
         for wo in work_orders:
             try:
-                bom = bom_data[wo['BOM No']]
+                components = self.bom_components(wo['BOM No'], batch_numbers)
+                units = float(wo['Qty To Manufacture'])
                 posting_date = datetime.now().strftime("%Y-%m-%d")
                 posting_time = datetime.now().strftime("%H:%M:%S")
+                items = [line.row(units, TARGET_WAREHOUSE, TARGET_WAREHOUSE) for line in components.lines]
+                total_outgoing_value = sum(item['amount'] for item in items)
 
-                # Basic mandatory fields
-                stock_entry = {
+                stock_entries.append({
                     "doctype": "Stock Entry",
                     "naming_series": "MAT-STE-.YYYY.-",
                     "company": COMPANY,
@@ -107,46 +157,14 @@ class StockEntryGenerator:
                     "use_multi_level_bom": 1,
                     "bom_no": wo['BOM No'],
                     "work_order": wo['ID'],
-                    "fg_completed_qty": float(wo['Qty To Manufacture']),
+                    "fg_completed_qty": units,
                     "docstatus": 1,
-                    "items": []
-                }
-
-                total_outgoing_value = 0
-                for item in bom['Items']:
-                    qty = float(item['Qty (Items)']) * float(wo['Qty To Manufacture'])
-                    rate = float(item.get('Rate (Items)', 0))
-                    amount = round(qty * rate, 2)
-                    total_outgoing_value += amount
-
-                    # Required fields for each item
-                    stock_entry["items"].append({
-                        "doctype": "Stock Entry Detail",
-                        "item_code": item['Item Code (Items)'],
-                        "qty": qty,
-                        "basic_rate": rate,
-                        "basic_amount": amount,
-                        "amount": amount,
-                        "s_warehouse": TARGET_WAREHOUSE,
-                        "t_warehouse": TARGET_WAREHOUSE,
-                        "transfer_qty": qty,
-                        "conversion_factor": 1.0,
-                        "stock_uom": item['UOM (Items)'],
-                        "uom": item['UOM (Items)'],
-                        "batch_no": batch_numbers.get(item['Item Code (Items)'], ""),
-                        # Additional fields
-                        "description": f"Component: {item['Item Code (Items)']}",
-                        "allow_zero_valuation_rate": 0,
-                        "expense_account": "5000 - Manufacturing Cost: Loss - B",
-                        "cost_center": "Main - B"
-                    })
-
-                stock_entry["total_outgoing_value"] = total_outgoing_value
-                stock_entry["total_incoming_value"] = total_outgoing_value
-                stock_entry["value_difference"] = 0.0
-
-                stock_entries.append(stock_entry)
-                self.logger.log_info(f"Generated stock entry for work order {wo['ID']}")
+                    "items": items,
+                    "total_outgoing_value": total_outgoing_value,
+                    "total_incoming_value": total_outgoing_value,
+                    "value_difference": 0.0
+                })
+                self.logger.log_info(f"Generated stock entry for work order {wo['ID']}", per_document=True)
 
             except Exception as e:
                 self.logger.log_error(
@@ -155,73 +173,64 @@ class StockEntryGenerator:
 
         return stock_entries
 
-    def generate_manufacture_entries(self, stock_entries: List[Dict], work_orders: List[Dict],
-                                     bom_data: Dict[str, Dict]) -> List[Dict]:
-        """Generate manufacture stock entries."""
+    def generate_manufacture_entries(self, stock_entries: List[Dict]) -> List[Dict]:
+        """Generate the manufacture stock entry of every material transfer entry.
+
+        The entries are rendered from the BOM's component lines instead of
+        copying the transfer entries: components are consumed from the target
+        warehouse and the finished item is valued at the BOM's rolled-up cost.
+        """
         manufacture_entries = []
-        for se, wo in zip(stock_entries, work_orders):
+        for se in stock_entries:
             try:
-                manufacture_entry = deepcopy(se)
-                manufacture_entry["stock_entry_type"] = "Manufacture"
-                manufacture_entry["purpose"] = "Manufacture"
-
-                # Remove any existing name
-                if 'name' in manufacture_entry:
-                    del manufacture_entry['name']
-
-                bom = bom_data[wo['BOM No']]
+                components = self.bom_components(se['bom_no'])
+                units = se['fg_completed_qty']
+                items = [line.row(units, TARGET_WAREHOUSE, "") for line in components.lines]
 
                 # Add finished item with all required fields
-                finished_item = {
+                basic_rate = components.unit_cost * units
+                items.append({
                     "doctype": "Stock Entry Detail",
-                    "item_code": bom['Item'],
+                    "item_code": components.item,
                     "is_finished_item": 1,
-                    "qty": float(wo['Qty To Manufacture']),
-                    "transfer_qty": float(wo['Qty To Manufacture']),
+                    "qty": units,
+                    "transfer_qty": units,
                     "conversion_factor": 1.0,
                     "stock_uom": "Nos",
                     "uom": "Nos",
                     "s_warehouse": "",  # Empty for manufactured item
                     "t_warehouse": TARGET_WAREHOUSE,
-                    "basic_rate": sum(
-                        float(item.get('basic_rate', 0)) * float(item.get('qty', 0))
-                        for item in manufacture_entry['items']
-                    ),
+                    "basic_rate": basic_rate,
                     # Additional fields
                     "allow_zero_valuation_rate": 0,
-                    "description": f"Manufactured Item: {bom['Item Name']}",
-                    "item_name": bom['Item Name'],
+                    "description": f"Manufactured Item: {components.item_name}",
+                    "item_name": components.item_name,
                     "expense_account": "5000 - Cost of Goods Sold - B",
                     "cost_center": "Main - B",
-                    "bom_no": wo['BOM No']
-                }
-
-                # Calculate amounts
-                finished_item['basic_amount'] = finished_item['basic_rate'] * finished_item['qty']
-                finished_item['amount'] = finished_item['basic_amount']
-
-                # Update source warehouse for components
-                for item in manufacture_entry['items']:
-                    item['s_warehouse'] = TARGET_WAREHOUSE
-                    item['t_warehouse'] = ""  # Empty for consumed items
-
-                # Add finished item to the list
-                manufacture_entry['items'].append(finished_item)
+                    "bom_no": se['bom_no'],
+                    "basic_amount": basic_rate * units,
+                    "amount": basic_rate * units
+                })
+
+                # Header fields are shared with the transfer entry, the name is assigned on upload
+                manufacture_entry = {key: value for key, value in se.items() if key != 'name'}
+                manufacture_entry.update(stock_entry_type="Manufacture", purpose="Manufacture", items=items)
                 manufacture_entries.append(manufacture_entry)
 
-                self.logger.log_info(f"Generated manufacture entry for work order {wo['ID']}")
+                self.logger.log_info(f"Generated manufacture entry for work order {se['work_order']}",
+                                     per_document=True)
 
             except Exception as e:
                 self.logger.log_error(
-                    f"Error generating manufacture entry for work order {wo.get('ID', 'unknown')}: {str(e)}")
+                    f"Error generating manufacture entry for work order {se.get('work_order', 'unknown')}: {str(e)}")
                 continue
 
         return manufacture_entries
 
-    def upload_stock_entry_to_api(self, stock_entry: Dict) -> Tuple[bool, Dict]:
+    async def upload_stock_entry_to_api(self, stock_entry: Dict) -> Tuple[bool, Dict]:
         """Upload stock entry to API."""
         try:
-            response = self.api.create(stock_entry)
+            response = await self.api.acreate(stock_entry)
 
             if not response or 'data' not in response:
                 return False, {}
@@ -230,7 +239,7 @@ class StockEntryGenerator:
 
             if isinstance(content, dict) and 'name' in content:
                 system_id = content['name']
-                self.logger.log_info(f"Successfully created Stock Entry with ID: {system_id}")
+                self.logger.log_info(f"Successfully created Stock Entry with ID: {system_id}", per_document=True)
                 return True, content
 
             return False, {}
@@ -239,6 +248,11 @@ class StockEntryGenerator:
             self.logger.log_error(f"Failed to upload Stock Entry: {str(e)}")
             return False, {}
 
+    @staticmethod
+    def csv_fieldnames(entry: Dict) -> List[str]:
+        """CSV columns of stock entries shaped like entry, plus the name assigned on upload."""
+        return [key for key in entry if key != 'name'] + ['name']
+
     def save_to_csv(self, data: List[Dict], filename: str):
         """Save stock entries to CSV file."""
         if not data:
@@ -246,12 +260,8 @@ class StockEntryGenerator:
             return
 
         try:
-            output_path = OUTPUT_DIR / filename
-
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=data[0].keys())
-                writer.writeheader()
-                writer.writerows(data)
+            with CsvSink(OUTPUT_DIR / filename, self.csv_fieldnames(data[0])) as sink:
+                sink.write_rows(data)
 
             self.logger.log_info(f"Successfully saved {len(data)} records to {filename}")
 
@@ -259,6 +269,78 @@ class StockEntryGenerator:
             self.logger.log_error(f"Error saving to CSV: {str(e)}")
             raise
 
+    async def upload_and_record(self, entry: Dict, all_entries: CsvSink, successful_uploads: CsvSink) -> bool:
+        """Upload an entry and write it to the CSV of all entries and, if created, of uploaded ones."""
+        success, content = await self.upload_stock_entry_to_api(entry)
+        if success:
+            entry['name'] = content['name']
+            successful_uploads.write(entry)
+        all_entries.write(entry)
+        return success
+
+    @staticmethod
+    def work_order_ready(work_order: Dict, qty: float) -> bool:
+        """Whether the material for qty units has been transferred to work_order."""
+        transferred = work_order.get('material_transferred_for_manufacturing')
+        if transferred is not None:
+            return float(transferred) >= qty
+        return work_order.get('status') in ('In Process', 'Completed')
+
+    async def wait_for_work_order(self, name: str, qty: float) -> bool:
+        """Poll a work order with backoff until its material transfer is booked, return False on timeout."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        attempt = 0
+        while True:
+            try:
+                work_order = (await self.work_order_api.aget(name)).get('data') or {}
+                if self.work_order_ready(work_order, qty):
+                    get_metrics().observe("work_order_ready_wait_seconds", (), loop.time() - started)
+                    return True
+            except requests.exceptions.RequestException:
+                pass  # Logged by the API layer, the work order is polled again
+
+            delay = self.poll_policy.backoff(attempt)
+            if loop.time() - started + delay > WORK_ORDER_READY_TIMEOUT:
+                return False
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def process_work_order(self, transfer_entry: Dict, manufacture_entry: Optional[Dict],
+                                 all_entries: CsvSink, successful_uploads: CsvSink):
+        """Upload the transfer entry of a work order, then its manufacture entry once the transfer is booked."""
+        work_order = transfer_entry['work_order']
+        if not await self.upload_and_record(transfer_entry, all_entries, successful_uploads):
+            if manufacture_entry is not None:
+                self.logger.log_warning(f"Material transfer for work order {work_order} failed, "
+                                        f"skipping its manufacture entry")
+                all_entries.write(manufacture_entry)
+            return
+        if manufacture_entry is None:
+            return
+
+        if not await self.wait_for_work_order(work_order, float(transfer_entry['fg_completed_qty'])):
+            self.logger.log_error(f"Work order {work_order} shows no material transfer after "
+                                  f"{WORK_ORDER_READY_TIMEOUT:g}s, skipping its manufacture entry")
+            all_entries.write(manufacture_entry)
+            return
+        await self.upload_and_record(manufacture_entry, all_entries, successful_uploads)
+
+    async def upload_entries(self, stock_entries: List[Dict], manufacture_entries: List[Dict],
+                             all_entries: CsvSink, successful_uploads: CsvSink):
+        """Upload the entries of all work orders concurrently.
+
+        Each manufacture entry only waits for the transfer entry of its own
+        work order. Entries that are not uploaded are still written to the CSV
+        of all entries.
+        """
+        manufacture_by_work_order = {entry['work_order']: entry for entry in manufacture_entries}
+        await asyncio.gather(*(
+            self.process_work_order(se, manufacture_by_work_order.get(se['work_order']), all_entries,
+                                    successful_uploads)
+            for se in stock_entries
+        ))
+
     def process(self):
         """Main process for generating and uploading stock entries."""
         try:
@@ -266,48 +348,35 @@ class StockEntryGenerator:
             work_orders = self.load_csv_data(self.config.WORK_ORDERS_FILE)
             self.logger.log_info(f"Loaded {len(work_orders)} work orders")
 
-            bom_data = self.load_bom_data()
-            self.logger.log_info(f"Loaded {len(bom_data)} BOMs")
+            self.logger.log_info(f"Loaded {len(self.bom_engine.bom_ids())} BOMs")
 
             batch_numbers = self.load_batch_numbers()
             self.logger.log_info(f"Loaded {len(batch_numbers)} batch numbers")
 
-            # Generate stock entries
-            stock_entries = self.generate_stock_entries(work_orders, bom_data, batch_numbers)
-            self.logger.log_info(f"Generated {len(stock_entries)} stock entries")
-
-            # Generate manufacture entries
-            manufacture_entries = self.generate_manufacture_entries(stock_entries, work_orders, bom_data)
-            self.logger.log_info(f"Generated {len(manufacture_entries)} manufacture entries")
-
-            # Process and upload entries
-            all_entries = []
-            successful_uploads = []
-
-            # Process Material Transfer entries
-            for se in stock_entries:
-                success, content = self.upload_stock_entry_to_api(se)
-                if success:
-                    se['name'] = content['name']
-                    successful_uploads.append(se)
-                all_entries.append(se)
-
-            self.logger.log_info("Waiting 10 seconds before processing manufacture entries...")
-            time.sleep(10)
-
-            # Process Manufacture entries
-            for me in manufacture_entries:
-                success, content = self.upload_stock_entry_to_api(me)
-                if success:
-                    me['name'] = content['name']
-                    successful_uploads.append(me)
-                all_entries.append(me)
-
-            # Save results
-            self.save_to_csv(all_entries, 'all_stock_entries.csv')
-            self.save_to_csv(successful_uploads, 'uploaded_stock_entries.csv')
-
-            self.logger.log_info(f"Process completed. {len(successful_uploads)} out of {len(all_entries)} "
+            metrics = get_metrics()
+            with metrics.span('stage', stage='generate'):
+                # Generate stock entries
+                stock_entries = self.generate_stock_entries(work_orders, batch_numbers)
+                self.logger.log_info(f"Generated {len(stock_entries)} stock entries")
+
+                # Generate manufacture entries
+                manufacture_entries = self.generate_manufacture_entries(stock_entries)
+                self.logger.log_info(f"Generated {len(manufacture_entries)} manufacture entries")
+
+            # Entries are written to CSV as soon as they are uploaded, the files are published at the end
+            fieldnames = self.csv_fieldnames(stock_entries[0]) if stock_entries else None
+            all_entries = CsvSink(OUTPUT_DIR / 'all_stock_entries.csv', fieldnames)
+            successful_uploads = CsvSink(OUTPUT_DIR / 'uploaded_stock_entries.csv', fieldnames)
+            with all_entries, successful_uploads, metrics.span('stage', stage='upload'):
+                asyncio.run(self.upload_entries(stock_entries, manufacture_entries, all_entries, successful_uploads))
+
+            for sink in (all_entries, successful_uploads):
+                if sink.rows:
+                    self.logger.log_info(f"Successfully saved {sink.rows} records to {sink.path.name}")
+                else:
+                    self.logger.log_warning(f"No data to save to {sink.path.name}.")
+
+            self.logger.log_info(f"Process completed. {successful_uploads.rows} out of {all_entries.rows} "
                                  f"entries successfully uploaded")
 
         except Exception as e:
@@ -316,8 +385,13 @@ class StockEntryGenerator:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate stock entries for uploaded work orders")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
     generator = StockEntryGenerator()
-    generator.process()
+    with profiled('stock_entries', enabled=args.profile):
+        generator.process()
 
 
 if __name__ == "__main__":
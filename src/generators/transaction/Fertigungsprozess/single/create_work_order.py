@@ -1,14 +1,13 @@
 from datetime import datetime, timedelta
-from pathlib import Path
 from typing import List, Dict, Tuple
-import csv
 import random
-import logging
 
 from src.api.endpoints.work_order_api import WorkOrderAPI
 from src.core.base_transaction import BaseConfig
+from src.core.bom_engine import get_bom_engine
+from src.core.csv_sink import CsvSink
 from src.core.logging import ProcessLogger
-from src.config.settings import (COMPANY, TARGET_WAREHOUSE, MASTER_DATA_DIR, OUTPUT_DIR)
+from src.config.settings import (COMPANY, TARGET_WAREHOUSE, OUTPUT_DIR)
 
 
 class WorkOrderConfig(BaseConfig):
@@ -21,14 +20,20 @@ class WorkOrderConfig(BaseConfig):
         self.START_DATE = datetime.now() - timedelta(days=5 * 365)
         self.END_DATE = datetime.now()
         self.NUM_ORDERS = 5
-        self.BOM_FILES = ['bom_bike.csv', 'bom_ebike.csv']
 
 
 class WorkOrderGenerator:
+    CSV_FIELDS = [
+        "ID", "BOM No", "Company", "Item To Manufacture", "Planned Start Date",
+        "Qty To Manufacture", "Series", "Status", "Has Batch No", "Has Serial No",
+        "Work-in-Progress Warehouse", "Source Warehouse", "Target Warehouse"
+    ]
+
     def __init__(self):
         self.config = WorkOrderConfig()
         self.logger = ProcessLogger(self.config)
         self.api = WorkOrderAPI()
+        self.bom_engine = get_bom_engine()
 
     def upload_work_order_to_api(self, work_order: Dict) -> Tuple[bool, str, Dict]:
         """Upload work order to API with improved error handling."""
@@ -42,7 +47,7 @@ class WorkOrderGenerator:
 
             if isinstance(content, dict) and 'name' in content:
                 system_id = content['name']
-                self.logger.log_info(f"Successfully created Work Order with ID: {system_id}")
+                self.logger.log_info(f"Successfully created Work Order with ID: {system_id}", per_document=True)
                 return True, system_id, content
 
             return False, "", {}
@@ -51,31 +56,6 @@ class WorkOrderGenerator:
             self.logger.log_error(f"Failed to upload Work Order: {str(e)}")
             return False, "", {}
 
-    def load_bom_data(self) -> Dict[str, Dict]:
-        """Load BOM data from manufacturing directory."""
-        bom_data = {}
-        try:
-            for filename in self.config.BOM_FILES:
-                filepath = MASTER_DATA_DIR / 'manufacturing' / filename
-                self.logger.log_info(f"Loading BOM file: {filepath}")
-
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    rows = list(reader)
-                    bom_info = rows[0]
-                    bom_id = bom_info['ID']
-                    items = [row for row in rows if row['Item Code (Items)'].strip()]
-                    bom_data[bom_id] = {
-                        'ID': bom_id,
-                        'Item': bom_info['Item'],
-                        'Item Name': bom_info['Item Name'],
-                        'Items': items
-                    }
-            return bom_data
-        except Exception as e:
-            self.logger.log_error(f"Error loading BOM data: {str(e)}")
-            raise
-
     def random_date(self) -> datetime:
         """Generate random date between start and end date."""
         if not all([self.config.START_DATE, self.config.END_DATE]):
@@ -86,23 +66,25 @@ class WorkOrderGenerator:
         random_days = random.randint(0, max(0, days_between))
         return self.config.START_DATE + timedelta(days=random_days)
 
-    def generate_work_orders(self, bom_data: Dict[str, Dict]) -> List[Dict]:
+    def generate_work_orders(self) -> List[Dict]:
         """Generate work order documents."""
         work_orders = []
+        bom_ids = self.bom_engine.bom_ids()
         for _ in range(self.config.NUM_ORDERS):
             try:
                 wo_date = self.random_date()
-                bom_id, bom = random.choice(list(bom_data.items()))
+                bom = self.bom_engine.get(random.choice(bom_ids))
 
                 work_order = {
                     "doctype": "Work Order",
                     "naming_series": "MFG-WO-.YYYY.-",
                     "company": COMPANY,
-                    "bom_no": bom_id,
-                    "production_item": bom['Item'],
+                    "bom_no": bom.bom_no,
+                    "production_item": bom.item,
                     "qty": random.randint(1, 10),
                     "planned_start_date": wo_date.strftime("%Y-%m-%d %H:%M:%S"),
                     "status": "Not Started",
+                    "use_multi_level_bom": 1,
                     "has_batch_no": 0,
                     "has_serial_no": 1,
                     "wip_warehouse": TARGET_WAREHOUSE,
@@ -118,6 +100,25 @@ class WorkOrderGenerator:
 
         return work_orders
 
+    @staticmethod
+    def csv_row(wo: Dict) -> Dict:
+        """CSV row of a work order."""
+        return {
+            "ID": wo.get('name', ''),
+            "BOM No": wo['bom_no'],
+            "Company": wo['company'],
+            "Item To Manufacture": wo['production_item'],
+            "Planned Start Date": wo['planned_start_date'],
+            "Qty To Manufacture": wo['qty'],
+            "Series": wo['naming_series'],
+            "Status": wo['status'],
+            "Has Batch No": wo['has_batch_no'],
+            "Has Serial No": wo['has_serial_no'],
+            "Work-in-Progress Warehouse": wo['wip_warehouse'],
+            "Source Warehouse": wo['source_warehouse'],
+            "Target Warehouse": wo['fg_warehouse']
+        }
+
     def save_to_csv(self, data: List[Dict], filename: str):
         """Save work orders to CSV file."""
         if not data:
@@ -125,38 +126,10 @@ class WorkOrderGenerator:
             return
 
         try:
-            output_path = OUTPUT_DIR / filename
-            fieldnames = [
-                "ID", "BOM No", "Company", "Item To Manufacture", "Planned Start Date",
-                "Qty To Manufacture", "Series", "Status", "Has Batch No", "Has Serial No",
-                "Work-in-Progress Warehouse", "Source Warehouse", "Target Warehouse"
-            ]
-
-            rows = []
-            for wo in data:
-                row = {
-                    "ID": wo.get('name', ''),
-                    "BOM No": wo['bom_no'],
-                    "Company": wo['company'],
-                    "Item To Manufacture": wo['production_item'],
-                    "Planned Start Date": wo['planned_start_date'],
-                    "Qty To Manufacture": wo['qty'],
-                    "Series": wo['naming_series'],
-                    "Status": wo['status'],
-                    "Has Batch No": wo['has_batch_no'],
-                    "Has Serial No": wo['has_serial_no'],
-                    "Work-in-Progress Warehouse": wo['wip_warehouse'],
-                    "Source Warehouse": wo['source_warehouse'],
-                    "Target Warehouse": wo['fg_warehouse']
-                }
-                rows.append(row)
-
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
+            with CsvSink(OUTPUT_DIR / filename, self.CSV_FIELDS) as sink:
+                rows = sink.write_rows(self.csv_row(wo) for wo in data)
 
-            self.logger.log_info(f"Successfully saved {len(rows)} records to {filename}")
+            self.logger.log_info(f"Successfully saved {rows} records to {filename}")
 
         except Exception as e:
             self.logger.log_error(f"Error saving to CSV: {str(e)}")
@@ -165,26 +138,24 @@ class WorkOrderGenerator:
     def process(self):
         """Main process for generating and uploading work orders."""
         try:
-            # Load BOM data
-            bom_data = self.load_bom_data()
-            self.logger.log_info(f"Loaded {len(bom_data)} BOMs")
+            self.logger.log_info(f"Loaded {len(self.bom_engine.bom_ids())} BOMs")
 
             # Generate work orders
-            work_orders = self.generate_work_orders(bom_data)
+            work_orders = self.generate_work_orders()
             self.logger.log_info(f"Generated {len(work_orders)} work orders")
 
-            # Upload and track successful uploads
-            successful_uploads = []
-            for wo in work_orders:
-                success, system_id, response_data = self.upload_work_order_to_api(wo)
-                if success:
-                    wo['name'] = system_id
-                    wo['status'] = response_data.get('status', '')
-                    successful_uploads.append(wo)
-
-            # Save results
-            if successful_uploads:
-                self.save_to_csv(successful_uploads, 'uploaded_work_orders.csv')
+            # Successful uploads are written to CSV right away, the file is published at the end
+            with CsvSink(OUTPUT_DIR / 'uploaded_work_orders.csv', self.CSV_FIELDS) as successful_uploads:
+                for wo in work_orders:
+                    success, system_id, response_data = self.upload_work_order_to_api(wo)
+                    if success:
+                        wo['name'] = system_id
+                        wo['status'] = response_data.get('status', '')
+                        successful_uploads.write(self.csv_row(wo))
+
+            if successful_uploads.rows:
+                self.logger.log_info(f"Successfully saved {successful_uploads.rows} records to "
+                                     f"uploaded_work_orders.csv")
             else:
                 self.logger.log_warning("No successful uploads to save to CSV.")
 
@@ -1,8 +1,12 @@
 import csv
 from datetime import datetime, timedelta
+from pathlib import Path
 import random
 import os
 
+from src.core.bom_engine import get_bom_engine
+from src.core.csv_sink import CsvSink
+
 
 class Config:
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -31,39 +35,22 @@ def random_date(start_date, end_date):
     )
 
 
-def load_bom_data():
-    bom_data = {}
-    for filename in ['bom_ebike.csv', 'bom_bike.csv']:
-        with open(os.path.join(Config.INPUT_DIR, filename), 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            bom_info = next(reader)
-            bom_id = bom_info[0]
-            items = [dict(zip(header, row)) for row in reader if row[10]]  # Only include rows with an Item Code
-            bom_data[bom_id] = {
-                'ID': bom_id,
-                'Item': bom_info[4],
-                'Item Name': bom_info[9],
-                'Items': items
-            }
-    return bom_data
-
-
 def load_batch_numbers():
     batch_data = load_csv_data('batch_numbers.csv')
     return {batch['Item']: batch['Batch ID'] for batch in batch_data}
 
 
-def generate_work_orders(num_orders, bom_data):
+def generate_work_orders(num_orders, bom_engine):
     work_orders = []
+    bom_ids = bom_engine.bom_ids()
     for _ in range(num_orders):
         wo_date = random_date(Config.START_DATE, Config.END_DATE)
-        bom_id, bom = random.choice(list(bom_data.items()))
+        bom = bom_engine.get(random.choice(bom_ids))
         work_order = {
             "ID": generate_id("MFG-WO", wo_date),
-            "BOM No": bom_id,
+            "BOM No": bom.bom_no,
             "Company": "Velo GmbH",
-            "Item To Manufacture": bom['Item'],
+            "Item To Manufacture": bom.item,
             "Planned Start Date": wo_date.strftime("%Y-%m-%d %H:%M:%S"),
             "Qty To Manufacture": random.randint(1, 10),
             "Series": "MFG-WO-.YYYY.-",
@@ -78,11 +65,11 @@ def generate_work_orders(num_orders, bom_data):
     return work_orders
 
 
-def generate_stock_entries(work_orders, bom_data, batch_numbers):
+def generate_stock_entries(work_orders, bom_engine, batch_numbers):
     material_transfers = []
     manufactures = []
     for wo in work_orders:
-        bom = bom_data[wo['BOM No']]
+        bom = bom_engine.explode(wo['BOM No'])
 
         entry_id = generate_id("MAT-STE", datetime.strptime(wo['Planned Start Date'], "%Y-%m-%d %H:%M:%S"))
 
@@ -101,15 +88,15 @@ def generate_stock_entries(work_orders, bom_data, batch_numbers):
             "Items": []
         }
 
-        for item in bom['Items']:
+        for line in bom.lines:
             transfer_entry["Items"].append({
                 "Conversion Factor (Items)": 1.0,
-                "Item Code (Items)": item['Item Code (Items)'],
-                "Qty (Items)": float(item['Qty (Items)']) * wo['Qty To Manufacture'],
-                "Qty as per Stock UOM (Items)": float(item['Qty (Items)']) * wo['Qty To Manufacture'],
-                "Stock UOM (Items)": item['UOM (Items)'],
-                "UOM (Items)": item['UOM (Items)'],
-                "Batch No (Items)": batch_numbers.get(item['Item Code (Items)'], "")
+                "Item Code (Items)": line.item_code,
+                "Qty (Items)": line.qty * wo['Qty To Manufacture'],
+                "Qty as per Stock UOM (Items)": line.qty * wo['Qty To Manufacture'],
+                "Stock UOM (Items)": line.uom,
+                "UOM (Items)": line.uom,
+                "Batch No (Items)": batch_numbers.get(line.item_code, "")
             })
 
         material_transfers.append(transfer_entry)
@@ -134,30 +121,32 @@ def generate_stock_entries(work_orders, bom_data, batch_numbers):
     return material_transfers, manufactures
 
 
+def csv_rows(data):
+    """One row per entry, or per item for entries with Items."""
+    for entry in data:
+        if 'Items' in entry:
+            for item in entry['Items']:
+                yield {**entry, **item}
+        else:
+            yield entry
+
+
 def save_to_csv(data, filename, fieldnames):
-    with open(os.path.join(Config.OUTPUT_DIR, filename), 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-        writer.writeheader()
-        for entry in data:
-            if 'Items' in entry:
-                for item in entry['Items']:
-                    row = {**entry, **item}
-                    writer.writerow(row)
-            else:
-                writer.writerow(entry)
+    with CsvSink(Path(Config.OUTPUT_DIR) / filename, fieldnames, extrasaction='ignore') as sink:
+        sink.write_rows(csv_rows(data))
 
 
 def main(num_work_orders):
-    bom_data = load_bom_data()
-    print(f"Loaded {len(bom_data)} BOMs")
+    bom_engine = get_bom_engine()
+    print(f"Loaded {len(bom_engine.bom_ids())} BOMs")
 
     batch_numbers = load_batch_numbers()
     print(f"Loaded {len(batch_numbers)} batch numbers")
 
-    work_orders = generate_work_orders(num_work_orders, bom_data)
+    work_orders = generate_work_orders(num_work_orders, bom_engine)
     print(f"Generated {len(work_orders)} work orders")
 
-    material_transfers, manufactures = generate_stock_entries(work_orders, bom_data, batch_numbers)
+    material_transfers, manufactures = generate_stock_entries(work_orders, bom_engine, batch_numbers)
     print(f"Generated {len(material_transfers)} material transfers and {len(manufactures)} manufactures")
 
     # Save generated data to CSV files
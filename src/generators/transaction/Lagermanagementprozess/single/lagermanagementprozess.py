@@ -1,10 +1,12 @@
 import csv
 import os
 from datetime import datetime, timedelta
+from pathlib import Path
 import random
 import logging
 from typing import List, Dict
 from src.api.endpoints.stock_entry_api import StockEntryAPI
+from src.core.csv_sink import CsvSink
 import uuid
 
 
@@ -119,17 +121,11 @@ def upload_stock_entry_to_api(stock_entry: Dict) -> bool:
         logging.error(f"Error uploading Stock Entry: {str(e)}")
         return False
 
-def save_to_csv(data: List[Dict], filename: str):
-    if not data:
-        logging.warning(f"No data to save to {filename}")
-        return
-
-    fieldnames = list(data[0].keys())
-    with open(os.path.join(Config.OUTPUT_DIR, filename), 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    logging.info(f"Saved {len(data)} records to {filename}")
+def log_saved(sink: CsvSink):
+    if sink.rows:
+        logging.info(f"Saved {sink.rows} records to {sink.path.name}")
+    else:
+        logging.warning(f"No data to save to {sink.path.name}")
 
 def main():
     # Definieren Sie hier die Anzahl der Transfers und Items pro Transfer
@@ -139,22 +135,23 @@ def main():
     warehouses = load_warehouses()
     items = load_items()
 
-    successful_uploads = []
-    failed_uploads = []
-
-    for _ in range(num_transfers):
-        stock_entry = generate_stock_entry(warehouses, items, items_per_transfer)
-        if upload_stock_entry_to_api(stock_entry):
-            successful_uploads.append(stock_entry)
-        else:
-            failed_uploads.append(stock_entry)
+    # Entries are written to CSV right after their upload, the files are published at the end
+    successful_uploads = CsvSink(Path(Config.OUTPUT_DIR) / 'successful_stock_entries.csv')
+    failed_uploads = CsvSink(Path(Config.OUTPUT_DIR) / 'failed_stock_entries.csv')
+    with successful_uploads, failed_uploads:
+        for _ in range(num_transfers):
+            stock_entry = generate_stock_entry(warehouses, items, items_per_transfer)
+            if upload_stock_entry_to_api(stock_entry):
+                successful_uploads.write(stock_entry)
+            else:
+                failed_uploads.write(stock_entry)
 
-    save_to_csv(successful_uploads, 'successful_stock_entries.csv')
-    save_to_csv(failed_uploads, 'failed_stock_entries.csv')
+    log_saved(successful_uploads)
+    log_saved(failed_uploads)
 
     logging.info(f"Total transfers: {num_transfers}")
-    logging.info(f"Successful uploads: {len(successful_uploads)}")
-    logging.info(f"Failed uploads: {len(failed_uploads)}")
+    logging.info(f"Successful uploads: {successful_uploads.rows}")
+    logging.info(f"Failed uploads: {failed_uploads.rows}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
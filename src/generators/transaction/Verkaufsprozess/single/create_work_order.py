@@ -3,8 +3,11 @@ import os
 import random
 from datetime import datetime, timedelta
 import logging
+from pathlib import Path
 from typing import List, Dict
 from src.api.endpoints.work_order_api import WorkOrderAPI
+from src.core.bom_engine import BomEngine, get_bom_engine
+from src.core.csv_sink import CsvSink
 
 
 class Config:
@@ -37,34 +40,17 @@ def random_date(start_date: datetime, end_date: datetime) -> datetime:
     )
 
 
-def load_bom_data() -> Dict[str, Dict]:
-    bom_data = {}
-    for filename in ['bom_ebike.csv', 'bom_bike.csv']:
-        with open(os.path.join(Config.INPUT_DIR, filename), 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            bom_info = next(reader)
-            bom_id = bom_info[0]
-            items = [dict(zip(header, row)) for row in reader if row[10]]  # Only include rows with an Item Code
-            bom_data[bom_id] = {
-                'ID': bom_id,
-                'Item': bom_info[4],
-                'Item Name': bom_info[9],
-                'Items': items
-            }
-    return bom_data
-
-
-def generate_work_orders(num_orders: int, bom_data: Dict[str, Dict]) -> List[Dict]:
+def generate_work_orders(num_orders: int, bom_engine: BomEngine) -> List[Dict]:
     work_orders = []
+    bom_ids = bom_engine.bom_ids()
     for _ in range(num_orders):
         wo_date = random_date(Config.START_DATE, Config.END_DATE)
-        bom_id, bom = random.choice(list(bom_data.items()))
+        bom = bom_engine.get(random.choice(bom_ids))
         work_order = {
             "ID": generate_id("MFG-WO", wo_date),
-            "BOM No": bom_id,
+            "BOM No": bom.bom_no,
             "Company": "Velo GmbH",
-            "Item To Manufacture": bom['Item'],
+            "Item To Manufacture": bom.item,
             "Planned Start Date": wo_date.strftime("%Y-%m-%d %H:%M:%S"),
             "Qty To Manufacture": random.randint(1, 10),
             "Series": "MFG-WO-.YYYY.-",
@@ -112,34 +98,27 @@ def upload_work_order_to_api(work_order: Dict) -> bool:
         return False
 
 
-def save_to_csv(data: List[Dict], filename: str):
-    fieldnames = data[0].keys() if data else []
-    with open(os.path.join(Config.OUTPUT_DIR, filename), 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    logging.info(f"Saved {len(data)} records to {filename}")
-
-
 def main(num_work_orders: int):
-    bom_data = load_bom_data()
-    logging.info(f"Loaded {len(bom_data)} BOMs")
+    bom_engine = get_bom_engine()
+    logging.info(f"Loaded {len(bom_engine.bom_ids())} BOMs")
 
-    work_orders = generate_work_orders(num_work_orders, bom_data)
+    work_orders = generate_work_orders(num_work_orders, bom_engine)
     logging.info(f"Generated {len(work_orders)} work orders")
 
-    successful_uploads = []
-    for wo in work_orders:
-        if upload_work_order_to_api(wo):
-            successful_uploads.append(wo)
-
-    # Save all generated work orders to CSV
-    save_to_csv(work_orders, 'all_work_orders.csv')
+    # All generated work orders and, separately, the uploaded ones are written to CSV
+    # right after their upload, the files are published at the end
+    all_work_orders = CsvSink(Path(Config.OUTPUT_DIR) / 'all_work_orders.csv')
+    successful_uploads = CsvSink(Path(Config.OUTPUT_DIR) / 'uploaded_work_orders.csv')
+    with all_work_orders, successful_uploads:
+        for wo in work_orders:
+            if upload_work_order_to_api(wo):
+                successful_uploads.write(wo)
+            all_work_orders.write(wo)
 
-    # Save successfully uploaded work orders to a separate CSV
-    save_to_csv(successful_uploads, 'uploaded_work_orders.csv')
+    for sink in (all_work_orders, successful_uploads):
+        logging.info(f"Saved {sink.rows} records to {sink.path.name}")
 
-    logging.info(f"Successfully uploaded {len(successful_uploads)} out of {len(work_orders)} work orders")
+    logging.info(f"Successfully uploaded {successful_uploads.rows} out of {len(work_orders)} work orders")
 
 
 if __name__ == "__main__":
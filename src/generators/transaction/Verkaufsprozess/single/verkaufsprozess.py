@@ -1,16 +1,27 @@
+import argparse
+import asyncio
 import csv
 import os
 from datetime import datetime, timedelta
 import random
 import logging
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 import uuid
+from faker import Faker
+from src.api.async_api import get_executor
 from src.api.endpoints.sales_order_api import SalesOrderAPI
 from src.api.endpoints.delivery_note_api import DeliveryNoteAPI
 from src.api.endpoints.sales_invoice_api import SalesInvoiceAPI
 from src.api.endpoints.payment_entry_api import PaymentEntryAPI
 from src.generators.master.create_customer import create_b2c_customer
+from src.config.settings import (
+    SALES_CONCURRENCY_B2B, SALES_CONCURRENCY_B2C_ONLINE, SALES_CONCURRENCY_B2C_FILIALE,
+    SALES_START_DATE, SALES_END_DATE
+)
+from src.core.metrics import get_metrics, in_current_span
+from src.core.profiling import add_profile_argument, profiled
+from src.core.rng import RandomStreams, get_random_streams
 
 
 class Config:
@@ -18,8 +29,8 @@ class Config:
     INPUT_DIR = os.path.join(BASE_DIR, 'master')
     OUTPUT_DIR = os.path.join(BASE_DIR, 'generated')
     JSON_DIR = os.path.join(BASE_DIR, 'api_payloads')  # New directory for JSON payloads
-    START_DATE = datetime.now() - timedelta(days=5*365)  # 5 Jahre zurück
-    END_DATE = datetime.now()
+    START_DATE = datetime.fromisoformat(SALES_START_DATE)
+    END_DATE = datetime.fromisoformat(SALES_END_DATE)
     MAIN_WAREHOUSE = "Lager Stuttgart - B"
     B2B_CUSTOMERS_FILE = 'b2b_customers.csv'
     B2C_CUSTOMERS_FILE = 'b2c_customers.csv'
@@ -29,6 +40,13 @@ class Config:
     NUM_ORDERS_B2C_ONLINE = 0
     NUM_ORDERS_B2C_FILIALE = 0
 
+    # Sales cycles in flight at once per sales channel
+    CONCURRENCY = {
+        'B2B': SALES_CONCURRENCY_B2B,
+        'B2C Online': SALES_CONCURRENCY_B2C_ONLINE,
+        'B2C Filiale': SALES_CONCURRENCY_B2C_FILIALE
+    }
+
     # Markup factors for different customer groups
     B2B_MARKUP = 1.3  # 30% markup for B2B
     B2C_MARKUP = 1.5  # 50% markup for B2C
@@ -78,9 +96,9 @@ def generate_id(prefix: str) -> str:
     return f"{prefix}-{uuid.uuid4().hex[:8].upper()}"
 
 
-def random_date(start_date: datetime, end_date: datetime) -> datetime:
+def random_date(start_date: datetime, end_date: datetime, rng: random.Random = random) -> datetime:
     return start_date + timedelta(
-        seconds=random.randint(0, int((end_date - start_date).total_seconds()))
+        seconds=rng.randint(0, int((end_date - start_date).total_seconds()))
     )
 
 
@@ -116,9 +134,10 @@ def calculate_selling_rate(product: Dict, sales_channel: str) -> float:
 
 
 def save_api_payload(payload: Dict, prefix: str, identifier: str):
-    """Save API payload to JSON file with timestamp"""
+    """Save API payload to JSON file with timestamp and a unique suffix"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{prefix}_{identifier}_{timestamp}.json"
+    # Concurrent cycles save payloads for the same identifier within the same second
+    filename = f"{prefix}_{identifier}_{timestamp}_{uuid.uuid4().hex[:8]}.json"
     filepath = os.path.join(Config.JSON_DIR, filename)
 
     with open(filepath, 'w', encoding='utf-8') as f:
@@ -127,22 +146,30 @@ def save_api_payload(payload: Dict, prefix: str, identifier: str):
     logging.info(f"Saved {prefix} payload to {filepath}")
     return filepath
 
-def generate_sales_order(b2b_customers: List[Dict], products: List[Dict], sales_channel: str) -> Dict:
+
+async def asave_api_payload(payload: Dict, prefix: str, identifier: str):
+    """save_api_payload in the shared executor, the file write does not block the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), save_api_payload, payload, prefix, identifier)
+
+def generate_sales_order(b2b_customers: List[Dict], products: List[Dict], sales_channel: str,
+                         rng: random.Random = random, faker: Optional[Faker] = None) -> Dict:
     if sales_channel == 'B2B':
-        customer = random.choice(b2b_customers)
+        customer = rng.choice(b2b_customers)
     else:
-        customer = create_b2c_customer()
-        if not customer:
+        created = create_b2c_customer(faker)
+        if not created:
             raise ValueError("Failed to create new B2C customer.")
-        customer.update({"Customer Group": "B2C", "Territory": "Germany"})
+        # Orders refer to the customer by the name ERPNext assigned
+        customer = {"Customer Name": created['name'], "Customer Group": "B2C", "Territory": "Germany"}
 
-    order_date = random_date(Config.START_DATE, Config.END_DATE)
+    order_date = random_date(Config.START_DATE, Config.END_DATE, rng)
 
     order_items = []
     total_amount = 0.0
-    for _ in range(random.randint(1, 5)):  # 1 to 5 products per order
-        product = random.choice(products)
-        qty = random.randint(1, 10)
+    for _ in range(rng.randint(1, 5)):  # 1 to 5 products per order
+        product = rng.choice(products)
+        qty = rng.randint(1, 10)
         selling_rate = calculate_selling_rate(product, sales_channel)
         amount = round(qty * selling_rate, 2)
         total_amount += amount
@@ -153,7 +180,7 @@ def generate_sales_order(b2b_customers: List[Dict], products: List[Dict], sales_
             "qty": qty,
             "rate": selling_rate,
             "amount": amount,
-            "warehouse": Config.MAIN_WAREHOUSE if sales_channel != 'B2C Filiale' else f"Filiale {random.randint(1, 10)}"
+            "warehouse": Config.MAIN_WAREHOUSE if sales_channel != 'B2C Filiale' else f"Filiale {rng.randint(1, 10)}"
         })
 
     return {
@@ -173,9 +200,9 @@ def generate_sales_order(b2b_customers: List[Dict], products: List[Dict], sales_
     }
 
 
-def generate_delivery_note(sales_order: Dict) -> Dict:
+def generate_delivery_note(sales_order: Dict, rng: random.Random = random) -> Dict:
     so_date = datetime.strptime(sales_order['transaction_date'], "%Y-%m-%d")
-    delivery_date = so_date + timedelta(days=random.randint(*Config.DELIVERY_DELAY))
+    delivery_date = so_date + timedelta(days=rng.randint(*Config.DELIVERY_DELAY))
     return {
         "doctype": "Delivery Note",
         "naming_series": "DN-.YYYY.-",
@@ -189,9 +216,9 @@ def generate_delivery_note(sales_order: Dict) -> Dict:
     }
 
 
-def generate_sales_invoice(sales_order: Dict, delivery_note: Dict) -> Dict:
+def generate_sales_invoice(sales_order: Dict, delivery_note: Dict, rng: random.Random = random) -> Dict:
     dn_date = datetime.strptime(delivery_note['posting_date'], "%Y-%m-%d")
-    invoice_date = dn_date + timedelta(days=random.randint(*Config.INVOICE_DELAY))
+    invoice_date = dn_date + timedelta(days=rng.randint(*Config.INVOICE_DELAY))
     return {
         "doctype": "Sales Invoice",
         "naming_series": "INV-.YYYY.-",
@@ -209,9 +236,9 @@ def generate_sales_invoice(sales_order: Dict, delivery_note: Dict) -> Dict:
     }
 
 
-def generate_payment_entry(sales_invoice: Dict) -> Dict:
+def generate_payment_entry(sales_invoice: Dict, rng: random.Random = random) -> Dict:
     si_date = datetime.strptime(sales_invoice['posting_date'], "%Y-%m-%d")
-    payment_date = si_date + timedelta(days=random.randint(*Config.PAYMENT_DELAY))
+    payment_date = si_date + timedelta(days=rng.randint(*Config.PAYMENT_DELAY))
     return {
         "doctype": "Payment Entry",
         "naming_series": "PE-.YYYY.-",
@@ -235,39 +262,43 @@ def generate_payment_entry(sales_invoice: Dict) -> Dict:
     }
 
 
-def process_sales_cycle(sales_order: Dict, channel: str) -> bool:
-    """Process complete sales cycle with payload logging"""
+async def process_sales_cycle(sales_order: Dict, channel: str, rng: random.Random = random) -> bool:
+    """Process complete sales cycle with payload logging.
+
+    Each document is created only after the one it refers to exists, other
+    cycles run while this one waits for the API.
+    """
     try:
         # Save and create Sales Order
-        so_filepath = save_api_payload(sales_order, "sales_order", sales_order['customer'])
-        so_response = sales_order_api.create(sales_order)
+        so_filepath = await asave_api_payload(sales_order, "sales_order", sales_order['customer'])
+        so_response = await sales_order_api.acreate(sales_order)
 
         if so_response.get('data'):
             sales_order['name'] = so_response['data']['name']
             logging.info(f"Sales Order created: {sales_order['name']}")
 
             # Generate and save Delivery Note
-            delivery_note = generate_delivery_note(sales_order)
-            dn_filepath = save_api_payload(delivery_note, "delivery_note", sales_order['name'])
-            dn_response = delivery_note_api.create(delivery_note)
+            delivery_note = generate_delivery_note(sales_order, rng)
+            dn_filepath = await asave_api_payload(delivery_note, "delivery_note", sales_order['name'])
+            dn_response = await delivery_note_api.acreate(delivery_note)
 
             if dn_response.get('data'):
                 delivery_note['name'] = dn_response['data']['name']
                 logging.info(f"Delivery Note created: {delivery_note['name']}")
 
                 # Generate and save Invoice
-                sales_invoice = generate_sales_invoice(sales_order, delivery_note)
-                si_filepath = save_api_payload(sales_invoice, "sales_invoice", delivery_note['name'])
-                si_response = sales_invoice_api.create(sales_invoice)
+                sales_invoice = generate_sales_invoice(sales_order, delivery_note, rng)
+                si_filepath = await asave_api_payload(sales_invoice, "sales_invoice", delivery_note['name'])
+                si_response = await sales_invoice_api.acreate(sales_invoice)
 
                 if si_response.get('data'):
                     sales_invoice['name'] = si_response['data']['name']
                     logging.info(f"Invoice created: {sales_invoice['name']}")
 
                     # Generate and save Payment Entry
-                    payment_entry = generate_payment_entry(sales_invoice)
-                    pe_filepath = save_api_payload(payment_entry, "payment_entry", sales_invoice['name'])
-                    pe_response = payment_entry_api.create(payment_entry)
+                    payment_entry = generate_payment_entry(sales_invoice, rng)
+                    pe_filepath = await asave_api_payload(payment_entry, "payment_entry", sales_invoice['name'])
+                    pe_response = await payment_entry_api.acreate(payment_entry)
 
                     if pe_response.get('data'):
                         logging.info(f"Payment Entry created: {pe_response['data']['name']}")
@@ -292,34 +323,97 @@ def process_sales_cycle(sales_order: Dict, channel: str) -> bool:
         return False
 
 
-def main():
-    b2b_customers = load_b2b_customers()
-    products = load_products()
-    created_b2c_customers = []
+async def run_sales_channel(channel: str, num_orders: int, b2b_customers: List[Dict], products: List[Dict],
+                            streams: RandomStreams, created_b2c_customers: List[Dict]) -> int:
+    """Run the sales cycles of a channel, up to the channel's concurrency limit at once.
 
-    sales_channels = {
-        'B2B': Config.NUM_ORDERS_B2B,
-        'B2C Online': Config.NUM_ORDERS_B2C_ONLINE,
-        'B2C Filiale': Config.NUM_ORDERS_B2C_FILIALE
-    }
+    Returns the number of complete cycles.
+    """
+    concurrency = max(1, Config.CONCURRENCY.get(channel, 1))
+    # Shared by all workers, every order index is taken by exactly one of them
+    indexes = iter(range(num_orders))
+    completed = 0
 
-    for channel, num_orders in sales_channels.items():
-        logging.info(f"Generating {num_orders} orders for channel {channel}")
-        for _ in range(num_orders):
+    async def worker():
+        nonlocal completed
+        loop = asyncio.get_running_loop()
+        for index in indexes:
             try:
-                sales_order = generate_sales_order(b2b_customers, products, channel)
-                if channel != 'B2B':
-                    created_b2c_customers.append(sales_order['customer'])
-
-                process_sales_cycle(sales_order, channel)
-
+                order_streams = streams.child('sales', channel, index)
+                # B2C orders create their customer through the blocking API first
+                sales_order = await loop.run_in_executor(
+                    get_executor(),
+                    in_current_span(generate_sales_order, b2b_customers, products, channel,
+                                    order_streams.python('sales_order'), order_streams.faker('customer')))
             except ValueError as e:
                 logging.error(f"Error generating order for {channel}: {str(e)}")
                 continue
+            if channel != 'B2B':
+                created_b2c_customers.append({"Customer Name": sales_order['customer'],
+                                              "Customer Group": sales_order['customer_group'],
+                                              "Territory": sales_order['territory']})
+
+            if await process_sales_cycle(sales_order, channel, order_streams.python('follow_up')):
+                completed += 1
+
+    with get_metrics().span('stage', stage=channel):
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, num_orders))))
+    return completed
+
+
+async def run_sales_channels(sales_channels: Dict[str, int], b2b_customers: List[Dict], products: List[Dict],
+                             streams: RandomStreams, created_b2c_customers: List[Dict]) -> Dict[str, int]:
+    """Run all channels at once, return the number of complete cycles per channel."""
+    for channel, num_orders in sales_channels.items():
+        logging.info(f"Generating {num_orders} orders for channel {channel} "
+                     f"({max(1, Config.CONCURRENCY.get(channel, 1))} at once)")
+    completed = await asyncio.gather(*(
+        run_sales_channel(channel, num_orders, b2b_customers, products, streams, created_b2c_customers)
+        for channel, num_orders in sales_channels.items()
+    ))
+    return dict(zip(sales_channels, completed))
+
+
+def run_sales_process(sales_channels: Optional[Dict[str, int]] = None):
+    b2b_customers = load_b2b_customers()
+    products = load_products()
+    created_b2c_customers = []
+
+    if sales_channels is None:
+        sales_channels = {
+            'B2B': Config.NUM_ORDERS_B2B,
+            'B2C Online': Config.NUM_ORDERS_B2C_ONLINE,
+            'B2C Filiale': Config.NUM_ORDERS_B2C_FILIALE
+        }
+
+    # Each order draws from its own stream, independent of the order it is processed in
+    streams = get_random_streams()
+    logging.info(f"Random seed: {streams.seed}, order dates {Config.START_DATE:%Y-%m-%d} to {Config.END_DATE:%Y-%m-%d}")
+
+    completed = asyncio.run(run_sales_channels(sales_channels, b2b_customers, products, streams,
+                                               created_b2c_customers))
+    for channel, num_orders in sales_channels.items():
+        logging.info(f"{channel}: {completed[channel]} of {num_orders} sales cycles completed")
 
     save_b2c_customers(created_b2c_customers)
     logging.info("Sales process completed.")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Generate sales cycles in ERPNext")
+    parser.add_argument('--b2b-orders', type=int, default=Config.NUM_ORDERS_B2B)
+    parser.add_argument('--b2c-online-orders', type=int, default=Config.NUM_ORDERS_B2C_ONLINE)
+    parser.add_argument('--b2c-filiale-orders', type=int, default=Config.NUM_ORDERS_B2C_FILIALE)
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiled('sales', enabled=args.profile):
+        run_sales_process({
+            'B2B': args.b2b_orders,
+            'B2C Online': args.b2c_online_orders,
+            'B2C Filiale': args.b2c_filiale_orders
+        })
+
+
 if __name__ == "__main__":
     main()
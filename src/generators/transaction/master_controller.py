@@ -1,9 +1,14 @@
 # src/generators/transaction/Beschaffungsprozess/batch/master_controller.py
 
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextvars import copy_context
 from datetime import datetime, timedelta
+from functools import partial
+from itertools import islice
 import calendar
-from typing import Dict, List, Optional
-import logging
+import queue
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -13,7 +18,30 @@ from src.generators.transaction.Beschaffungsprozess.batch.create_batch_purchase_
 from src.generators.transaction.Beschaffungsprozess.batch.create_batch_purchase_invoice import \
     BatchPurchaseInvoiceGenerator
 from src.generators.transaction.Beschaffungsprozess.batch.create_batch_payment_entry import BatchPaymentEntryGenerator
-from src.config.settings import OUTPUT_DIR
+from src.generators.transaction.Beschaffungsprozess.batch.procurement_records import ProcurementRecord
+from src.api.natural_keys import find_existing
+from src.config.settings import METRICS_DIR, OUTPUT_DIR, PRODUCTION_PLAN_UNITS
+from src.core.checkpoint import CheckpointJournal, JournalState
+from src.core.csv_sink import CsvSink
+from src.core.logging import LogContext, flush_logging, set_log_context
+from src.core.metrics import get_metrics
+from src.core.mrp import MrpEngine
+from src.core.profiling import add_profile_argument, profiled
+from src.core.rng import RandomStreams, get_random_streams, set_random_seed
+
+DEFAULT_BATCH_SIZE = 50  # Documents uploaded together per pipeline stage
+DEFAULT_QUEUE_SIZE = 500  # Documents buffered between two pipeline stages
+
+# Marks the end of a stage's output in the queue to the next stage
+_END_OF_STAGE = object()
+
+# Pipeline stages in process order and the generator creating their documents
+STAGE_GENERATORS = {
+    'purchase_orders': BatchPurchaseOrderGenerator,
+    'purchase_receipts': BatchPurchaseReceiptGenerator,
+    'purchase_invoices': BatchPurchaseInvoiceGenerator,
+    'payment_entries': BatchPaymentEntryGenerator,
+}
 
 
 @dataclass
@@ -23,33 +51,33 @@ class ProcessConfig:
     end_date: datetime
     total_orders: int
     batch_size: Optional[int] = None
+    queue_size: int = DEFAULT_QUEUE_SIZE
+    max_workers: int = 1  # Months processed concurrently
+    # Finished units per month and item, default PRODUCTION_PLAN_UNITS of every item with a BOM if set
+    production_plan: Optional[Dict[str, float]] = None
 
 
 class ProcurementMasterController:
     """Master controller for orchestrating the procurement process."""
 
-    def __init__(self):
-        self.logger = logging.getLogger('ProcurementMasterController')
-        self._initialize_logging()
-
-    def _initialize_logging(self):
-        """Initialize logging configuration"""
-        self.logger.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-        # Console Handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-
-        # File Handler
-        log_dir = OUTPUT_DIR / 'logs' / 'master_controller'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(
-            log_dir / f'master_controller_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
-        )
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+    def __init__(self, journal: Optional[CheckpointJournal] = None,
+                 random_streams: Optional[RandomStreams] = None,
+                 log_context: Optional[LogContext] = None):
+        # One log file per stage for the whole run, shared by the generators of all months
+        self.log_context = log_context or LogContext('procurement')
+        self.logger = self.log_context.get_logger('ProcurementMasterController')
+
+        # Every month and stage draws from its own stream, so results do not depend on max_workers
+        self.random_streams = random_streams or get_random_streams()
+
+        # Progress journal, open while run_procurement_process is running
+        self.journal = journal or CheckpointJournal()
+        self._journal_active = False
+
+        # Per-month outcome of the last run, keyed by "YYYY-MM"
+        self.month_results: Dict[str, bool] = {}
+        # Stage -> CSV file of the running run, shared by the generators of all months
+        self._csv_sinks: Dict[str, CsvSink] = {}
 
     def distribute_orders_by_month(self, config: ProcessConfig) -> Dict[str, int]:
         """Distribute total orders across months based on date range."""
@@ -78,6 +106,23 @@ class ProcurementMasterController:
 
         return orders_per_month
 
+    def production_plan(self, config: ProcessConfig) -> Dict[str, float]:
+        """Finished units per month and item of the run, empty if it orders fixed quantities."""
+        if config.production_plan is not None:
+            return dict(config.production_plan)
+        if not PRODUCTION_PLAN_UNITS:
+            return {}
+        return {item: PRODUCTION_PLAN_UNITS for item in MrpEngine().items}
+
+    def plan_demand(self, plan: Dict[str, float]) -> Optional[Dict[str, float]]:
+        """Monthly component demand of a production plan, None if nothing is planned."""
+        if not any(plan.values()):
+            return None
+        demand = MrpEngine().demand_by_component(plan)
+        self.logger.info(f"Production plan of {sum(plan.values()):g} units per month needs "
+                         f"{sum(demand.values()):g} units of {len(demand)} components")
+        return demand
+
     def _calculate_months_between_dates(self, start_date: datetime, end_date: datetime) -> int:
         """Calculate number of months between two dates."""
         return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
@@ -89,60 +134,211 @@ class ProcurementMasterController:
         end_date = datetime(year, month, last_day, 23, 59, 59)
         return start_date, end_date
 
-    def process_month(self, year: int, month: int, num_orders: int) -> bool:
-        """Process all procurement documents for a specific month."""
-        start_date, end_date = self._get_month_date_range(year, month)
-
-        self.logger.info(f"Starting procurement process for {year}-{month:02d} "
-                         f"with {num_orders} orders")
-
+    @staticmethod
+    def _submit_traced(executor: ThreadPoolExecutor, stage: str, fn, *args, **kwargs) -> Future:
+        """Run fn on executor inside a span of stage, as a child of the caller's current span."""
+        def run():
+            with get_metrics().span('stage', stage=stage):
+                return fn(*args, **kwargs)
+
+        return executor.submit(copy_context().run, run)
+
+    @staticmethod
+    def _next_batch(inbox: queue.Queue, batch_size: int) -> Tuple[List[ProcurementRecord], bool]:
+        """Wait for the next document, then take what else is ready up to batch_size.
+
+        Returns the batch and whether the upstream stage has finished.
+        """
+        batch = []
+        document = inbox.get()
+        while document is not _END_OF_STAGE:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                return batch, False
+            try:
+                document = inbox.get_nowait()
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _upload_and_forward(self, generator, batch: List, outbox: Optional[queue.Queue]):
+        """Upload a batch with the stage's generator and pass on the records of the created documents.
+
+        The generator journals the created documents itself, see process_month.
+        """
         try:
-            # 1. Generate Purchase Orders
-            po_generator = BatchPurchaseOrderGenerator()
-            po_generator.configure(start_date, end_date, num_orders)
-
-            if not po_generator.process():
-                self.logger.error(f"Failed to generate purchase orders for {year}-{month:02d}")
-                return False
-
-            purchase_orders = po_generator.get_successful_orders()
-            self.logger.info(f"Successfully generated {len(purchase_orders)} purchase orders")
+            with get_metrics().span('batch', documents=len(batch)):
+                created = generator.upload_batch(batch)
+        except Exception as e:
+            self.logger.error(f"{generator.__class__.__name__} failed for a batch of {len(batch)} documents: {str(e)}")
+            return
 
-            # 2. Generate Purchase Receipts based on Purchase Orders
-            if purchase_orders:
-                pr_generator = BatchPurchaseReceiptGenerator()
-                pr_generator.configure(start_date, end_date, purchase_orders)
+        if outbox is not None:
+            for document in created:
+                outbox.put(document)
 
-                if not pr_generator.process():
-                    self.logger.error(f"Failed to generate purchase receipts for {year}-{month:02d}")
-                    return False
+    def _run_source_stage(self, generator: BatchPurchaseOrderGenerator, outbox: queue.Queue, batch_size: int,
+                          pending: List[ProcurementRecord]):
+        """Generate and upload purchase orders, streaming created orders to the next stage.
 
-                purchase_receipts = pr_generator.get_successful_receipts()
-                self.logger.info(f"Successfully generated {len(purchase_receipts)} purchase receipts")
+        pending holds orders restored from the journal that still need a receipt.
+        """
+        try:
+            for document in pending:
+                outbox.put(document)
+
+            if generator.num_orders <= 0:
+                return
+
+            documents = generator.generate_documents()
+            while True:
+                with get_metrics().span('generate') as span:
+                    batch = list(islice(documents, batch_size))
+                    span.set(documents=len(batch))
+                if not batch:
+                    break
+                self._upload_and_forward(generator, batch, outbox)
+        except Exception as e:
+            self.logger.error(f"Error generating purchase orders: {str(e)}")
+        finally:
+            outbox.put(_END_OF_STAGE)
 
-                # 3. Generate Purchase Invoices based on Purchase Receipts
-                if purchase_receipts:
-                    pi_generator = BatchPurchaseInvoiceGenerator()
-                    pi_generator.configure(start_date, end_date, purchase_receipts)
+    def _run_stage(self, generator, inbox: queue.Queue, outbox: Optional[queue.Queue], batch_size: int,
+                   pending: List[ProcurementRecord]):
+        """Create follow-up documents for everything arriving in inbox until the upstream stage ends.
 
-                    if not pi_generator.process():
-                        self.logger.error(f"Failed to generate purchase invoices for {year}-{month:02d}")
-                        return False
+        pending holds documents of this stage restored from the journal that
+        still need a follow-up document.
+        """
+        try:
+            if outbox is not None:
+                for document in pending:
+                    outbox.put(document)
+
+            finished = False
+            while not finished:
+                batch, finished = self._next_batch(inbox, batch_size)
+                if batch:
+                    self._upload_and_forward(generator, batch, outbox)
+        finally:
+            if outbox is not None:
+                outbox.put(_END_OF_STAGE)
+
+    def process_month(self, year: int, month: int, num_orders: int,
+                      batch_size: int = DEFAULT_BATCH_SIZE, queue_size: int = DEFAULT_QUEUE_SIZE,
+                      resume_state: Optional[JournalState] = None,
+                      demand: Optional[Dict[str, float]] = None) -> bool:
+        """Process all procurement documents for a specific month.
+
+        Orders, receipts, invoices and payments are created by four concurrent
+        stages connected through bounded queues, so every purchase order is
+        handed to receipt creation as soon as it exists instead of waiting for
+        the whole month. With resume_state, documents already created in an
+        earlier run are reused and only the missing ones are created. Created
+        documents are journaled and written to the CSV files of the running run
+        as they are confirmed; only compact records of them are passed between
+        the stages and kept for the month's results. The month's purchase
+        orders cover demand, less what the restored orders already ordered.
+        """
+        start_date, end_date = self._get_month_date_range(year, month)
+        month_key = f"{year}-{month:02d}"
+
+        # Documents created by an interrupted earlier run
+        resume_state = resume_state or JournalState()
+        restored = {stage: resume_state.get_documents(month_key, stage) for stage in STAGE_GENERATORS}
+        orders, receipts, invoices, payments = ([generator.record(document) for document in restored[stage]]
+                                                for stage, generator in STAGE_GENERATORS.items())
+
+        received = {receipt.reference for receipt in receipts}
+        invoiced = {invoice.reference for invoice in invoices}
+        paid = {payment.reference for payment in payments}
+        pending_orders = [order for order in orders if order.name not in received]
+        pending_receipts = [receipt for receipt in receipts if receipt.name not in invoiced]
+        pending_invoices = [invoice for invoice in invoices if invoice.name not in paid]
+        if demand:
+            ordered: Dict[str, float] = {}
+            for order in orders:
+                for item in order.items:
+                    ordered[item.item_code] = ordered.get(item.item_code, 0.0) + item.qty
+            demand = {item_code: qty - ordered.get(item_code, 0.0) for item_code, qty in demand.items()
+                      if qty > ordered.get(item_code, 0.0)}
 
-                    purchase_invoices = pi_generator.get_successful_invoices()
-                    self.logger.info(f"Successfully generated {len(purchase_invoices)} purchase invoices")
+        self.logger.info(f"Starting procurement process for {year}-{month:02d} "
+                         f"with {num_orders} orders")
+        if orders:
+            self.logger.info(f"Resuming {year}-{month:02d}: {len(orders)} orders, {len(receipts)} receipts, "
+                             f"{len(invoices)} invoices and {len(payments)} payments already created")
 
-                    # 4. Generate Payment Entries based on Purchase Invoices
-                    if purchase_invoices:
-                        pe_generator = BatchPaymentEntryGenerator()
-                        pe_generator.configure(start_date, end_date, purchase_invoices)
+        try:
+            po_generator = BatchPurchaseOrderGenerator(self.log_context)
+            po_generator.configure(start_date, end_date, max(0, num_orders - len(orders)), demand=demand)
+            pr_generator = BatchPurchaseReceiptGenerator(self.log_context)
+            pr_generator.configure(start_date, end_date, [])
+            pi_generator = BatchPurchaseInvoiceGenerator(self.log_context)
+            pi_generator.configure(start_date, end_date, [])
+            pe_generator = BatchPaymentEntryGenerator(self.log_context)
+            pe_generator.configure(start_date, end_date, [])
+
+            month_streams = self.random_streams.child('procurement', month_key)
+            po_generator.rng = month_streams.numpy('purchase_orders')
+            pr_generator.rng = month_streams.python('purchase_receipts')
+            pi_generator.rng = month_streams.python('purchase_invoices')
+            pe_generator.rng = month_streams.python('payment_entries')
+
+            # Restored documents count towards the month's results and CSV files
+            po_generator.successful_orders.extend(orders)
+            pr_generator.successful_receipts.extend(receipts)
+            pi_generator.successful_invoices.extend(invoices)
+            pe_generator.successful_payments.extend(payments)
+            for stage, generator in (('purchase_orders', po_generator), ('purchase_receipts', pr_generator),
+                                     ('purchase_invoices', pi_generator), ('payment_entries', pe_generator)):
+                generator.csv_sink = self._csv_sinks.get(stage)
+                if self._journal_active:
+                    generator.intent = partial(self.journal.record_intent, month_key, stage)
+                    generator.journal = partial(self.journal.record_documents, month_key, stage)
+                self._write_csv_rows(stage, restored[stage])
+
+            order_queue = queue.Queue(maxsize=queue_size)
+            receipt_queue = queue.Queue(maxsize=queue_size)
+            invoice_queue = queue.Queue(maxsize=queue_size)
+
+            with ThreadPoolExecutor(max_workers=4, thread_name_prefix=f'procurement-{year}-{month:02d}') as executor:
+                stages = [
+                    self._submit_traced(executor, 'purchase_orders', self._run_source_stage, po_generator,
+                                        order_queue, batch_size, pending_orders),
+                    self._submit_traced(executor, 'purchase_receipts', self._run_stage, pr_generator, order_queue,
+                                        receipt_queue, batch_size, pending_receipts),
+                    self._submit_traced(executor, 'purchase_invoices', self._run_stage, pi_generator, receipt_queue,
+                                        invoice_queue, batch_size, pending_invoices),
+                    self._submit_traced(executor, 'payment_entries', self._run_stage, pe_generator, invoice_queue,
+                                        None, batch_size, []),
+                ]
+                for stage in stages:
+                    stage.result()
+
+            results = [
+                ("purchase orders", po_generator.get_successful_orders()),
+                ("purchase receipts", pr_generator.get_successful_receipts()),
+                ("purchase invoices", pi_generator.get_successful_invoices()),
+                ("payment entries", pe_generator.get_successful_payments()),
+            ]
+            upstream_count = None
+            complete = True
+            for label, documents in results:
+                # Follow-up documents are only expected if the previous stage created any
+                if upstream_count == 0:
+                    break
+                if not documents:
+                    self.logger.error(f"Failed to generate {label} for {year}-{month:02d}")
+                    return False
 
-                        if not pe_generator.process():
-                            self.logger.error(f"Failed to generate payment entries for {year}-{month:02d}")
-                            return False
+                self.logger.info(f"Successfully generated {len(documents)} {label}")
+                complete = complete and (upstream_count is None or len(documents) == upstream_count)
+                upstream_count = len(documents)
 
-                        payment_entries = pe_generator.get_successful_payments()
-                        self.logger.info(f"Successfully generated {len(payment_entries)} payment entries")
+            # A month with missing follow-up documents is picked up again on resume
+            if self._journal_active:
+                self.journal.record_month(month_key, complete)
 
             self.logger.info(f"Successfully completed procurement process for {year}-{month:02d}")
             return True
@@ -151,22 +347,145 @@ class ProcurementMasterController:
             self.logger.error(f"Error processing month {year}-{month:02d}: {str(e)}")
             return False
 
-    def run_procurement_process(self, config: ProcessConfig) -> bool:
-        """Main method to run the complete procurement process."""
+    def _reconcile_intents(self, resume_state: JournalState):
+        """Settle the intents an interrupted run left open by looking their documents up in ERPNext.
+
+        Their documents may have been created without being journaled. Those
+        found by natural key are journaled and restored as created, the others
+        were not created and are generated again like any missing document.
+        """
+        known = {document['name'] for stages in resume_state.documents.values()
+                 for documents in stages.values() for document in documents}
+        generators = {}
+        found_count = missing_count = 0
+        for intent, pending in list(resume_state.intents.items()):
+            month_key, stage = pending['month'], pending['stage']
+            generator = generators.get(stage)
+            if generator is None:
+                generator = generators[stage] = STAGE_GENERATORS[stage](self.log_context)
+
+            payloads = pending['documents']
+            names = find_existing(generator.api, payloads, exclude=known)
+            found = [(payload, name) for payload, name in zip(payloads, names) if name]
+            contents = generator.api.fetch_contents([name for _, name in found]) if found else []
+            restored = []
+            for (payload, _), content in zip(found, contents):
+                generator.apply_content(payload, content)
+                restored.append(payload)
+            known.update(name for _, name in found)
+
+            self.journal.record_documents(month_key, stage, restored, intent=intent)
+            resume_state.documents.setdefault(month_key, {}).setdefault(stage, []).extend(restored)
+            del resume_state.intents[intent]
+            found_count += len(restored)
+            missing_count += len(payloads) - len(restored)
+
+        self.logger.info(f"Reconciled documents in flight when the run stopped: {found_count} were created, "
+                         f"{missing_count} were not")
+
+    def _write_csv_rows(self, stage: str, documents: List[Dict]):
+        """Write documents restored from the journal to the run's CSV file of stage."""
+        sink = self._csv_sinks.get(stage)
+        if sink is not None and documents:
+            sink.write_rows(row for document in documents for row in STAGE_GENERATORS[stage].csv_rows(document))
+
+    def _process_month_traced(self, year: int, month: int, *args, **kwargs) -> bool:
+        month_key = f"{year}-{month:02d}"
+        with get_metrics().span('month', month=month_key) as span:
+            success = self.process_month(year, month, *args, **kwargs)
+            span.set(success=success)
+            return success
+
+    def run_procurement_process(self, config: ProcessConfig, resume: bool = False) -> bool:
+        """Main method to run the complete procurement process.
+
+        Progress is journaled while running. With resume, months completed by an
+        earlier run of the same configuration are skipped and interrupted months
+        continue from the documents already created.
+        """
+        # API endpoints created during the run log into the run's context as well
+        previous_log_context = set_log_context(self.log_context)
+        metrics = get_metrics()
+        try:
+            with metrics.span('procurement', total_orders=config.total_orders):
+                return self._run_procurement_process(config, resume)
+        finally:
+            set_log_context(previous_log_context)
+            # Prometheus text and OTLP/JSON spans of everything measured in this process so far
+            prom_path, trace_path = metrics.export(METRICS_DIR, f"procurement_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            self.logger.info(f"Metrics written to {prom_path}, traces to {trace_path}")
+            flush_logging()
+
+    def _run_procurement_process(self, config: ProcessConfig, resume: bool) -> bool:
         self.logger.info(f"Starting procurement process for period: "
                          f"{config.start_date.date()} to {config.end_date.date()}")
-
+        self.logger.info(f"Random seed: {self.random_streams.seed}")
+        self.logger.info(f"Logging to {self.log_context.log_dir}")
+
+        # The effective plan is part of the configuration, so a resume cannot silently change the demand
+        production_plan = self.production_plan(config)
+        run_config = {
+            "start_date": config.start_date.isoformat(),
+            "end_date": config.end_date.isoformat(),
+            "total_orders": config.total_orders,
+            "production_plan": production_plan
+        }
+        resume_state = JournalState()
+        if resume:
+            resume_state = self.journal.load()
+            if resume_state.config and resume_state.config != run_config:
+                self.logger.error(f"Cannot resume: journal {self.journal.path} belongs to a run with "
+                                  f"configuration {resume_state.config}")
+                return False
+            self.logger.info(f"Resuming from {self.journal.path}: "
+                             f"{len(resume_state.completed_months)} months already completed")
+
+        self.journal.open(resume=resume)
+        self._journal_active = True
+        # Created documents are streamed to the CSV files, which are published when the run ends
+        self._csv_sinks = {stage: CsvSink(OUTPUT_DIR / generator.CSV_FILENAME)
+                           for stage, generator in STAGE_GENERATORS.items()}
         try:
-            # Distribute orders across months
-            monthly_distribution = self.distribute_orders_by_month(config)
-
-            success_count = 0
-            # Process each month sequentially
-            for month_key, num_orders in monthly_distribution.items():
-                year, month = map(int, month_key.split('-'))
-                if self.process_month(year, month, num_orders):
-                    success_count += 1
+            if not resume_state.config:
+                self.journal.record_run(run_config)
+            if resume_state.intents:
+                self._reconcile_intents(resume_state)
 
+            # Distribute orders across months, each month orders the plan's component demand
+            monthly_distribution = self.distribute_orders_by_month(config)
+            demand = self.plan_demand(production_plan)
+
+            self.month_results = {}
+            # Months are independent, process up to max_workers of them concurrently.
+            # The total number of API calls in flight is capped globally by the API layer.
+            with ThreadPoolExecutor(max_workers=max(1, config.max_workers),
+                                    thread_name_prefix='procurement-month') as executor:
+                futures = {}
+                for month_key, num_orders in monthly_distribution.items():
+                    if month_key in resume_state.completed_months:
+                        self.logger.info(f"Skipping {month_key}, already completed")
+                        self.month_results[month_key] = True
+                        for stage in STAGE_GENERATORS:
+                            self._write_csv_rows(stage, resume_state.get_documents(month_key, stage))
+                        continue
+
+                    year, month = map(int, month_key.split('-'))
+                    # Copying the context makes the month's span a child of the run's span
+                    future = executor.submit(copy_context().run, self._process_month_traced,
+                                             year, month, num_orders,
+                                             batch_size=config.batch_size or DEFAULT_BATCH_SIZE,
+                                             queue_size=config.queue_size,
+                                             resume_state=resume_state, demand=demand)
+                    futures[future] = month_key
+
+                for future in as_completed(futures):
+                    self.month_results[futures[future]] = future.result()
+
+            for month_key in sorted(self.month_results):
+                status = "successful" if self.month_results[month_key] else "failed"
+                self.logger.info(f"Month {month_key}: {status}")
+
+            success_count = sum(self.month_results.values())
             total_months = len(monthly_distribution)
             self.logger.info(f"Completed procurement process: {success_count}/{total_months} months successful")
 
@@ -176,9 +495,29 @@ class ProcurementMasterController:
             self.logger.error(f"Procurement process failed: {str(e)}")
             return False
 
+        finally:
+            self._journal_active = False
+            self.journal.close()
+            for sink in self._csv_sinks.values():
+                path = sink.close()
+                if path:
+                    self.logger.info(f"Saved {sink.rows} records to {path.name}")
+            self._csv_sinks = {}
+
 
 def main():
     """Example usage of the procurement master controller."""
+    parser = argparse.ArgumentParser(description="Generate procurement documents in ERPNext")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted run from its checkpoint journal")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="master seed for reproducible data (default: ERP_RANDOM_SEED or a fresh seed)")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        set_random_seed(args.seed)
+
     # Configure process parameters
     config = ProcessConfig(
         start_date=datetime(2023, 1, 1),
@@ -188,7 +527,8 @@ def main():
 
     # Initialize and run controller
     controller = ProcurementMasterController()
-    success = controller.run_procurement_process(config)
+    with profiled('procurement', enabled=args.profile):
+        success = controller.run_procurement_process(config, resume=args.resume)
 
     print(f"Procurement process {'completed successfully' if success else 'failed'}")
 
@@ -0,0 +1,26 @@
+import os
+
+# Tests talk to a local mock server, no need to pace requests
+os.environ.setdefault('ERP_API_RATE_LIMIT', '0')
+
+import pytest
+
+from src.api.mock_server import MockERPNextServer
+
+
+@pytest.fixture
+def mock_server():
+    """Mock ERPNext on a free local port, without latency or injected failures."""
+    server = MockERPNextServer(host='127.0.0.1', port=0, latency=0, latency_jitter=0,
+                               error_rate=0, throttle_rate=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def connect(mock_server):
+    """Point an API endpoint at the mock server."""
+    def connect(api):
+        api.base_url = mock_server.url
+        return api
+    return connect
@@ -0,0 +1,70 @@
+import pytest
+
+from src.api.endpoints.purchase_order_api import PurchaseOrderAPI
+from src.core.metrics import get_metrics
+
+
+def purchase_order(supplier, qty=1):
+    return {
+        "doctype": "Purchase Order",
+        "naming_series": "PUR-ORD-.YYYY.-",
+        "transaction_date": "2023-01-05",
+        "supplier": supplier,
+        "items": [{"item_code": "COMP-0001", "qty": qty}, {"item_code": "COMP-0002", "qty": 2 * qty}],
+    }
+
+
+def test_create_many_resolves_names_and_child_rows(mock_server, connect):
+    api = connect(PurchaseOrderAPI())
+    results = api.create_many([purchase_order(f"SUP-{i}", i + 1) for i in range(5)])
+
+    stored = mock_server.store.documents["Purchase Order"]
+    assert [result["name"] for result in results] == list(stored)
+    for result in results:
+        rows = stored[result["name"]]["items"]
+        assert result["items"] == [{"name": row["name"], "idx": row["idx"]} for row in rows]
+
+
+def test_get_list_of_child_table_sends_parent(mock_server, connect):
+    api = connect(PurchaseOrderAPI())
+    name = api.create(purchase_order("SUP-1"))["data"]["name"]
+
+    rows = api._get_list("Purchase Order Item", ["parent", "item_code"], [["parent", "=", name]],
+                         parent_doctype="Purchase Order")
+    assert rows == [{"parent": name, "item_code": "COMP-0001"}, {"parent": name, "item_code": "COMP-0002"}]
+
+
+def test_mock_requires_parent_for_child_tables(mock_server):
+    store = mock_server.store
+    store.insert("Purchase Order", purchase_order("SUP-1"))
+
+    with pytest.raises(ValueError):
+        store.get_list("Purchase Order Item", ["name"], [])
+    assert len(store.get_list("Purchase Order Item", ["name"], [], parent="Purchase Order")) == 2
+    assert store.get_list("Purchase Order Item", ["name"], [], parent="Purchase Receipt") == []
+
+
+def test_get_counts_documents_under_one_endpoint_label(mock_server, connect):
+    api = connect(PurchaseOrderAPI())
+    names = [api.create(purchase_order(f"SUP-{i}"))["data"]["name"] for i in range(3)]
+    metrics = get_metrics()
+    metrics.reset()
+
+    for name in names:
+        assert api.get(name)["data"]["name"] == name
+    endpoints = {dict(labels)["endpoint"] for labels in metrics._counters["erpnext_requests_total"]}
+    assert endpoints == {"Purchase Order/{name}"}
+
+
+def test_unencodable_payload_is_logged_and_counted(mock_server, connect, monkeypatch):
+    api = connect(PurchaseOrderAPI())
+    failures = []
+    monkeypatch.setattr(api, 'save_failed_api_payload', lambda **kwargs: failures.append(kwargs))
+    metrics = get_metrics()
+    metrics.reset()
+
+    with pytest.raises(ValueError):
+        api.create({**purchase_order("SUP-1"), "grand_total": float("nan")})
+    assert [failure["endpoint"] for failure in failures] == ["Purchase Order"]
+    assert [dict(labels)["status"] for labels in metrics._counters["erpnext_requests_total"]] == ["error"]
+    assert "Purchase Order" not in mock_server.store.documents
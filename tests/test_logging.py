@@ -0,0 +1,25 @@
+import threading
+
+from src.core.logging import LogContext
+
+
+def test_contexts_with_the_same_stage_write_to_their_own_files(tmp_path):
+    contexts = [LogContext(log_dir=tmp_path / f"month_{i}") for i in range(2)]
+
+    def log(i):
+        logger = contexts[i].get_logger('purchase_orders', console=False)
+        for n in range(200):
+            logger.info(f"month {i} line {n}")
+
+    threads = [threading.Thread(target=log, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for context in contexts:
+        context.close()
+
+    for i in range(2):
+        lines = (tmp_path / f"month_{i}" / 'purchase_orders.log').read_text().splitlines()
+        assert len(lines) == 200
+        assert all(f"month {i} line" in line for line in lines)
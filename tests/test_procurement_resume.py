@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import src.api.base_api as base_api
+import src.generators.transaction.master_controller as master_controller
+from src.core.checkpoint import CheckpointJournal
+from src.core.logging import LogContext
+
+
+@pytest.fixture
+def controller(mock_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(base_api, 'BASE_URL', mock_server.url)
+    monkeypatch.setattr(master_controller, 'OUTPUT_DIR', tmp_path)
+    monkeypatch.setattr(master_controller, 'METRICS_DIR', tmp_path / 'metrics')
+    monkeypatch.setattr(master_controller, 'PRODUCTION_PLAN_UNITS', 0)
+
+    def controller():
+        return master_controller.ProcurementMasterController(
+            journal=CheckpointJournal(tmp_path / 'journal.jsonl'),
+            log_context=LogContext(log_dir=tmp_path / 'logs'))
+    return controller
+
+
+def config():
+    return master_controller.ProcessConfig(datetime(2023, 1, 1), datetime(2023, 1, 31), 12, batch_size=4,
+                                           max_workers=1)
+
+
+def test_resume_does_not_repost_documents_in_flight(controller, mock_server, tmp_path):
+    assert controller().run_procurement_process(config())
+    documents = mock_server.store.documents
+    created = {doctype: len(documents[doctype]) for doctype in documents}
+
+    # As if the run died while the last batch of orders was being posted: the
+    # orders exist on the server, but the journal only holds their intent
+    journal = tmp_path / 'journal.jsonl'
+    entries = [json.loads(line) for line in journal.read_text().splitlines()]
+    last = [entry for entry in entries if entry['event'] == 'intent' and entry['stage'] == 'purchase_orders'][-1]
+    in_flight = {(document['supplier'], document['transaction_date']) for document in last['documents']}
+    kept = [entry for entry in entries
+            if entry['event'] != 'month_completed'
+            and not (entry['event'] == 'settled' and entry['intent'] == last['intent'])
+            and not (entry['event'] == 'document' and entry['stage'] == 'purchase_orders'
+                     and (entry['document']['supplier'], entry['document']['transaction_date']) in in_flight)]
+    journal.write_text(''.join(json.dumps(entry) + '\n' for entry in kept))
+
+    assert controller().run_procurement_process(config(), resume=True)
+    assert {doctype: len(documents[doctype]) for doctype in documents} == created
+
+    state = CheckpointJournal(journal).load()
+    assert not state.intents
+    assert len(state.get_documents('2023-01', 'purchase_orders')) == created['Purchase Order']
+
+
+def test_resume_posts_documents_that_were_not_created(controller, mock_server, tmp_path):
+    journal = CheckpointJournal(tmp_path / 'journal.jsonl')
+    journal.open()
+    run_config = {"start_date": config().start_date.isoformat(), "end_date": config().end_date.isoformat(),
+                  "total_orders": 12, "production_plan": {}}
+    journal.record_run(run_config)
+    # An intent whose documents never reached the server
+    journal.record_intent('2023-01', 'purchase_orders', [{
+        "doctype": "Purchase Order", "supplier": "SUP-NONE", "transaction_date": "2023-01-02",
+        "items": [{"item_code": "COMP-0001", "qty": 1}]}])
+    journal.close()
+
+    assert controller().run_procurement_process(config(), resume=True)
+    assert len(mock_server.store.documents["Purchase Order"]) == 12
+    assert not CheckpointJournal(tmp_path / 'journal.jsonl').load().intents
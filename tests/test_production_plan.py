@@ -0,0 +1,83 @@
+import csv
+import math
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import src.api.base_api as base_api
+import src.generators.transaction.master_controller as master_controller
+from src.config.settings import MASTER_DATA_DIR
+from src.core.checkpoint import CheckpointJournal
+from src.core.logging import LogContext
+from src.generators.transaction.Beschaffungsprozess.batch.create_batch_purchase_order import (
+    BatchPurchaseOrderGenerator
+)
+from src.generators.transaction.Beschaffungsprozess.batch.purchase_order_engine import DEFAULT_QUANTITY
+
+UNITS = 3
+
+
+@pytest.fixture
+def controller(mock_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(base_api, 'BASE_URL', mock_server.url)
+    monkeypatch.setattr(master_controller, 'OUTPUT_DIR', tmp_path)
+    monkeypatch.setattr(master_controller, 'METRICS_DIR', tmp_path / 'metrics')
+    monkeypatch.setattr(master_controller, 'PRODUCTION_PLAN_UNITS', UNITS)
+    return master_controller.ProcurementMasterController(
+        journal=CheckpointJournal(tmp_path / 'journal.jsonl'), log_context=LogContext(log_dir=tmp_path / 'logs'))
+
+
+def config():
+    return master_controller.ProcessConfig(datetime(2023, 1, 1), datetime(2023, 1, 31), 60, batch_size=20,
+                                           max_workers=1)
+
+
+def shipped_demand(units):
+    """Component demand of units of every item, summed straight from the shipped BOM files."""
+    demand = {}
+    for path in sorted((MASTER_DATA_DIR / 'manufacturing').glob('bom_*.csv')):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = [{key.strip(): value.strip() for key, value in row.items()} for row in csv.DictReader(f)]
+        quantity = float(rows[0]['Quantity'])
+        for row in rows:
+            if row['Item Code (Items)']:
+                item_code = row['Item Code (Items)']
+                demand[item_code] = demand.get(item_code, 0.0) + float(row['Qty (Items)']) / quantity * units
+    return demand
+
+
+def test_plan_demand_of_shipped_master_data(controller):
+    plan = controller.production_plan(config())
+    assert plan == {f'STO-BIKE-2024-{i:04d}': UNITS for i in range(1, 7)} | \
+        {f'STO-EBIKE-2024-{i:04d}': UNITS for i in range(1, 4)}
+
+    demand = controller.plan_demand(plan)
+    expected = shipped_demand(UNITS)
+    assert len(demand) == 49
+    assert demand == pytest.approx(expected)
+
+
+def test_shipped_plan_orders_fixed_quantities(controller, mock_server):
+    # No BOM component has a supplier in the shipped item_supplier_mapping.csv,
+    # so the plan cannot be ordered and every order falls back to the fixed quantity
+    assert controller.run_procurement_process(config())
+    orders = list(mock_server.store.documents['Purchase Order'].values())
+    assert len(orders) == config().total_orders
+    assert {item['qty'] for order in orders for item in order['items']} == {DEFAULT_QUANTITY}
+
+
+def test_plan_demand_is_ordered_once_components_have_suppliers(controller, tmp_path, monkeypatch):
+    demand = controller.plan_demand(controller.production_plan(config()))
+    components = [{'Item Code': item_code, 'Valuation Rate': '10.0'} for item_code in demand]
+    monkeypatch.setattr(BatchPurchaseOrderGenerator, 'load_master_data',
+                        lambda self: (components, {item_code: 'SUP-0001' for item_code in demand}))
+
+    generator = BatchPurchaseOrderGenerator(LogContext(log_dir=tmp_path / 'logs'))
+    generator.configure(config().start_date, config().end_date, config().total_orders, demand=demand)
+    columns = generator.generate_columns()
+
+    assert len(columns) == config().total_orders
+    ordered = np.bincount(columns.product_index, weights=columns.quantities, minlength=len(columns.products))
+    assert {product['Item Code']: qty for product, qty in zip(columns.products, ordered)} == \
+        {item_code: math.ceil(qty) for item_code, qty in demand.items()}